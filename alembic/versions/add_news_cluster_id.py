@@ -0,0 +1,30 @@
+"""add news cluster id
+
+Revision ID: add_news_cluster_id
+Revises: add_news_content_hash
+Create Date: 2024-06-10 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_news_cluster_id'
+down_revision: Union[str, None] = 'add_news_content_hash'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 已有新闻的 cluster_id 为空，视为各自独立的聚类
+    op.add_column('news_data', sa.Column('cluster_id', sa.String(length=64), nullable=True, comment='近似重复聚类ID（代表条目的去重哈希）'))
+    op.create_index('idx_news_cluster_id', 'news_data', ['cluster_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('idx_news_cluster_id', table_name='news_data')
+    with op.batch_alter_table('news_data') as batch_op:
+        batch_op.drop_column('cluster_id')
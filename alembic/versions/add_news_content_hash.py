@@ -0,0 +1,69 @@
+"""add news content hash
+
+Revision ID: add_news_content_hash
+Revises: create_kline_rollups
+Create Date: 2024-06-03 10:00:00.000000
+
+"""
+import hashlib
+from datetime import datetime
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_news_content_hash'
+down_revision: Union[str, None] = 'create_kline_rollups'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _content_hash(link, title, source, create_time) -> str:
+    # 与 app.datasource.models.market.news_content_hash 保持一致
+    if isinstance(create_time, str):
+        create_time = datetime.fromisoformat(create_time)
+    if link:
+        key = f"link:{link}"
+    else:
+        key = f"title:{source}|{title}|{create_time.isoformat()}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def upgrade() -> None:
+    op.add_column('news_data', sa.Column('content_hash', sa.String(length=64), nullable=True, comment='去重哈希'))
+
+    # 回填已有数据，重复的新闻只保留最早的一条
+    bind = op.get_bind()
+    news = sa.table(
+        'news_data',
+        sa.column('id', sa.Integer),
+        sa.column('content_hash', sa.String),
+    )
+    rows = bind.execute(sa.text(
+        "SELECT id, link, title, source, create_time FROM news_data ORDER BY id"
+    )).all()
+    seen = set()
+    duplicates = []
+    for row in rows:
+        content_hash = _content_hash(row.link, row.title, row.source, row.create_time)
+        if content_hash in seen:
+            duplicates.append(row.id)
+            continue
+        seen.add(content_hash)
+        bind.execute(
+            news.update().where(news.c.id == row.id).values(content_hash=content_hash)
+        )
+    if duplicates:
+        bind.execute(news.delete().where(news.c.id.in_(duplicates)))
+
+    with op.batch_alter_table('news_data') as batch_op:
+        batch_op.alter_column('content_hash', existing_type=sa.String(length=64), nullable=False)
+    op.create_index('uq_news_content_hash', 'news_data', ['content_hash'], unique=True)
+
+
+def downgrade() -> None:
+    op.drop_index('uq_news_content_hash', table_name='news_data')
+    with op.batch_alter_table('news_data') as batch_op:
+        batch_op.drop_column('content_hash')
@@ -0,0 +1,27 @@
+"""add news enrich attempts
+
+Revision ID: add_news_enrich_attempts
+Revises: create_llm_cache
+Create Date: 2024-06-28 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_news_enrich_attempts'
+down_revision: Union[str, None] = 'create_llm_cache'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('news_data', sa.Column('enrich_attempts', sa.Integer(), nullable=False, server_default='0', comment='摘要/情绪处理的尝试次数'))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('news_data') as batch_op:
+        batch_op.drop_column('enrich_attempts')
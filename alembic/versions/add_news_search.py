@@ -0,0 +1,69 @@
+"""add news full-text search
+
+Revision ID: add_news_search
+Revises: add_news_cluster_id
+Create Date: 2024-06-17 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'add_news_search'
+down_revision: Union[str, None] = 'add_news_cluster_id'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# 后续由 news_search_trgm 改为 pg_trgm 索引
+SEARCH_CONFIG = 'simple'
+
+
+def upgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        # 生成列随 title/content 自动更新，已有数据在添加列时一并计算
+        op.execute(
+            "ALTER TABLE news_data ADD COLUMN search_vector tsvector "
+            f"GENERATED ALWAYS AS (to_tsvector('{SEARCH_CONFIG}'::regconfig, "
+            "coalesce(title, '') || ' ' || coalesce(content, ''))) STORED"
+        )
+        op.execute(
+            "CREATE INDEX idx_news_search_vector ON news_data USING GIN (search_vector)"
+        )
+    elif dialect == 'sqlite':
+        op.execute(
+            "CREATE VIRTUAL TABLE news_fts USING fts5(title, content, "
+            "content='news_data', content_rowid='id', tokenize='trigram')"
+        )
+        op.execute(
+            "CREATE TRIGGER news_fts_ai AFTER INSERT ON news_data BEGIN "
+            "INSERT INTO news_fts(rowid, title, content) "
+            "VALUES (new.id, new.title, new.content); END"
+        )
+        op.execute(
+            "CREATE TRIGGER news_fts_ad AFTER DELETE ON news_data BEGIN "
+            "INSERT INTO news_fts(news_fts, rowid, title, content) "
+            "VALUES ('delete', old.id, old.title, old.content); END"
+        )
+        op.execute(
+            "CREATE TRIGGER news_fts_au AFTER UPDATE OF title, content ON news_data BEGIN "
+            "INSERT INTO news_fts(news_fts, rowid, title, content) "
+            "VALUES ('delete', old.id, old.title, old.content); "
+            "INSERT INTO news_fts(rowid, title, content) "
+            "VALUES (new.id, new.title, new.content); END"
+        )
+        # 为已有数据建立索引
+        op.execute("INSERT INTO news_fts(news_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    dialect = op.get_bind().dialect.name
+    if dialect == 'postgresql':
+        op.drop_index('idx_news_search_vector', table_name='news_data')
+        op.drop_column('news_data', 'search_vector')
+    elif dialect == 'sqlite':
+        for trigger in ('news_fts_ai', 'news_fts_ad', 'news_fts_au'):
+            op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+        op.execute("DROP TABLE IF EXISTS news_fts")
@@ -0,0 +1,91 @@
+"""create kline rollups
+
+Revision ID: create_kline_rollups
+Revises: create_klines_table
+Create Date: 2024-05-22 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'create_kline_rollups'
+down_revision: Union[str, None] = 'create_klines_table'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# 表名 -> 周期
+ROLLUPS = {
+    'klines_5m': '5 minutes',
+    'klines_15m': '15 minutes',
+    'klines_1h': '1 hour',
+    'klines_4h': '4 hours',
+    'klines_1d': '1 day',
+}
+
+
+def _has_timescaledb() -> bool:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return False
+    result = bind.execute(sa.text("SELECT 1 FROM pg_extension WHERE extname = 'timescaledb'"))
+    return result.scalar() is not None
+
+
+def upgrade() -> None:
+    if _has_timescaledb():
+        # klines 转为 hypertable，主键需包含时间分区列
+        op.drop_constraint('klines_pkey', 'klines', type_='primary')
+        op.create_primary_key('klines_pkey', 'klines', ['id', 'timestamp'])
+        op.execute("SELECT create_hypertable('klines', 'timestamp', migrate_data => true)")
+
+        # 各周期创建为连续聚合视图，并开启实时聚合
+        for table, bucket in ROLLUPS.items():
+            op.execute(f"""
+                CREATE MATERIALIZED VIEW {table}
+                WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+                SELECT symbol,
+                       time_bucket(INTERVAL '{bucket}', timestamp) AS timestamp,
+                       first(open, timestamp) AS open,
+                       max(high) AS high,
+                       min(low) AS low,
+                       last(close, timestamp) AS close,
+                       sum(volume) AS volume
+                FROM klines
+                GROUP BY symbol, time_bucket(INTERVAL '{bucket}', timestamp)
+                WITH NO DATA
+            """)
+            op.execute(f"""
+                SELECT add_continuous_aggregate_policy('{table}',
+                    start_offset => INTERVAL '3 days',
+                    end_offset => INTERVAL '1 minute',
+                    schedule_interval => INTERVAL '1 minute')
+            """)
+        return
+
+    # 普通数据库：创建聚合表，由 KlineRollup 增量维护
+    for table in ROLLUPS:
+        op.create_table(
+            table,
+            sa.Column('symbol', sa.String(length=20), nullable=False, comment='交易对'),
+            sa.Column('timestamp', sa.DateTime(), nullable=False, comment='周期开始时间(UTC)'),
+            sa.Column('open', sa.Float(), nullable=False, comment='开盘价'),
+            sa.Column('high', sa.Float(), nullable=False, comment='最高价'),
+            sa.Column('low', sa.Float(), nullable=False, comment='最低价'),
+            sa.Column('close', sa.Float(), nullable=False, comment='收盘价'),
+            sa.Column('volume', sa.Float(), nullable=False, comment='成交量'),
+            sa.PrimaryKeyConstraint('symbol', 'timestamp')
+        )
+
+
+def downgrade() -> None:
+    if _has_timescaledb():
+        for table in ROLLUPS:
+            op.execute(f"DROP MATERIALIZED VIEW IF EXISTS {table}")
+        return
+
+    for table in ROLLUPS:
+        op.drop_table(table)
@@ -0,0 +1,40 @@
+"""create klines table
+
+Revision ID: create_klines_table
+Revises: update_news_model
+Create Date: 2024-05-20 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'create_klines_table'
+down_revision: Union[str, None] = 'update_news_model'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # 创建K线表，(symbol, timestamp) 唯一约束用于批量写入时 ON CONFLICT DO NOTHING
+    op.create_table(
+        'klines',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('symbol', sa.String(length=20), nullable=False, comment='交易对'),
+        sa.Column('timestamp', sa.DateTime(), nullable=False, comment='开盘时间(UTC)'),
+        sa.Column('open', sa.Float(), nullable=False, comment='开盘价'),
+        sa.Column('high', sa.Float(), nullable=False, comment='最高价'),
+        sa.Column('low', sa.Float(), nullable=False, comment='最低价'),
+        sa.Column('close', sa.Float(), nullable=False, comment='收盘价'),
+        sa.Column('volume', sa.Float(), nullable=False, comment='成交量'),
+        sa.Column('created_at', sa.DateTime(), nullable=False, server_default=sa.text('CURRENT_TIMESTAMP'), comment='记录创建时间'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('symbol', 'timestamp', name='uq_klines_symbol_timestamp')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('klines')
@@ -0,0 +1,36 @@
+"""create llm cache
+
+Revision ID: create_llm_cache
+Revises: add_news_search
+Create Date: 2024-06-24 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'create_llm_cache'
+down_revision: Union[str, None] = 'add_news_search'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'llm_cache',
+        sa.Column('key', sa.String(length=64), nullable=False, comment='提示词与模型参数的 SHA-256'),
+        sa.Column('model', sa.String(length=50), nullable=False, comment='模型名称'),
+        sa.Column('response', sa.JSON(), nullable=False, comment='分析结果'),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('expires_at', sa.DateTime(), nullable=False, comment='过期时间'),
+        sa.PrimaryKeyConstraint('key')
+    )
+    op.create_index('ix_llm_cache_expires_at', 'llm_cache', ['expires_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_llm_cache_expires_at', table_name='llm_cache')
+    op.drop_table('llm_cache')
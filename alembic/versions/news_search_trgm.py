@@ -0,0 +1,49 @@
+"""news search with pg_trgm
+
+Revision ID: news_search_trgm
+Revises: add_news_enrich_attempts
+Create Date: 2024-07-01 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'news_search_trgm'
+down_revision: Union[str, None] = 'add_news_enrich_attempts'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# 与 app.datasource.models.market.NEWS_SEARCH_TEXT 保持一致
+SEARCH_TEXT = (
+    "(coalesce(news_data.title, '') || ' ' || coalesce(news_data.content, ''))"
+)
+
+
+def upgrade() -> None:
+    # simple 分词会把整段中文当作一个词，改为 pg_trgm 三元组索引做子串匹配
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.execute(
+        "CREATE INDEX idx_news_search_trgm ON news_data "
+        f"USING GIN ({SEARCH_TEXT} gin_trgm_ops)"
+    )
+    op.drop_index('idx_news_search_vector', table_name='news_data')
+    op.drop_column('news_data', 'search_vector')
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute(
+        "ALTER TABLE news_data ADD COLUMN search_vector tsvector "
+        "GENERATED ALWAYS AS (to_tsvector('simple'::regconfig, "
+        "coalesce(title, '') || ' ' || coalesce(content, ''))) STORED"
+    )
+    op.execute(
+        "CREATE INDEX idx_news_search_vector ON news_data USING GIN (search_vector)"
+    )
+    op.drop_index('idx_news_search_trgm', table_name='news_data')
@@ -1,12 +1,24 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from app.api.endpoints import data
+from app.api.endpoints import analysis, data
+from app.core.http import get_http_client
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """应用生命周期：关闭时释放共享的 HTTP 连接池"""
+    yield
+    await get_http_client().close()
+
 
 app = FastAPI(
     title="Crypto Agents API",
     description="加密货币分析服务API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # 配置CORS
@@ -19,4 +31,5 @@ app.add_middleware(
 )
 
 # 注册路由
-app.include_router(data.router, prefix="/api/data", tags=["data"]) 
\ No newline at end of file
+app.include_router(data.router, prefix="/api/data", tags=["data"])
+app.include_router(analysis.router, prefix="/api/analysis", tags=["analysis"]) 
\ No newline at end of file
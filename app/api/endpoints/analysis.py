@@ -0,0 +1,53 @@
+import structlog
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.db import get_db
+from app.core.streaming import format_sse
+from app.jobs.analyze_market import MarketAnalysisJob
+
+logger = structlog.get_logger()
+
+router = APIRouter()
+
+
+def get_analyzer():
+    """获取 LLM 分析器（延迟导入：只有调用分析接口时才需要 LLM 相关依赖）"""
+    from app.core.llm import get_llm_analyzer
+
+    return get_llm_analyzer()
+
+
+@router.get("/stream")
+async def stream_market_analysis(
+    symbol: str = "BTCUSDT",
+    session: AsyncSession = Depends(get_db),
+    analyzer=Depends(get_analyzer),
+) -> StreamingResponse:
+    """
+    流式市场分析（Server-Sent Events）
+
+    事件依次为 token（模型输出片段）、sentiment/confidence（在输出过程中
+    一旦确定即发送）、done（完整分析结果）；出错时发送 error。
+    """
+    job = MarketAnalysisJob(analyzer=analyzer, symbols=[symbol])
+    inputs, _ = await job.collect_inputs(session)
+    if symbol not in inputs:
+        raise HTTPException(status_code=404, detail=f"没有K线数据: {symbol}")
+
+    async def events():
+        try:
+            async for event, data in analyzer.stream_market(
+                *inputs[symbol], symbol=symbol
+            ):
+                yield format_sse(event, data)
+        except Exception as e:
+            logger.error("流式市场分析失败", symbol=symbol, error=str(e))
+            yield format_sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
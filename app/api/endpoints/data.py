@@ -1,47 +1,244 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import List
+from sqlalchemy import func, or_, select
+import base64
+import json
+import math
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
 
-from app.core.db import get_session
-from app.models.market import News, Kline
-from app.models.datasource import DataSource
+from app.core.config import settings
+from app.core.db import get_db
+from app.core.http import get_http_client
+from app.core.indicator_cache import get_indicator_cache
+from app.core.kline_store import from_ms, get_kline_store
+from app.core.types import KlineInterval
+from app.datasource.models.market import News, KLINE_MODELS
+from app.datasource.clustering import get_news_clusterer
+from app.datasource.dedup import get_news_deduplicator
+from app.datasource.polling import get_news_poller
+from app.datasource.repositories.datasource import DataSourceRepository
+from app.datasource.models.datasource import DataSource
+from app.datasource.services.market import MarketService
+from app.jobs.enrich_news import get_news_enrichment_worker
 
 router = APIRouter()
 
 @router.get("/news")
 async def get_news(
     limit: int = 10,
-    session: AsyncSession = Depends(get_session)
+    collapse: bool = False,
+    session: AsyncSession = Depends(get_db)
 ) -> List[dict]:
-    """获取最新新闻"""
-    stmt = select(News).order_by(News.published_at.desc()).limit(limit)
+    """获取最新新闻，collapse 为 true 时每个近似重复聚类只返回代表条目"""
+    stmt = select(News).order_by(News.create_time.desc()).limit(limit)
+    if collapse:
+        stmt = stmt.where(
+            or_(News.cluster_id.is_(None), News.cluster_id == News.content_hash)
+        )
     result = await session.execute(stmt)
     news = result.scalars().all()
-    return [{"title": n.title, "summary": n.summary, "published_at": n.published_at} for n in news]
+    return [
+        {
+            "title": n.title,
+            "summary": n.summary,
+            "published_at": n.create_time,
+            "cluster_id": n.cluster_id or n.content_hash
+        }
+        for n in news
+    ]
+
+def _encode_cursor(value: Any, news_id: int) -> str:
+    """编码键集分页游标"""
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = json.dumps([value, news_id]).encode()
+    return base64.urlsafe_b64encode(payload).decode()
+
+def _decode_cursor(cursor: str, order: str) -> Tuple[Any, int]:
+    """解析键集分页游标"""
+    try:
+        value, news_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if order == "time":
+            value = datetime.fromisoformat(value)
+        return value, int(news_id)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail="无效的分页游标") from e
+
+@router.get("/news/search")
+async def search_news(
+    q: str = Query(..., min_length=1, description="检索词，多个词以空格分隔"),
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    limit: int = Query(20, ge=1, le=100),
+    order: str = Query("rank", pattern="^(rank|time)$"),
+    cursor: Optional[str] = None,
+    session: AsyncSession = Depends(get_db)
+) -> dict:
+    """
+    全文检索新闻
+
+    按相关度（rank）或发布时间（time）降序返回，翻页时传入上一页的 next_cursor
+    """
+    after = _decode_cursor(cursor, order) if cursor else None
+    rows = await DataSourceRepository(session).search_news(
+        q, start=start, end=end, limit=limit, order=order, after=after
+    )
+    items = [
+        {
+            "id": n.id,
+            "title": n.title,
+            "summary": n.summary,
+            "source": n.source,
+            "published_at": n.create_time,
+            "cluster_id": n.cluster_id or n.content_hash,
+            "rank": rank
+        }
+        for n, rank in rows
+    ]
+    next_cursor = None
+    if len(rows) == limit:
+        last, rank = rows[-1]
+        next_cursor = _encode_cursor(
+            rank if order == "rank" else last.create_time, last.id
+        )
+    return {"items": items, "next_cursor": next_cursor}
+
+@router.get("/news/clusters")
+async def get_news_cluster_stats() -> dict:
+    """获取近似重复聚类统计"""
+    clusterer = get_news_clusterer()
+    return clusterer.stats() if clusterer else {}
+
+@router.get("/news/dedup")
+async def get_news_dedup_stats() -> dict:
+    """获取新闻内存去重统计"""
+    deduplicator = get_news_deduplicator()
+    return deduplicator.stats() if deduplicator else {}
+
+@router.get("/news/enrichment")
+async def get_news_enrichment_stats(
+    session: AsyncSession = Depends(get_db)
+) -> dict:
+    """获取新闻摘要/情绪处理的进度与吞吐量"""
+    repository = DataSourceRepository(session)
+    return {
+        "status": await repository.count_news_by_status(),
+        **get_news_enrichment_worker().stats(),
+    }
 
 @router.get("/klines")
 async def get_klines(
     limit: int = 10,
-    session: AsyncSession = Depends(get_session)
+    symbol: Optional[str] = None,
+    interval: KlineInterval = KlineInterval.M1,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    session: AsyncSession = Depends(get_db)
 ) -> List[dict]:
-    """获取最新K线数据"""
-    stmt = select(Kline).order_by(Kline.timestamp.desc()).limit(limit)
+    """获取最新K线数据，interval 为 1m 以外的周期时读取聚合K线
+
+    指定交易对且已配置列式K线缓存时，若缓存覆盖请求的范围则直接从缓存读取K线；
+    缓存只有部分历史，或最新K线落后于数据库（如写入失败待重试）时回退到数据库，
+    避免返回被截断或过期的结果。
+    """
+    model = KLINE_MODELS[interval]
+    store = get_kline_store()
+    columns = store.read(symbol, interval, start, end) if symbol and store else None
+    use_store = columns is not None and (
+        store.covers(symbol, interval, start) if start
+        else len(columns["timestamp"]) >= limit
+    )
+    if use_store:
+        # 只查询范围内最新K线的时间，确认缓存不落后于数据库
+        stmt = select(func.max(model.timestamp)).where(model.symbol == symbol)
+        if end:
+            stmt = stmt.where(model.timestamp < end)
+        latest = (await session.execute(stmt)).scalar_one_or_none()
+        timestamps = columns["timestamp"]
+        use_store = latest is None or (
+            len(timestamps) > 0 and from_ms(int(timestamps[-1])) >= latest
+        )
+    if use_store:
+        rows = range(len(columns["timestamp"]) - 1, -1, -1)
+        return [{
+            "symbol": symbol,
+            "interval": interval.value,
+            "timestamp": from_ms(int(columns["timestamp"][i])),
+            "open": float(columns["open"][i]),
+            "high": float(columns["high"][i]),
+            "low": float(columns["low"][i]),
+            "close": float(columns["close"][i]),
+            "volume": float(columns["volume"][i])
+        } for i in rows[:limit]]
+
+    stmt = select(model)
+    if symbol:
+        stmt = stmt.where(model.symbol == symbol)
+    if start:
+        stmt = stmt.where(model.timestamp >= start)
+    if end:
+        stmt = stmt.where(model.timestamp < end)
+    stmt = stmt.order_by(model.timestamp.desc()).limit(limit)
     result = await session.execute(stmt)
     klines = result.scalars().all()
-    return [{"timestamp": k.timestamp, "open": k.open, "close": k.close} for k in klines]
+    return [{
+        "symbol": k.symbol,
+        "interval": interval.value,
+        "timestamp": k.timestamp,
+        "open": k.open,
+        "high": k.high,
+        "low": k.low,
+        "close": k.close,
+        "volume": k.volume
+    } for k in klines]
+
+@router.get("/indicators")
+async def get_indicators(
+    symbol: str,
+    interval: KlineInterval = KlineInterval.M1,
+    session: AsyncSession = Depends(get_db)
+) -> dict:
+    """获取交易对最新技术指标，没有新K线时直接返回缓存结果"""
+    snapshot = await MarketService(session).get_indicator_snapshot(symbol, interval)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail=f"没有K线数据: {symbol}")
+    # 数据不足时部分指标为 NaN，JSON 中返回 null
+    values = {
+        k: None if isinstance(v, float) and math.isnan(v) else v
+        for k, v in snapshot.items()
+    }
+    return {"symbol": symbol, "interval": interval.value, **values}
+
+@router.get("/indicators/cache")
+async def get_indicator_cache_stats() -> dict:
+    """获取指标缓存命中统计"""
+    return get_indicator_cache().stats()
+
+@router.get("/http/pool")
+async def get_http_pool_stats() -> dict:
+    """获取共享 HTTP 连接池的使用情况"""
+    return get_http_client().stats()
 
 @router.get("/sources")
 async def get_sources(
-    session: AsyncSession = Depends(get_session)
+    session: AsyncSession = Depends(get_db)
 ) -> List[dict]:
     """获取数据源状态"""
     stmt = select(DataSource)
     result = await session.execute(stmt)
     sources = result.scalars().all()
+    poller = get_news_poller()
+    polling = poller.stats()
     return [{
         "name": s.name,
         "type": s.type,
-        "last_fetch_time": s.last_fetch_time,
-        "is_active": s.is_active
-    } for s in sources] 
\ No newline at end of file
+        "last_fetch_time": s.last_fetch_at,
+        "is_active": s.is_active,
+        "fetch_interval": s.fetch_interval,
+        "current_interval": (
+            poller.interval(s.name, s.fetch_interval)
+            if settings.NEWS_POLL_ADAPTIVE else s.fetch_interval
+        ),
+        "arrival_rate": polling.get(s.name, {}).get("rate_per_minute")
+    } for s in sources]
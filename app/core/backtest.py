@@ -0,0 +1,198 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, Mapping, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from app.core.indicator_panel import IndicatorPanel
+from app.core.indicators import sentiment_scores
+from app.core.kline_store import KlineStore
+from app.core.types import KlineInterval
+
+
+@dataclass(frozen=True)
+class SentimentRules:
+    """市场情绪规则参数，默认值与 get_market_sentiment 一致"""
+
+    rsi_overbought: float = 70
+    rsi_oversold: float = 30
+    bullish_score: int = 2
+    bearish_score: int = -2
+    allow_short: bool = True  # 看跌时是否做空，否则空仓
+
+
+class BacktestResult:
+    """单组规则的回测结果（宽表均为 时间 × 交易对）"""
+
+    def __init__(
+        self,
+        rules: SentimentRules,
+        positions: pd.DataFrame,
+        forward_returns: pd.DataFrame,
+        returns: pd.DataFrame,
+    ):
+        self.rules = rules
+        self.positions = positions
+        self.forward_returns = forward_returns
+        self.returns = returns
+
+    @property
+    def equity(self) -> pd.DataFrame:
+        """净值曲线（初始为 1）"""
+        return (1.0 + self.returns).cumprod()
+
+    @property
+    def drawdown(self) -> pd.DataFrame:
+        """回撤曲线（相对历史最高净值，非正数）"""
+        equity = self.equity
+        return equity / equity.cummax() - 1.0
+
+    def summary(self) -> pd.DataFrame:
+        """
+        汇总各交易对的回测指标
+
+        Returns:
+            pd.DataFrame: 行为交易对，列为 signals/hit_rate/total_return/max_drawdown
+        """
+        positions = self.positions.to_numpy()
+        forward = self.forward_returns.to_numpy()
+        active = (positions != 0) & ~np.isnan(forward)
+        hits = active & (np.sign(positions) == np.sign(forward))
+        signals = active.sum(axis=0)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            hit_rate = np.where(signals > 0, hits.sum(axis=0) / signals, np.nan)
+
+        return pd.DataFrame(
+            {
+                "signals": signals,
+                "hit_rate": hit_rate,
+                "total_return": self.equity.iloc[-1].to_numpy() - 1.0,
+                "max_drawdown": self.drawdown.min().to_numpy(),
+            },
+            index=self.positions.columns,
+        )
+
+
+class SentimentBacktest:
+    """市场情绪信号的向量化回测
+
+    在第 t 根K线收盘时按情绪开仓（看涨做多，看跌做空或空仓，中性空仓），
+    持有到第 t + 1 根K线收盘。指标只计算一次，不同规则只重算得分，
+    所有交易对、所有K线一次性计算，无逐行循环。
+    """
+
+    # 与 get_market_sentiment 一致：K线不足20根视为中性
+    MIN_BARS = 20
+
+    def __init__(self, panel: IndicatorPanel, fee: float = 0.0):
+        """
+        初始化回测器
+
+        Args:
+            panel: 指标面板
+            fee: 单边手续费率，仓位每变化 1 个单位扣除一次
+        """
+        self.panel = panel
+        self.fee = fee
+        if not panel.indicators:
+            panel.calculate_all()
+
+        close = panel.fields["close"]
+        self._close = close
+        self._forward_returns = close.shift(-1) / close - 1.0
+        self._warm = (close.notna().cumsum() >= self.MIN_BARS).to_numpy()
+
+    @classmethod
+    def from_store(
+        cls,
+        store: KlineStore,
+        symbols: Iterable[str],
+        interval: Union[str, KlineInterval] = KlineInterval.M1,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        fee: float = 0.0,
+    ) -> "SentimentBacktest":
+        """
+        从列式K线缓存加载数据构建回测器
+
+        Args:
+            store: 列式K线缓存
+            symbols: 交易对列表
+            interval: K线周期
+            start: 开始时间（包含）
+            end: 结束时间（不包含）
+            fee: 单边手续费率
+
+        Returns:
+            SentimentBacktest: 回测器
+        """
+        frames = {
+            symbol: store.frame(symbol, interval, start, end) for symbol in symbols
+        }
+        df = pd.concat(frames, names=["symbol", "timestamp"])
+        return cls(IndicatorPanel.from_frame(df), fee=fee)
+
+    def positions(self, rules: SentimentRules) -> pd.DataFrame:
+        """
+        计算每根K线收盘后的目标仓位
+
+        Args:
+            rules: 情绪规则参数
+
+        Returns:
+            pd.DataFrame: 仓位宽表（1 多头，-1 空头，0 空仓）
+        """
+        ind = self.panel.indicators
+        columns = self.panel.plan.require_sentiment()
+        scores = sentiment_scores(
+            close=self._close.to_numpy(),
+            **{name: ind[column].to_numpy() for name, column in columns.items()},
+            rsi_overbought=rules.rsi_overbought,
+            rsi_oversold=rules.rsi_oversold,
+        )
+        short = -1 if rules.allow_short else 0
+        positions = np.select(
+            [scores >= rules.bullish_score, scores <= rules.bearish_score],
+            [1, short],
+            default=0,
+        ).astype(np.int8)
+        positions[~self._warm] = 0
+        return pd.DataFrame(
+            positions, index=self._close.index, columns=self._close.columns
+        )
+
+    def run(self, rules: Optional[SentimentRules] = None) -> BacktestResult:
+        """
+        回测单组规则
+
+        Args:
+            rules: 情绪规则参数，默认与 get_market_sentiment 一致
+
+        Returns:
+            BacktestResult: 回测结果
+        """
+        rules = rules or SentimentRules()
+        positions = self.positions(rules)
+        forward = self._forward_returns
+        returns = (positions * forward).fillna(0.0)
+        if self.fee:
+            turnover = positions.diff().abs().fillna(positions.abs())
+            returns -= turnover * self.fee
+        return BacktestResult(rules, positions, forward, returns)
+
+    def run_many(
+        self, variants: Union[Mapping[str, SentimentRules], Sequence[SentimentRules]]
+    ) -> Dict[str, BacktestResult]:
+        """
+        回测多组规则（共用同一份指标）
+
+        Args:
+            variants: 名称 -> 规则参数，或规则参数列表（以 repr 为名称）
+
+        Returns:
+            Dict[str, BacktestResult]: 名称 -> 回测结果
+        """
+        if not isinstance(variants, Mapping):
+            variants = {repr(rules): rules for rules in variants}
+        return {name: self.run(rules) for name, rules in variants.items()}
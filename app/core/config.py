@@ -1,4 +1,4 @@
-from typing import Optional
+from typing import Any, Dict, List, Optional
 
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
@@ -33,13 +33,103 @@ class Settings(BaseSettings):
     LLM_MODEL: str = "gpt-3.5-turbo"
     LLM_TEMPERATURE: float = 0.7
     LLM_MAX_TOKENS: int = 1000
+    LLM_PRICE_PROMPT_PER_1K: float = 0.0005      # 每千个输入 token 的价格（美元）
+    LLM_PRICE_COMPLETION_PER_1K: float = 0.0015  # 每千个输出 token 的价格（美元）
+    LLM_PROMPT_TOKEN_BUDGET: int = 2000          # 市场分析提示词的 token 上限（本地估算）
+    LLM_PROMPT_NEWS_CHARS: int = 200             # 提示词中单条新闻的字符数上限
+    LLM_RPM_LIMIT: float = 500                   # 客户端侧每分钟请求数上限
+    LLM_TPM_LIMIT: float = 90000                 # 客户端侧每分钟 token 数上限
+    LLM_TIMEOUT: float = 60                      # 单次调用超时（秒）
+    LLM_MAX_RETRIES: int = 3                     # 失败或超时后的最大重试次数
+    LLM_RETRY_BASE_DELAY: float = 1.0            # 重试退避基数（秒）
+    LLM_RETRY_MAX_DELAY: float = 30.0            # 单次重试等待上限（秒）
+    LLM_ANALYSIS_ENABLED: bool = False           # 定期分析 LLM_ANALYSIS_SYMBOLS（会产生费用）
+    LLM_ANALYSIS_SYMBOLS: List[str] = ["BTCUSDT"]  # 定期分析的交易对
+    LLM_ANALYSIS_CONCURRENCY: int = 8            # 同时进行的分析数
+    LLM_ANALYSIS_NEWS_HOURS: float = 6           # 分析时参考近 N 小时的新闻
+    LLM_ANALYSIS_NEWS_LIMIT: int = 50            # 分析时读取的新闻条数上限
+
+    # LLM 响应缓存配置（键为渲染后提示词与模型参数的哈希）
+    LLM_CACHE_ENABLED: bool = True        # 相同输入复用已有分析结果
+    LLM_CACHE_TTL: float = 900            # 缓存有效期（秒）
+    LLM_CACHE_SIZE: int = 256             # 内存层最大条目数
+    LLM_CACHE_PERSISTENT: bool = True     # 同时写入数据库，跨进程、跨重启共享
+
+    # HTTP 客户端配置（所有数据源适配器共享同一连接池）
+    HTTP_POOL_LIMIT: int = 100            # 连接池总连接数上限
+    HTTP_POOL_LIMIT_PER_HOST: int = 10    # 单主机连接数上限
+    HTTP_KEEPALIVE_TIMEOUT: float = 30    # 空闲长连接保持时间（秒）
+    HTTP_DNS_CACHE_TTL: int = 300         # DNS 缓存有效期（秒）
+    HTTP_TIMEOUT: float = 30              # 单次请求总超时（秒）
+    HTTP_CONNECT_TIMEOUT: float = 10      # 建立连接超时（秒）
 
     # 数据源配置
     BLOCKBEATS_API_URL: str = "https://api.theblockbeats.news/v1/open-api/open-flash"
     BLOCKBEATS_FETCH_INTERVAL: int = 300  # 5分钟
     MARKET_FETCH_INTERVAL: int = 60       # 1分钟
+    NEWS_FETCH_MAX_SOURCES: int = 4       # 同时拉取新闻的数据源数量上限
+    NEWS_SOURCE_SYNC_INTERVAL: int = 60   # 同步数据源任务的间隔（秒）
+    NEWS_POLL_ADAPTIVE: bool = False      # 按新闻到达速率自适应调整轮询间隔
+    NEWS_POLL_MIN_INTERVAL: float = 30    # 自适应轮询的最短间隔（秒）
+    NEWS_POLL_MAX_INTERVAL: float = 1800  # 自适应轮询的最长间隔（秒）
+    NEWS_POLL_TARGET_ITEMS: float = 5     # 每次轮询期望取到的新闻数
+    NEWS_POLL_BACKOFF: float = 1.5        # 无新内容时间隔单次最多放大的倍数
+    NEWS_POLL_SMOOTHING: float = 0.3      # 到达速率的平滑系数
+    NEWS_FETCH_PAGE_SIZE: int = 50       # 增量获取新闻时的每页数量
+    NEWS_FETCH_MAX_PAGES: int = 20        # 单次增量获取的最大页数
+    NEWS_FETCH_CONCURRENCY: int = 4       # 追赶缺口时并发获取的页数
+    NEWS_DEDUP_ENABLED: bool = True       # 入库前用内存已见集合过滤新闻
+    NEWS_DEDUP_LRU_SIZE: int = 10000      # 每个数据源精确 LRU 的条目上限
+    NEWS_DEDUP_WARMUP_DAYS: int = 7       # 预热时加载近几天的新闻
+    NEWS_CLUSTER_ENABLED: bool = True     # 入库前按 MinHash 聚合近似重复新闻
+    NEWS_CLUSTER_THRESHOLD: float = 0.5   # 近似重复的 Jaccard 相似度下限
+    NEWS_CLUSTER_NUM_PERM: int = 64       # MinHash 签名长度
+    NEWS_CLUSTER_BANDS: int = 16          # LSH 分段数
+    NEWS_CLUSTER_WINDOW_HOURS: float = 24  # 只与近 N 小时的新闻比较
+    NEWS_CLUSTER_MAX_ITEMS: int = 50000   # 聚类索引条目上限
+    NEWS_ENRICH_ENABLED: bool = False     # 后台调用 LLM 为待处理新闻生成摘要与情绪（会产生费用）
+    NEWS_ENRICH_INTERVAL: int = 60        # 处理任务的间隔（秒）
+    NEWS_ENRICH_CLAIM_SIZE: int = 100     # 每轮认领的待处理新闻数
+    NEWS_ENRICH_ITEMS_PER_REQUEST: int = 10  # 单次 LLM 请求最多打包的新闻数
+    NEWS_ENRICH_TOKEN_BUDGET: int = 3000  # 单次请求的提示词 token 上限
+    NEWS_ENRICH_CONTENT_CHARS: int = 500  # 每条新闻正文截取的字符数
+    NEWS_ENRICH_CONCURRENCY: int = 4      # 同时进行的 LLM 请求数
+    NEWS_ENRICH_STALE_SECONDS: int = 600  # processing 超过该时长视为中断，重新认领
+    NEWS_ENRICH_MAX_ATTEMPTS: int = 3     # 请求失败（限流、超时等）的新闻重新排队的次数上限
     INDICATOR_CALC_INTERVAL: int = 300    # 5分钟
 
+    # 行情数据配置
+    MARKET_SYMBOLS: List[str] = ["BTCUSDT"]
+    MARKET_KLINE_INTERVAL: str = "1m"
+    MARKET_FETCH_LIMIT: int = 1000        # 单页K线数量（Binance 上限 1000）
+    MARKET_FETCH_CONCURRENCY: int = 5     # 并发请求数
+    MARKET_FETCH_ENABLED: bool = True     # 按 MARKET_FETCH_INTERVAL 定期拉取并补齐K线
+    MARKET_BACKFILL_MAX_PAGES: int = 10   # 每个交易对每轮最多补齐的页数
+    MARKET_GAP_SCAN_BARS: int = 1440      # 检查中间空洞（如断线遗漏）的最近K线数量
+    MARKET_ROLLUP_INTERVALS: List[str] = ["5m", "15m", "1h", "4h", "1d"]  # 由1m聚合的周期
+    KLINE_STORE_DIR: Optional[str] = None  # 列式K线缓存目录，为空则不启用
+    MARKET_STREAM_ENABLED: bool = False   # 是否启用 websocket K线流
+    MARKET_STREAM_URL: str = "wss://stream.binance.com:9443"
+    MARKET_STREAM_MAX_STREAMS: int = 200  # 单连接订阅的最大流数量
+    MARKET_STREAM_BATCH_SIZE: int = 500   # 缓冲达到该数量立即写库
+    MARKET_STREAM_FLUSH_INTERVAL: float = 1.0  # 最长写库间隔（秒）
+
+    # 技术指标配置（type 为已注册的指标类型，其余为参数，可选 name 指定列名）
+    INDICATOR_SPECS: List[Dict[str, Any]] = [
+        {"type": "sma", "length": 5},
+        {"type": "sma", "length": 10},
+        {"type": "sma", "length": 20},
+        {"type": "rsi", "length": 14},
+        {"type": "macd", "fast": 12, "slow": 26, "signal": 9},
+        {"type": "bbands", "length": 20, "std": 2.0},
+        {"type": "obv"},
+    ]
+
+    # 指标缓存配置
+    INDICATOR_CACHE_SIZE: int = 1024      # 最大缓存条目数
+    INDICATOR_CACHE_TTL: float = 300      # 缓存有效期（秒）
+    INDICATOR_LOOKBACK: int = 200         # 计算指标时读取的K线数量
+
     # 监控配置
     ENABLE_METRICS: bool = True
     PROMETHEUS_PORT: int = 9090
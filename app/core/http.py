@@ -0,0 +1,173 @@
+import asyncio
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+import aiohttp
+import orjson
+import structlog
+
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+
+def decode_json(body: bytes) -> Any:
+    """
+    解析 JSON 响应体（orjson 直接解析字节，无需先解码为字符串）
+
+    Args:
+        body: 响应体原始字节
+
+    Returns:
+        Any: 解析结果
+    """
+    return orjson.loads(body)
+
+
+class HttpClientManager:
+    """进程内共享的 HTTP 客户端
+
+    所有数据源适配器共用同一个 aiohttp 会话与连接池：限制总连接数与单主机连接数，
+    保持长连接并缓存 DNS 解析结果，避免每次拉取都重新建立 TCP/TLS 连接。
+    会话在首次使用时创建，由应用启动/关闭流程负责调用 close 释放。
+    """
+
+    def __init__(
+        self,
+        limit: Optional[int] = None,
+        limit_per_host: Optional[int] = None,
+        keepalive_timeout: Optional[float] = None,
+        dns_cache_ttl: Optional[int] = None,
+        timeout: Optional[float] = None,
+        connect_timeout: Optional[float] = None,
+    ):
+        """
+        初始化客户端管理器，参数默认读取 HTTP_* 配置
+
+        Args:
+            limit: 连接池总连接数上限
+            limit_per_host: 单主机连接数上限
+            keepalive_timeout: 空闲长连接的保持时间（秒）
+            dns_cache_ttl: DNS 缓存有效期（秒）
+            timeout: 单次请求总超时（秒）
+            connect_timeout: 建立连接超时（秒）
+        """
+        self.limit = limit or settings.HTTP_POOL_LIMIT
+        self.limit_per_host = limit_per_host or settings.HTTP_POOL_LIMIT_PER_HOST
+        self.keepalive_timeout = keepalive_timeout or settings.HTTP_KEEPALIVE_TIMEOUT
+        self.dns_cache_ttl = dns_cache_ttl or settings.HTTP_DNS_CACHE_TTL
+        self.timeout = aiohttp.ClientTimeout(
+            total=timeout or settings.HTTP_TIMEOUT,
+            connect=connect_timeout or settings.HTTP_CONNECT_TIMEOUT,
+        )
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.counters = {
+            "requests": 0, "connections_created": 0, "connections_reused": 0
+        }
+        # 等待响应的请求数与排队等待空闲连接的请求数
+        self.in_flight = 0
+        self.queued = 0
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        """统计请求数、连接复用与排队情况"""
+        trace = aiohttp.TraceConfig()
+
+        async def on_request_start(session, context, params):
+            self.counters["requests"] += 1
+            self.in_flight += 1
+
+        async def on_request_done(session, context, params):
+            self.in_flight -= 1
+
+        async def on_queued_start(session, context, params):
+            self.queued += 1
+
+        async def on_queued_end(session, context, params):
+            self.queued -= 1
+
+        async def on_connection_create_end(session, context, params):
+            self.counters["connections_created"] += 1
+
+        async def on_connection_reuseconn(session, context, params):
+            self.counters["connections_reused"] += 1
+
+        trace.on_request_start.append(on_request_start)
+        trace.on_request_end.append(on_request_done)
+        trace.on_request_exception.append(on_request_done)
+        trace.on_connection_queued_start.append(on_queued_start)
+        trace.on_connection_queued_end.append(on_queued_end)
+        trace.on_connection_create_end.append(on_connection_create_end)
+        trace.on_connection_reuseconn.append(on_connection_reuseconn)
+        return trace
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """
+        共享会话，首次使用或关闭后再次使用时创建
+
+        Raises:
+            RuntimeError: 已有会话属于另一个事件循环且尚未关闭
+        """
+        loop = asyncio.get_running_loop()
+        if self._session is not None and not self._session.closed:
+            if self._loop is not loop:
+                # 连接绑定在原事件循环上，无法在这里关闭，直接替换会泄漏连接
+                raise RuntimeError(
+                    "HTTP 会话属于另一个事件循环，需先在原事件循环中调用 close()"
+                )
+            return self._session
+        connector = aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=self.dns_cache_ttl,
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=self.timeout,
+            trace_configs=[self._trace_config()],
+        )
+        self._loop = loop
+        logger.info(
+            "HTTP连接池已创建",
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+        )
+        return self._session
+
+    async def close(self) -> None:
+        """关闭共享会话及其连接池"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+            logger.info("HTTP连接池已关闭")
+        self._session = None
+        self._loop = None
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        连接池使用情况
+
+        Returns:
+            Dict[str, Any]: limit/limit_per_host、请求数、新建与复用的连接数、
+                连接复用率、等待响应与排队等待连接的请求数
+        """
+        result: Dict[str, Any] = {
+            "limit": self.limit,
+            "limit_per_host": self.limit_per_host,
+            **self.counters,
+        }
+        requests = self.counters["requests"]
+        result["reuse_rate"] = (
+            self.counters["connections_reused"] / requests if requests else 0.0
+        )
+        # aiohttp 未公开连接池状态，只统计 TraceConfig 信号
+        result["in_flight"] = self.in_flight
+        result["queued"] = self.queued
+        return result
+
+
+@lru_cache
+def get_http_client() -> HttpClientManager:
+    """获取全局 HTTP 客户端"""
+    return HttpClientManager()
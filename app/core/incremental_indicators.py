@@ -0,0 +1,397 @@
+import math
+from collections import deque
+from datetime import datetime
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pandas as pd
+
+from app.core.indicator_registry import IndicatorPlan, get_default_plan
+from app.core.indicators import evaluate_sentiment
+
+NAN = float("nan")
+
+
+class _RollingWindow:
+    """固定窗口的滚动均值/方差（O(1) 更新）"""
+
+    def __init__(self, length: int):
+        self.length = length
+        self.values: Deque[float] = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def push(self, value: float) -> None:
+        """加入新值，窗口满时同时移出最旧的值"""
+        if len(self.values) < self.length:
+            # Welford 在线算法
+            self.values.append(value)
+            delta = value - self.mean
+            self.mean += delta / len(self.values)
+            self.m2 += delta * (value - self.mean)
+            return
+
+        oldest = self.values.popleft()
+        self.values.append(value)
+        prev_mean = self.mean
+        self.mean += (value - oldest) / self.length
+        self.m2 += (value - oldest) * (value - self.mean + oldest - prev_mean)
+        if self.m2 < 0:
+            self.m2 = 0.0
+
+    @property
+    def ready(self) -> bool:
+        return len(self.values) == self.length
+
+    def sma(self) -> float:
+        return self.mean if self.ready else NAN
+
+    def std(self, ddof: int = 1) -> float:
+        if not self.ready:
+            return NAN
+        return math.sqrt(self.m2 / (self.length - ddof))
+
+
+class _EMAState:
+    """EMA 状态，前 length 个值用 SMA 作为初值（与 pandas-ta presma 一致）"""
+
+    def __init__(self, length: int):
+        self.length = length
+        self.alpha = 2.0 / (length + 1)
+        self.count = 0
+        self.seed_sum = 0.0
+        self.value = NAN
+
+    def push(self, value: float) -> float:
+        self.count += 1
+        if self.count < self.length:
+            self.seed_sum += value
+        elif self.count == self.length:
+            self.value = (self.seed_sum + value) / self.length
+        else:
+            self.value = (1 - self.alpha) * self.value + self.alpha * value
+        return self.value
+
+
+class _RMAState:
+    """Wilder 平滑均值状态（alpha = 1 / length，首个值作为初值，
+    前 length - 1 个值为 NaN，与批量计算的 rma 一致）"""
+
+    def __init__(self, length: int):
+        self.length = length
+        self.alpha = 1.0 / length
+        self.count = 0
+        self.value = NAN
+
+    def push(self, value: float) -> float:
+        self.count += 1
+        if math.isnan(self.value):
+            self.value = value
+        else:
+            self.value = (1 - self.alpha) * self.value + self.alpha * value
+        return self.value if self.count >= self.length else NAN
+
+
+class _IncrementalContext:
+    """增量计算的共享状态
+
+    滚动窗口与 EMA 按 (运算, 来源, 周期) 只维护一份，例如 MACD 与 EMA 指标
+    共用同一条 EMA，布林带与同周期均线共用同一个窗口；每根K线只推入一次。
+    """
+
+    def __init__(self):
+        self._states: Dict[Tuple[str, str, int], Any] = {}
+
+    def window(self, source: str, length: int) -> _RollingWindow:
+        key = ("window", source, length)
+        if key not in self._states:
+            self._states[key] = _RollingWindow(length)
+        return self._states[key]
+
+    def ema(self, source: str, length: int) -> _EMAState:
+        key = ("ema", source, length)
+        if key not in self._states:
+            self._states[key] = _EMAState(length)
+        return self._states[key]
+
+    def push(self, bar: Dict[str, float]) -> None:
+        for (_, source, _), state in self._states.items():
+            state.push(bar[source])
+
+
+# 单步计算：step(当前K线, 上一根K线) -> 按指标输出顺序排列的值
+IncrementalStep = Callable[
+    [Dict[str, float], Optional[Dict[str, float]]], Sequence[float]
+]
+INCREMENTAL_STEPS: Dict[str, Callable[..., IncrementalStep]] = {}
+
+
+def register_incremental(
+    type: str
+) -> Callable[[Callable[..., IncrementalStep]], Callable[..., IncrementalStep]]:
+    """
+    注册指标类型的增量实现
+
+    Args:
+        type: 指标类型（与 register_indicator 一致）
+
+    Returns:
+        Callable: 装饰器，被装饰函数 builder(ctx, **params) 返回单步计算函数
+    """
+    def decorator(
+        builder: Callable[..., IncrementalStep]
+    ) -> Callable[..., IncrementalStep]:
+        INCREMENTAL_STEPS[type] = builder
+        return builder
+
+    return decorator
+
+
+@register_incremental("sma")
+def _sma(ctx: _IncrementalContext, length: int, source: str) -> IncrementalStep:
+    window = ctx.window(source, length)
+    return lambda bar, prev: (window.sma(),)
+
+
+@register_incremental("ema")
+def _ema(ctx: _IncrementalContext, length: int, source: str) -> IncrementalStep:
+    state = ctx.ema(source, length)
+    return lambda bar, prev: (state.value,)
+
+
+@register_incremental("rsi")
+def _rsi(ctx: _IncrementalContext, length: int, source: str) -> IncrementalStep:
+    gains, losses = _RMAState(length), _RMAState(length)
+
+    def step(bar, prev):
+        if prev is None:
+            return (NAN,)
+        change = bar[source] - prev[source]
+        gain = gains.push(max(change, 0.0))
+        loss = losses.push(-min(change, 0.0))
+        total = gain + loss
+        return (100 * gain / total if total else NAN,)
+
+    return step
+
+
+@register_incremental("macd")
+def _macd(
+    ctx: _IncrementalContext, fast: int, slow: int, signal: int, source: str
+) -> IncrementalStep:
+    fast_ema, slow_ema = ctx.ema(source, fast), ctx.ema(source, slow)
+    signal_ema = _EMAState(signal)
+
+    def step(bar, prev):
+        macd = fast_ema.value - slow_ema.value
+        macd_signal = signal_ema.push(macd) if not math.isnan(macd) else NAN
+        return macd, macd_signal, macd - macd_signal
+
+    return step
+
+
+@register_incremental("bbands")
+def _bbands(
+    ctx: _IncrementalContext, length: int, std: float, source: str
+) -> IncrementalStep:
+    window = ctx.window(source, length)
+
+    def step(bar, prev):
+        middle = window.sma()
+        deviation = std * window.std()
+        return middle - deviation, middle, middle + deviation
+
+    return step
+
+
+@register_incremental("obv")
+def _obv(ctx: _IncrementalContext) -> IncrementalStep:
+    obv = [NAN]
+
+    def step(bar, prev):
+        if prev is None:
+            return (NAN,)
+        change = _sign(bar["close"] - prev["close"]) * bar["volume"]
+        obv[0] = change if math.isnan(obv[0]) else obv[0] + change
+        return (obv[0],)
+
+    return step
+
+
+def _sign(value: float) -> float:
+    if value > 0:
+        return 1.0
+    if value < 0:
+        return -1.0
+    return 0.0
+
+
+class IncrementalIndicators:
+    """单个交易对的增量技术指标计算器
+
+    按指标计算计划（与批量计算相同的 INDICATOR_SPECS）构建状态，
+    每根新K线只做常数次运算，结果与 TechnicalIndicators.calculate_all 逐行一致
+    """
+
+    def __init__(self, plan: Optional[IndicatorPlan] = None):
+        """
+        初始化增量计算器
+
+        Args:
+            plan: 指标计算计划，默认按 INDICATOR_SPECS 编译
+
+        Raises:
+            ValueError: 计划中包含没有增量实现的指标类型
+        """
+        self.plan = plan or get_default_plan()
+        self.count = 0
+        self.last_timestamp: Optional[datetime] = None
+
+        self._ctx = _IncrementalContext()
+        self._steps: List[Tuple[IncrementalStep, List[str]]] = []
+        for indicator, params, columns in self.plan.steps:
+            builder = INCREMENTAL_STEPS.get(indicator.type)
+            if builder is None:
+                raise ValueError(f"指标类型不支持增量计算: {indicator.type}")
+            self._steps.append((builder(self._ctx, **params), columns))
+        self._prev: Optional[Dict[str, float]] = None
+        self._latest: Dict[str, float] = {}
+
+    def update(
+        self,
+        open: float,
+        high: float,
+        low: float,
+        close: float,
+        volume: float,
+        timestamp: Optional[datetime] = None,
+    ) -> Dict[str, float]:
+        """
+        推入一根已收盘的K线并返回最新指标
+
+        Args:
+            open: 开盘价
+            high: 最高价
+            low: 最低价
+            close: 收盘价
+            volume: 成交量
+            timestamp: K线时间，重复或过期的K线会被忽略
+
+        Returns:
+            Dict[str, float]: 最新指标值（未就绪的指标为 NaN）
+        """
+        if timestamp is not None:
+            if self.last_timestamp is not None and timestamp <= self.last_timestamp:
+                return self._latest
+            self.last_timestamp = timestamp
+
+        bar = {
+            "open": float(open),
+            "high": float(high),
+            "low": float(low),
+            "close": float(close),
+            "volume": float(volume),
+        }
+        self.count += 1
+        self._ctx.push(bar)
+
+        latest = dict(bar)
+        for step, columns in self._steps:
+            latest.update(zip(columns, step(bar, self._prev)))
+
+        self._prev = bar
+        self._latest = latest
+        return latest
+
+    def warmup(self, df: pd.DataFrame) -> None:
+        """
+        用历史K线初始化状态
+
+        Args:
+            df: 包含OHLCV数据的DataFrame，按时间升序
+        """
+        columns = ("open", "high", "low", "close", "volume")
+        for open, high, low, close, volume in zip(*(df[c].to_numpy() for c in columns)):
+            self.update(open, high, low, close, volume)
+
+    @property
+    def latest(self) -> Dict[str, float]:
+        """最新指标值"""
+        return self._latest
+
+    def get_market_sentiment(self) -> str:
+        """
+        基于最新指标计算市场情绪，规则与 TechnicalIndicators 相同
+
+        Returns:
+            str: 市场情绪（看涨/看跌/中性）
+        """
+        columns = self.plan.require_sentiment()
+        if self.count < 20:
+            return "中性"
+
+        latest = self._latest
+        return evaluate_sentiment(
+            close=latest["close"],
+            **{name: latest[column] for name, column in columns.items()},
+        )
+
+
+class IncrementalIndicatorEngine:
+    """多交易对增量指标引擎，按交易对维护独立状态"""
+
+    def __init__(self, plan: Optional[IndicatorPlan] = None):
+        """
+        初始化引擎
+
+        Args:
+            plan: 指标计算计划，默认按 INDICATOR_SPECS 编译
+        """
+        self.plan = plan or get_default_plan()
+        self._states: Dict[str, IncrementalIndicators] = {}
+
+    def state(self, symbol: str) -> IncrementalIndicators:
+        """获取（必要时创建）交易对的指标状态"""
+        if symbol not in self._states:
+            self._states[symbol] = IncrementalIndicators(self.plan)
+        return self._states[symbol]
+
+    def update(self, symbol: str, candle: Dict) -> Dict[str, float]:
+        """
+        推入一根K线
+
+        Args:
+            symbol: 交易对
+            candle: 包含 open/high/low/close/volume（可选 timestamp）的字典
+
+        Returns:
+            Dict[str, float]: 该交易对的最新指标
+        """
+        return self.state(symbol).update(
+            candle["open"],
+            candle["high"],
+            candle["low"],
+            candle["close"],
+            candle["volume"],
+            timestamp=candle.get("timestamp"),
+        )
+
+    def warmup(self, symbol: str, df: pd.DataFrame) -> None:
+        """用历史K线初始化交易对状态"""
+        self.state(symbol).warmup(df)
+
+    def get_market_sentiment(self, symbol: str) -> str:
+        """获取交易对的市场情绪"""
+        if symbol not in self._states:
+            return "中性"
+        return self._states[symbol].get_market_sentiment()
+
+    def sentiments(self) -> Dict[str, str]:
+        """获取所有交易对的市场情绪"""
+        return {
+            symbol: state.get_market_sentiment()
+            for symbol, state in self._states.items()
+        }
+
+    @property
+    def symbols(self) -> Iterable[str]:
+        return self._states.keys()
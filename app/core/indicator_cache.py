@@ -0,0 +1,193 @@
+import time
+from collections import OrderedDict
+from datetime import datetime
+from functools import lru_cache
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple, Union
+
+import pandas as pd
+import structlog
+
+from app.core.config import settings
+from app.core.indicator_registry import get_default_plan
+from app.core.indicators import TechnicalIndicators
+from app.core.types import KlineInterval
+
+logger = structlog.get_logger()
+
+CacheKey = Tuple[str, str, datetime, Hashable, Hashable]
+
+
+def compute_snapshot(df: pd.DataFrame) -> Dict[str, Any]:
+    """
+    计算 DataFrame 最新一根K线的指标快照
+
+    Args:
+        df: 以时间为索引、按时间升序的OHLCV数据
+
+    Returns:
+        Dict[str, Any]: 指标快照
+    """
+    indicators = TechnicalIndicators(df)
+    indicators.calculate_all()
+    return indicators.snapshot()
+
+
+class IndicatorCache:
+    """技术指标结果缓存
+
+    键为 (交易对, 周期, 最新K线时间, 最新K线收盘价与成交量, 指标参数)，没有新K线
+    到达时直接返回上次的计算结果；新K线到达、或聚合周期（5m/15m/1h…）未完成的
+    当前K线被原地更新时键随之变化，旧结果由 LRU 自然淘汰。
+    同时设置 TTL，防止较早的K线被修正（如补数覆盖）后长期返回旧值。
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = 300):
+        """
+        初始化缓存
+
+        Args:
+            maxsize: 最大条目数，超出后淘汰最久未使用的条目
+            ttl: 条目有效期（秒），为空则不过期
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries: "OrderedDict[CacheKey, Tuple[float, Dict[str, Any]]]" = (
+            OrderedDict()
+        )
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(
+        symbol: str,
+        interval: Union[str, KlineInterval],
+        last_timestamp: datetime,
+        params: Optional[Hashable] = None,
+        revision: Hashable = None,
+    ) -> CacheKey:
+        """
+        构造缓存键
+
+        Args:
+            symbol: 交易对
+            interval: K线周期
+            last_timestamp: 最新K线时间
+            params: 指标参数，默认为当前指标计划的规范化声明
+            revision: 最新K线的内容标识（如收盘价与成交量），
+                同一根K线被原地更新后缓存随之失效
+
+        Returns:
+            CacheKey: 缓存键
+        """
+        if params is None:
+            params = get_default_plan().key
+        interval = KlineInterval(interval).value
+        return symbol, interval, last_timestamp, revision, params
+
+    def get(self, key: CacheKey) -> Optional[Dict[str, Any]]:
+        """
+        读取缓存
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            Optional[Dict[str, Any]]: 指标快照，未命中或已过期时返回 None
+        """
+        entry = self._entries.get(key)
+        if entry is not None and (
+            self.ttl is None or time.monotonic() - entry[0] < self.ttl
+        ):
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+        if entry is not None:
+            del self._entries[key]
+        self.misses += 1
+        return None
+
+    def put(self, key: CacheKey, snapshot: Dict[str, Any]) -> None:
+        """写入缓存，超出容量时淘汰最久未使用的条目"""
+        self._entries[key] = (time.monotonic(), snapshot)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def get_or_compute(
+        self, key: CacheKey, compute: Callable[[], Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """
+        读取缓存，未命中时调用 compute 计算并写入
+
+        Args:
+            key: 缓存键
+            compute: 计算指标快照的函数
+
+        Returns:
+            Dict[str, Any]: 指标快照
+        """
+        snapshot = self.get(key)
+        if snapshot is None:
+            snapshot = compute()
+            self.put(key, snapshot)
+            logger.debug("指标缓存未命中", symbol=key[0], interval=key[1])
+        return snapshot
+
+    def snapshot(
+        self, symbol: str, interval: Union[str, KlineInterval], df: pd.DataFrame
+    ) -> Dict[str, Any]:
+        """
+        获取 DataFrame 最新一根K线的指标快照
+
+        Args:
+            symbol: 交易对
+            interval: K线周期
+            df: 以时间为索引、按时间升序的OHLCV数据
+
+        Returns:
+            Dict[str, Any]: 指标快照
+        """
+        last = df.iloc[-1]
+        key = self.make_key(
+            symbol,
+            interval,
+            df.index[-1],
+            revision=(float(last["close"]), float(last["volume"])),
+        )
+        return self.get_or_compute(key, lambda: compute_snapshot(df))
+
+    def invalidate(self, symbol: Optional[str] = None) -> None:
+        """清除缓存，指定交易对时只清除该交易对"""
+        if symbol is None:
+            self._entries.clear()
+            return
+        for key in [key for key in self._entries if key[0] == symbol]:
+            del self._entries[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        缓存命中统计
+
+        Returns:
+            Dict[str, Any]: size/hits/misses/evictions/hit_rate
+        """
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+
+@lru_cache
+def get_indicator_cache() -> IndicatorCache:
+    """获取全局指标缓存"""
+    return IndicatorCache(
+        maxsize=settings.INDICATOR_CACHE_SIZE, ttl=settings.INDICATOR_CACHE_TTL
+    )
@@ -0,0 +1,140 @@
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from app.core.indicator_registry import OHLCV_COLUMNS, IndicatorPlan, get_default_plan
+from app.core.indicators import sentiment_labels, sentiment_scores
+
+
+class IndicatorPanel:
+    """多交易对技术指标面板
+
+    所有字段以宽表形式保存（行：时间，列：交易对），
+    指标计划对全部交易对只执行一次 pandas/NumPy 向量化运算。
+    要求各交易对共用同一时间轴，缺失的K线以 NaN 表示。
+    """
+
+    def __init__(
+        self, fields: Dict[str, pd.DataFrame], plan: Optional[IndicatorPlan] = None
+    ):
+        """
+        初始化指标面板
+
+        Args:
+            fields: 字段名 -> 宽表（时间 × 交易对），需包含 OHLCV 字段
+            plan: 指标计算计划，默认按 INDICATOR_SPECS 编译
+        """
+        missing_columns = [col for col in OHLCV_COLUMNS if col not in fields]
+        if missing_columns:
+            raise ValueError(f"缺少必要的列: {missing_columns}")
+
+        self.fields = {col: fields[col].astype(float) for col in OHLCV_COLUMNS}
+        self.plan = plan or get_default_plan()
+        self.indicators: Dict[str, pd.DataFrame] = {}
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "IndicatorPanel":
+        """
+        从 MultiIndex (symbol, timestamp) 的长表构建面板
+
+        Args:
+            df: 包含OHLCV列的长表
+
+        Returns:
+            IndicatorPanel: 指标面板
+        """
+        missing_columns = [col for col in OHLCV_COLUMNS if col not in df.columns]
+        if missing_columns:
+            raise ValueError(f"缺少必要的列: {missing_columns}")
+
+        wide = df[OHLCV_COLUMNS].unstack(level=0).sort_index()
+        return cls({col: wide[col] for col in OHLCV_COLUMNS})
+
+    @classmethod
+    def from_arrays(
+        cls,
+        symbols: Sequence[str],
+        open: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        volume: np.ndarray,
+        index: Optional[pd.Index] = None,
+    ) -> "IndicatorPanel":
+        """
+        从 2-D 数组（交易对 × 时间）构建面板
+
+        Args:
+            symbols: 交易对列表，与数组第一维对应
+            open/high/low/close/volume: 形状为 (len(symbols), 时间) 的数组
+            index: 时间索引
+
+        Returns:
+            IndicatorPanel: 指标面板
+        """
+        arrays = dict(zip(OHLCV_COLUMNS, (open, high, low, close, volume)))
+        return cls({
+            col: pd.DataFrame(np.asarray(arr).T, index=index, columns=list(symbols))
+            for col, arr in arrays.items()
+        })
+
+    @property
+    def symbols(self) -> pd.Index:
+        return self.fields["close"].columns
+
+    def calculate_all(self) -> Dict[str, pd.DataFrame]:
+        """
+        计算所有技术指标
+
+        Returns:
+            Dict[str, pd.DataFrame]: 指标名 -> 宽表（时间 × 交易对）
+        """
+        self.indicators = self.plan.compute(self.fields)
+        return self.indicators
+
+    def latest(self) -> pd.DataFrame:
+        """
+        获取每个交易对最新一根K线的指标值
+
+        Returns:
+            pd.DataFrame: 行为交易对，列为指标
+        """
+        if not self.indicators:
+            self.calculate_all()
+        rows = {name: frame.iloc[-1] for name, frame in self.fields.items()}
+        rows.update({name: frame.iloc[-1] for name, frame in self.indicators.items()})
+        return pd.DataFrame(rows)
+
+    def sentiment_scores(self) -> pd.DataFrame:
+        """
+        计算每根K线的趋势得分
+
+        Returns:
+            pd.DataFrame: 宽表（时间 × 交易对）
+        """
+        if not self.indicators:
+            self.calculate_all()
+        columns = self.plan.require_sentiment()
+        scores = sentiment_scores(
+            close=self.fields["close"].to_numpy(),
+            **{
+                name: self.indicators[column].to_numpy()
+                for name, column in columns.items()
+            },
+        )
+        return pd.DataFrame(
+            scores, index=self.fields["close"].index, columns=self.symbols
+        )
+
+    def get_market_sentiment(self) -> pd.Series:
+        """
+        基于最新一根K线计算每个交易对的市场情绪
+
+        Returns:
+            pd.Series: 交易对 -> 市场情绪（看涨/看跌/中性）
+        """
+        scores = self.sentiment_scores().iloc[-1].to_numpy()
+        # 与单交易对逻辑一致：K线不足20根视为中性
+        scores = np.where(self.fields["close"].count().to_numpy() < 20, 0, scores)
+        return pd.Series(sentiment_labels(scores), index=self.symbols)
@@ -0,0 +1,353 @@
+from functools import lru_cache
+from typing import Any, Callable, Dict, Hashable, List, Mapping, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+
+IndicatorFunc = Callable[..., None]
+
+OHLCV_COLUMNS = ["open", "high", "low", "close", "volume"]
+
+# 市场情绪的输入 -> (指标类型, 需匹配的参数, 输出列后缀)，均以收盘价为来源
+SENTIMENT_INPUTS: Dict[str, Tuple[str, Dict[str, Any], str]] = {
+    "ma20": ("sma", {"length": 20}, ""),
+    "rsi": ("rsi", {}, ""),
+    "macd": ("macd", {}, ""),
+    "macd_signal": ("macd", {}, "_signal"),
+    "bb_upper": ("bbands", {}, "_upper"),
+    "bb_lower": ("bbands", {}, "_lower"),
+}
+
+
+class IndicatorType:
+    """已注册的指标类型"""
+
+    def __init__(
+        self,
+        type: str,
+        func: IndicatorFunc,
+        name: str,
+        outputs: Sequence[str],
+        defaults: Dict[str, Any],
+    ):
+        """
+        Args:
+            type: 指标类型
+            func: 计算函数 func(ctx, out, **params)
+            name: 默认名称模板（可引用参数，如 "ma{length}"）
+            outputs: 输出列后缀，单输出为 ("",)
+            defaults: 参数默认值，同时限定可用的参数
+        """
+        self.type = type
+        self.func = func
+        self.name = name
+        self.outputs = tuple(outputs)
+        self.defaults = defaults
+
+
+INDICATORS: Dict[str, IndicatorType] = {}
+
+
+def register_indicator(
+    type: str, name: str, outputs: Sequence[str] = ("",), **defaults
+) -> Callable[[IndicatorFunc], IndicatorFunc]:
+    """
+    注册指标类型的装饰器
+
+    Args:
+        type: 指标类型（配置中的 type 字段）
+        name: 默认名称模板
+        outputs: 输出列后缀
+        **defaults: 参数默认值
+
+    Returns:
+        Callable: 装饰器
+    """
+    def decorator(func: IndicatorFunc) -> IndicatorFunc:
+        INDICATORS[type] = IndicatorType(type, func, name, outputs, defaults)
+        return func
+
+    return decorator
+
+
+class PlanContext:
+    """单次计算的上下文：输入字段与可共享的中间结果
+
+    中间结果按 (运算, 参数) 记忆，例如 MACD 与 EMA 指标共用同一条 EMA，
+    布林带中轨与同周期均线共用同一次滚动均值。
+    """
+
+    def __init__(self, fields: Mapping[str, pd.DataFrame]):
+        self.fields = fields
+        self._memo: Dict[Hashable, pd.DataFrame] = {}
+
+    def memo(
+        self, key: Hashable, compute: Callable[[], pd.DataFrame]
+    ) -> pd.DataFrame:
+        """读取中间结果，不存在时计算并记忆"""
+        if key not in self._memo:
+            self._memo[key] = compute()
+        return self._memo[key]
+
+    def source(self, name: str) -> pd.DataFrame:
+        if name not in self.fields:
+            raise ValueError(f"缺少必要的列: {name}")
+        return self.fields[name]
+
+    def diff(self, source: str) -> pd.DataFrame:
+        return self.memo(("diff", source), lambda: self.source(source).diff())
+
+    def sma(self, source: str, length: int) -> pd.DataFrame:
+        return self.memo(
+            ("sma", source, length),
+            lambda: self.source(source).rolling(length).mean(),
+        )
+
+    def std(self, source: str, length: int, ddof: int = 1) -> pd.DataFrame:
+        return self.memo(
+            ("std", source, length, ddof),
+            lambda: self.source(source).rolling(length).std(ddof=ddof),
+        )
+
+    def ema(self, source: str, length: int) -> pd.DataFrame:
+        return self.memo(
+            ("ema", source, length), lambda: ema(self.source(source), length)
+        )
+
+
+class IndicatorPlan:
+    """由指标声明编译出的计算计划
+
+    编译时校验类型与参数并确定全部输出列，同时解析市场情绪所需指标的列名；
+    计算时一次性分配输出数组，各指标直接写入对应位置，中间结果在指标之间共享。
+    """
+
+    def __init__(self, specs: Sequence[Mapping[str, Any]]):
+        """
+        编译指标声明
+
+        Args:
+            specs: 指标声明列表，如 {"type": "sma", "length": 5}，
+                可选 name 指定输出列名（多输出指标作为前缀）
+        """
+        self.steps: List[Tuple[IndicatorType, Dict[str, Any], List[str]]] = []
+        self.columns: List[str] = []
+        # 市场情绪的输入 -> 输出列名，计划中没有对应指标的输入不在其中
+        self.sentiment_columns: Dict[str, str] = {}
+        for spec in specs:
+            spec = dict(spec)
+            type = spec.pop("type", None)
+            if type not in INDICATORS:
+                raise ValueError(f"未知的指标类型: {type}")
+            indicator = INDICATORS[type]
+            name = spec.pop("name", None)
+            unknown = set(spec) - set(indicator.defaults)
+            if unknown:
+                raise ValueError(f"{type} 不支持的参数: {sorted(unknown)}")
+
+            params = {**indicator.defaults, **spec}
+            name = name or indicator.name.format(**params)
+            columns = [name + suffix for suffix in indicator.outputs]
+            duplicated = set(columns) & set(self.columns)
+            if duplicated:
+                raise ValueError(f"指标输出列重复: {sorted(duplicated)}")
+            self.steps.append((indicator, params, columns))
+            self.columns.extend(columns)
+            self._match_sentiment_inputs(type, params, name)
+
+        # 规范化后的声明，作为缓存键
+        self.key: Tuple = tuple(
+            (columns[0], tuple(sorted(params.items())))
+            for _, params, columns in self.steps
+        )
+
+    def _match_sentiment_inputs(
+        self, type: str, params: Dict[str, Any], name: str
+    ) -> None:
+        """记录该指标能提供的市场情绪输入（同一输入取第一个匹配的指标）"""
+        for input_name, (input_type, required, suffix) in SENTIMENT_INPUTS.items():
+            if input_name in self.sentiment_columns or type != input_type:
+                continue
+            required = {"source": "close", **required}
+            if all(params.get(k) == v for k, v in required.items()):
+                self.sentiment_columns[input_name] = name + suffix
+
+    def require_sentiment(self) -> Dict[str, str]:
+        """
+        获取市场情绪所需输入的列名
+
+        Returns:
+            Dict[str, str]: 输入名（ma20/rsi/macd/macd_signal/bb_upper/bb_lower）-> 列名
+
+        Raises:
+            ValueError: 计划中缺少所需的指标
+        """
+        missing = [
+            name for name in SENTIMENT_INPUTS if name not in self.sentiment_columns
+        ]
+        if missing:
+            raise ValueError(
+                f"指标配置缺少市场情绪所需的指标: {missing}"
+                "（需要以收盘价计算的 sma length=20、rsi、macd 与 bbands）"
+            )
+        return self.sentiment_columns
+
+    def _run(self, fields: Mapping[str, pd.DataFrame]) -> np.ndarray:
+        """执行计划，返回形状为 (输出列, 时间, 交易对) 的结果数组"""
+        shape = next(iter(fields.values())).shape
+        block = np.full((len(self.columns), *shape), np.nan, dtype=np.float64)
+        out = dict(zip(self.columns, block))
+
+        ctx = PlanContext(fields)
+        for indicator, params, columns in self.steps:
+            targets = {
+                suffix: out[column]
+                for suffix, column in zip(indicator.outputs, columns)
+            }
+            indicator.func(ctx, targets, **params)
+        return block
+
+    def compute(self, fields: Mapping[str, pd.DataFrame]) -> Dict[str, pd.DataFrame]:
+        """
+        计算全部指标
+
+        Args:
+            fields: 字段名 -> 宽表（时间 × 交易对）
+
+        Returns:
+            Dict[str, pd.DataFrame]: 输出列名 -> 宽表，共用同一块预分配内存
+        """
+        frame = next(iter(fields.values()))
+        block = self._run(fields)
+        return {
+            column: pd.DataFrame(
+                values, index=frame.index, columns=frame.columns, copy=False
+            )
+            for column, values in zip(self.columns, block)
+        }
+
+    def compute_frame(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        计算单个交易对的全部指标
+
+        Args:
+            df: 包含OHLCV列的DataFrame
+
+        Returns:
+            pd.DataFrame: 指标列（与 df 同索引）
+        """
+        fields = {
+            column: pd.DataFrame({0: df[column].to_numpy(dtype=float)}, index=df.index)
+            for column in OHLCV_COLUMNS
+            if column in df.columns
+        }
+        block = self._run(fields)
+        return pd.DataFrame(
+            block[:, :, 0].T, index=df.index, columns=self.columns, copy=False
+        )
+
+
+def rma(values: pd.DataFrame, length: int) -> pd.DataFrame:
+    """
+    Wilder 平滑均值
+
+    以首个有效值为初值递推（adjust=False），前 length - 1 个有效值的位置为 NaN，
+    与 pandas-ta 0.3.14b 的 rma 预热一致（pandas-ta 0.4 起不再预热，
+    RSI 在前 length 根K线会给出不稳定的值）。
+    """
+    return values.ewm(alpha=1.0 / length, adjust=False, min_periods=length).mean()
+
+
+def ema(values: pd.DataFrame, length: int) -> pd.DataFrame:
+    """
+    以 SMA 为初值的 EMA（与 pandas-ta presma 一致）
+
+    每列从各自第一个有效值开始计数，前 length - 1 个位置为 NaN，
+    第 length 个位置为前 length 个值的均值。
+    """
+    arr = values.to_numpy()
+    first_valid = (~np.isnan(arr)).argmax(axis=0)
+    offset = np.arange(len(arr))[:, None] - first_valid[None, :]
+    seed = values.rolling(length).mean().to_numpy()
+    seeded = np.where(
+        offset < length - 1,
+        np.nan,
+        np.where(offset == length - 1, seed, arr),
+    )
+    seeded = pd.DataFrame(seeded, index=values.index, columns=values.columns)
+    return seeded.ewm(span=length, adjust=False).mean()
+
+
+@register_indicator("sma", name="ma{length}", length=20, source="close")
+def _sma(ctx: PlanContext, out, length: int, source: str) -> None:
+    out[""][...] = ctx.sma(source, length)
+
+
+@register_indicator("ema", name="ema{length}", length=20, source="close")
+def _ema(ctx: PlanContext, out, length: int, source: str) -> None:
+    out[""][...] = ctx.ema(source, length)
+
+
+@register_indicator("rsi", name="rsi", length=14, source="close")
+def _rsi(ctx: PlanContext, out, length: int, source: str) -> None:
+    change = ctx.diff(source)
+    gain = rma(change.clip(lower=0), length)
+    loss = rma(change.clip(upper=0), length).abs()
+    out[""][...] = 100 * gain / (gain + loss)
+
+
+@register_indicator(
+    "macd",
+    name="macd",
+    outputs=("", "_signal", "_hist"),
+    fast=12,
+    slow=26,
+    signal=9,
+    source="close",
+)
+def _macd(
+    ctx: PlanContext, out, fast: int, slow: int, signal: int, source: str
+) -> None:
+    macd = ctx.ema(source, fast) - ctx.ema(source, slow)
+    macd_signal = ema(macd, signal)
+    out[""][...] = macd
+    out["_signal"][...] = macd_signal
+    out["_hist"][...] = macd - macd_signal
+
+
+@register_indicator(
+    "bbands",
+    name="bb",
+    outputs=("_lower", "_middle", "_upper"),
+    length=20,
+    std=2.0,
+    source="close",
+)
+def _bbands(ctx: PlanContext, out, length: int, std: float, source: str) -> None:
+    middle = ctx.sma(source, length)
+    deviation = std * ctx.std(source, length, ddof=1)
+    out["_lower"][...] = middle - deviation
+    out["_middle"][...] = middle
+    out["_upper"][...] = middle + deviation
+
+
+@register_indicator("obv", name="obv")
+def _obv(ctx: PlanContext, out) -> None:
+    out[""][...] = (np.sign(ctx.diff("close")) * ctx.source("volume")).cumsum()
+
+
+@lru_cache
+def get_default_plan() -> IndicatorPlan:
+    """获取按 INDICATOR_SPECS 编译的默认计算计划
+
+    市场情绪依赖其中的部分指标，配置缺少时在此处直接报错，
+    而不是在计算指标快照时才失败。
+    """
+    plan = IndicatorPlan(settings.INDICATOR_SPECS)
+    try:
+        plan.require_sentiment()
+    except ValueError as e:
+        raise ValueError(f"INDICATOR_SPECS 配置无效: {e}") from e
+    return plan
@@ -1,18 +1,24 @@
+from typing import Any, Dict, Optional
+
+import numpy as np
 import pandas as pd
-import pandas_ta as ta
+
+from app.core.indicator_registry import IndicatorPlan, get_default_plan
 
 
 class TechnicalIndicators:
     """技术指标计算类"""
 
-    def __init__(self, df: pd.DataFrame):
+    def __init__(self, df: pd.DataFrame, plan: Optional[IndicatorPlan] = None):
         """
         初始化技术指标计算器
 
         Args:
             df: 包含OHLCV数据的DataFrame
+            plan: 指标计算计划，默认按 INDICATOR_SPECS 编译
         """
         self.df = df.copy()
+        self.plan = plan or get_default_plan()
         self._validate_data()
 
     def _validate_data(self) -> None:
@@ -24,25 +30,8 @@ class TechnicalIndicators:
 
     def calculate_all(self) -> pd.DataFrame:
         """计算所有技术指标"""
-        # 移动平均线
-        self.df["ma5"] = self.df.ta.sma(length=5)
-        self.df["ma10"] = self.df.ta.sma(length=10)
-        self.df["ma20"] = self.df.ta.sma(length=20)
-
-        # RSI
-        self.df["rsi"] = self.df.ta.rsi(length=14)
-
-        # MACD
-        macd = self.df.ta.macd(fast=12, slow=26, signal=9)
-        self.df = pd.concat([self.df, macd], axis=1)
-
-        # 布林带
-        bollinger = self.df.ta.bbands(length=20)
-        self.df = pd.concat([self.df, bollinger], axis=1)
-
-        # 成交量指标
-        self.df["obv"] = self.df.ta.obv()
-
+        indicators = self.plan.compute_frame(self.df)
+        self.df = pd.concat([self.df, indicators], axis=1)
         return self.df
 
     def get_market_sentiment(self) -> str:
@@ -52,44 +41,134 @@ class TechnicalIndicators:
         Returns:
             str: 市场情绪（看涨/看跌/中性）
         """
+        columns = self.plan.require_sentiment()
         if len(self.df) < 20:
             return "中性"
 
         # 获取最新指标值
         latest = self.df.iloc[-1]
-        prev = self.df.iloc[-2]
-
-        # 计算趋势得分
-        trend_score = 0
-
-        # MA趋势
-        if latest["close"] > latest["ma20"]:
-            trend_score += 1
-        elif latest["close"] < latest["ma20"]:
-            trend_score -= 1
-
-        # RSI趋势
-        if latest["rsi"] > 70:
-            trend_score -= 1
-        elif latest["rsi"] < 30:
-            trend_score += 1
-
-        # MACD趋势
-        if latest["MACD_12_26_9"] > latest["MACDs_12_26_9"]:
-            trend_score += 1
-        elif latest["MACD_12_26_9"] < latest["MACDs_12_26_9"]:
-            trend_score -= 1
-
-        # 布林带位置
-        if latest["close"] > latest["BBU_20_2.0"]:
-            trend_score -= 1
-        elif latest["close"] < latest["BBL_20_2.0"]:
-            trend_score += 1
-
-        # 根据得分判断市场情绪
-        if trend_score >= 2:
-            return "看涨"
-        elif trend_score <= -2:
-            return "看跌"
-        else:
-            return "中性" 
\ No newline at end of file
+
+        return evaluate_sentiment(
+            close=latest["close"],
+            **{name: latest[column] for name, column in columns.items()},
+        )
+
+    def snapshot(self) -> Dict[str, Any]:
+        """
+        获取最新一根K线的指标快照（需先调用 calculate_all）
+
+        Returns:
+            Dict[str, Any]: 指标名 -> 数值，以及 close、timestamp 与 sentiment
+        """
+        latest = self.df.iloc[-1]
+        snapshot: Dict[str, Any] = {
+            column: float(latest[column]) for column in self.plan.columns
+        }
+        snapshot["close"] = float(latest["close"])
+        snapshot["timestamp"] = self.df.index[-1]
+        snapshot["sentiment"] = self.get_market_sentiment()
+        return snapshot
+
+
+def evaluate_sentiment(
+    close: float,
+    ma20: float,
+    rsi: float,
+    macd: float,
+    macd_signal: float,
+    bb_upper: float,
+    bb_lower: float,
+) -> str:
+    """
+    根据最新一根K线的指标值计算市场情绪
+
+    批量计算与增量计算共用同一套规则，缺失值（NaN）不参与计分
+
+    Returns:
+        str: 市场情绪（看涨/看跌/中性）
+    """
+    # 计算趋势得分
+    trend_score = 0
+
+    # MA趋势
+    if close > ma20:
+        trend_score += 1
+    elif close < ma20:
+        trend_score -= 1
+
+    # RSI趋势
+    if rsi > 70:
+        trend_score -= 1
+    elif rsi < 30:
+        trend_score += 1
+
+    # MACD趋势
+    if macd > macd_signal:
+        trend_score += 1
+    elif macd < macd_signal:
+        trend_score -= 1
+
+    # 布林带位置
+    if close > bb_upper:
+        trend_score -= 1
+    elif close < bb_lower:
+        trend_score += 1
+
+    # 根据得分判断市场情绪
+    if trend_score >= 2:
+        return "看涨"
+    elif trend_score <= -2:
+        return "看跌"
+    else:
+        return "中性"
+
+
+def sentiment_scores(
+    close: np.ndarray,
+    ma20: np.ndarray,
+    rsi: np.ndarray,
+    macd: np.ndarray,
+    macd_signal: np.ndarray,
+    bb_upper: np.ndarray,
+    bb_lower: np.ndarray,
+    rsi_overbought: float = 70,
+    rsi_oversold: float = 30,
+) -> np.ndarray:
+    """
+    向量化计算趋势得分，默认规则与 evaluate_sentiment 相同
+
+    Args:
+        rsi_overbought: RSI 超买阈值
+        rsi_oversold: RSI 超卖阈值
+
+    Returns:
+        np.ndarray: 趋势得分（-4 ~ 4），缺失值不参与计分
+    """
+    score = np.greater(close, ma20).astype(np.int8) - np.less(close, ma20)
+    score -= np.greater(rsi, rsi_overbought).astype(np.int8) - np.less(
+        rsi, rsi_oversold
+    )
+    score += np.greater(macd, macd_signal).astype(np.int8) - np.less(macd, macd_signal)
+    score -= np.greater(close, bb_upper).astype(np.int8) - np.less(close, bb_lower)
+    return score
+
+
+def sentiment_labels(
+    scores: np.ndarray, bullish_score: int = 2, bearish_score: int = -2
+) -> np.ndarray:
+    """
+    将趋势得分转换为市场情绪
+
+    Args:
+        scores: 趋势得分
+        bullish_score: 看涨所需的最低得分
+        bearish_score: 看跌所需的最高得分
+
+    Returns:
+        np.ndarray: 市场情绪（看涨/看跌/中性）
+    """
+    return np.select(
+        [scores >= bullish_score, scores <= bearish_score],
+        ["看涨", "看跌"],
+        default="中性",
+    )
@@ -0,0 +1,329 @@
+import os
+import shutil
+from datetime import datetime, timezone
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from app.core.config import settings
+from app.core.types import KlineInterval
+
+# 列名 -> 数据类型，时间列存储为 UTC 毫秒时间戳
+COLUMNS = {
+    "timestamp": np.int64,
+    "open": np.float64,
+    "high": np.float64,
+    "low": np.float64,
+    "close": np.float64,
+    "volume": np.float64,
+}
+ITEM_SIZE = 8
+
+
+def to_ms(timestamp: datetime) -> int:
+    """UTC naive datetime -> 毫秒时间戳"""
+    return int(timestamp.replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def from_ms(ms: int) -> datetime:
+    """毫秒时间戳 -> UTC naive datetime"""
+    return datetime.fromtimestamp(ms / 1000, tz=timezone.utc).replace(tzinfo=None)
+
+
+class KlineStore:
+    """列式K线缓存
+
+    每个 交易对/周期 对应一个目录，每列一个只追加的二进制文件
+    （<root>/<interval>/<symbol>/<column>.bin），读取时通过 np.memmap
+    映射，按时间范围切片不产生拷贝。
+
+    写入规则：
+    - 新K线时间晚于已有数据时直接追加；
+    - 与已有数据时间重叠时（如聚合K线的未完成周期、补数），从重叠位置起原地
+      覆盖写入合并结果。文件只增不减，不会截断，其他进程持有的映射始终有效。
+    - 时间列最后写入，行数以各列文件的最小长度为准。
+    """
+
+    def __init__(self, root: Union[str, Path]):
+        """
+        初始化缓存
+
+        Args:
+            root: 缓存根目录
+        """
+        self.root = Path(root)
+        self._maps: Dict[Path, Tuple[int, Dict[str, np.memmap]]] = {}
+
+    def _path(self, symbol: str, interval: Union[str, KlineInterval]) -> Path:
+        return self.root / KlineInterval(interval).value / symbol
+
+    @staticmethod
+    def _length(path: Path) -> int:
+        """已提交的行数"""
+        sizes = []
+        for column in COLUMNS:
+            file = path / f"{column}.bin"
+            sizes.append(file.stat().st_size // ITEM_SIZE if file.exists() else 0)
+        return min(sizes)
+
+    def _columns(self, path: Path) -> Dict[str, np.ndarray]:
+        """获取（必要时重新映射）各列的只读映射"""
+        length = self._length(path)
+        cached = self._maps.get(path)
+        if cached and cached[0] == length:
+            return cached[1]
+
+        if length == 0:
+            columns = {
+                name: np.empty(0, dtype=dtype) for name, dtype in COLUMNS.items()
+            }
+        else:
+            columns = {
+                name: np.memmap(
+                    path / f"{name}.bin", dtype=dtype, mode="r", shape=(length,)
+                )
+                for name, dtype in COLUMNS.items()
+            }
+        self._maps[path] = (length, columns)
+        return columns
+
+    def length(self, symbol: str, interval: Union[str, KlineInterval]) -> int:
+        """K线数量"""
+        return self._length(self._path(symbol, interval))
+
+    def first_timestamp(
+        self, symbol: str, interval: Union[str, KlineInterval]
+    ) -> Optional[datetime]:
+        """最早一根K线的时间"""
+        timestamps = self._columns(self._path(symbol, interval))["timestamp"]
+        return from_ms(int(timestamps[0])) if len(timestamps) else None
+
+    def covers(
+        self, symbol: str, interval: Union[str, KlineInterval], start: datetime
+    ) -> bool:
+        """
+        缓存是否包含 start 之后的全部K线
+
+        缓存可能只有部分历史（如重建中途、刚开始由采集器追加），
+        此时早于缓存首根K线的范围需要回退到数据库读取。
+
+        Args:
+            symbol: 交易对
+            interval: K线周期
+            start: 开始时间（包含）
+
+        Returns:
+            bool: 缓存首根K线不晚于 start 时为 True
+        """
+        first = self.first_timestamp(symbol, interval)
+        return first is not None and first <= start
+
+    def last_timestamp(
+        self, symbol: str, interval: Union[str, KlineInterval]
+    ) -> Optional[datetime]:
+        """最新一根K线的时间"""
+        timestamps = self._columns(self._path(symbol, interval))["timestamp"]
+        return from_ms(int(timestamps[-1])) if len(timestamps) else None
+
+    def symbols(self, interval: Union[str, KlineInterval]) -> List[str]:
+        """已缓存的交易对"""
+        path = self.root / KlineInterval(interval).value
+        if not path.exists():
+            return []
+        return sorted(
+            p.name for p in path.iterdir() if p.is_dir() and not p.name.startswith(".")
+        )
+
+    def read(
+        self,
+        symbol: str,
+        interval: Union[str, KlineInterval],
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        按时间范围读取K线（零拷贝切片）
+
+        Args:
+            symbol: 交易对
+            interval: K线周期
+            start: 开始时间（包含）
+            end: 结束时间（不包含）
+
+        Returns:
+            Dict[str, np.ndarray]: 列名 -> 只读数组
+        """
+        columns = self._columns(self._path(symbol, interval))
+        timestamps = columns["timestamp"]
+        lo = np.searchsorted(timestamps, to_ms(start)) if start else 0
+        hi = np.searchsorted(timestamps, to_ms(end)) if end else len(timestamps)
+        return {name: values[lo:hi] for name, values in columns.items()}
+
+    def tail(
+        self, symbol: str, interval: Union[str, KlineInterval], n: int
+    ) -> Dict[str, np.ndarray]:
+        """读取最近 n 根K线（零拷贝切片）"""
+        columns = self._columns(self._path(symbol, interval))
+        return {
+            name: values[-n:] if n else values[:0] for name, values in columns.items()
+        }
+
+    def frame(
+        self,
+        symbol: str,
+        interval: Union[str, KlineInterval],
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> pd.DataFrame:
+        """
+        按时间范围读取K线为 DataFrame，可直接传给 TechnicalIndicators
+
+        Returns:
+            pd.DataFrame: 以 UTC 时间为索引的 OHLCV 数据
+        """
+        columns = self.read(symbol, interval, start, end)
+        index = pd.to_datetime(columns["timestamp"], unit="ms")
+        return pd.DataFrame(
+            {name: columns[name] for name in COLUMNS if name != "timestamp"},
+            index=index,
+        )
+
+    def append(
+        self,
+        symbol: str,
+        interval: Union[str, KlineInterval],
+        bars: Iterable[Dict[str, Any]],
+    ) -> int:
+        """
+        写入单个交易对的K线
+
+        Args:
+            symbol: 交易对
+            interval: K线周期
+            bars: K线字典（timestamp/open/high/low/close/volume）
+
+        Returns:
+            int: 写入后的K线数量
+        """
+        bars = list(bars)
+        path = self._path(symbol, interval)
+        if not bars:
+            return self._length(path)
+        path.mkdir(parents=True, exist_ok=True)
+
+        new = {
+            "timestamp": np.fromiter(
+                (to_ms(bar["timestamp"]) for bar in bars),
+                dtype=np.int64,
+                count=len(bars),
+            )
+        }
+        for name in ("open", "high", "low", "close", "volume"):
+            new[name] = np.fromiter(
+                (bar[name] for bar in bars), dtype=np.float64, count=len(bars)
+            )
+
+        existing = self._columns(path)
+        length = len(existing["timestamp"])
+        position = int(np.searchsorted(existing["timestamp"], new["timestamp"].min()))
+
+        # 与已有尾部合并：同一时间以新数据为准
+        merged = {
+            name: np.concatenate([np.asarray(existing[name][position:]), new[name]])
+            for name in COLUMNS
+        }
+        order = np.argsort(merged["timestamp"], kind="stable")
+        timestamps = merged["timestamp"][order]
+        keep = np.append(timestamps[1:] != timestamps[:-1], True)
+        rows = order[keep]
+
+        # 时间列最后写入，保证中途失败时不会出现未写完的行
+        for name in [c for c in COLUMNS if c != "timestamp"] + ["timestamp"]:
+            file = path / f"{name}.bin"
+            with open(file, "r+b" if file.exists() else "wb") as f:
+                f.seek(position * ITEM_SIZE)
+                f.write(merged[name][rows].astype(COLUMNS[name]).tobytes())
+        return max(length, position + len(rows))
+
+    def append_many(
+        self, interval: Union[str, KlineInterval], bars: Iterable[Dict[str, Any]]
+    ) -> None:
+        """写入多个交易对的K线（按 symbol 分组）"""
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        for bar in bars:
+            grouped.setdefault(bar["symbol"], []).append(bar)
+        for symbol, symbol_bars in grouped.items():
+            self.append(symbol, interval, symbol_bars)
+
+    def begin_rebuild(
+        self, symbol: str, interval: Union[str, KlineInterval]
+    ) -> "KlineStore":
+        """
+        开始重建一个 交易对/周期，返回写入用的临时缓存
+
+        Args:
+            symbol: 交易对
+            interval: K线周期
+
+        Returns:
+            KlineStore: 临时缓存，写完后调用 commit_rebuild 替换
+        """
+        staging = KlineStore(self.root / ".rebuild")
+        path = staging._path(symbol, interval)
+        shutil.rmtree(path, ignore_errors=True)
+        path.mkdir(parents=True, exist_ok=True)
+        return staging
+
+    def commit_rebuild(self, symbol: str, interval: Union[str, KlineInterval]) -> int:
+        """
+        用临时缓存原子替换 交易对/周期
+
+        Returns:
+            int: 替换后的K线数量
+        """
+        path = self._path(symbol, interval)
+        staged = KlineStore(self.root / ".rebuild")._path(symbol, interval)
+
+        # 旧目录先改名再删除，已映射旧文件的读者不受影响
+        path.parent.mkdir(parents=True, exist_ok=True)
+        backup = path.with_name(f".{symbol}.old")
+        shutil.rmtree(backup, ignore_errors=True)
+        if path.exists():
+            os.replace(path, backup)
+        os.replace(staged, path)
+        shutil.rmtree(backup, ignore_errors=True)
+        self._maps.pop(path, None)
+        return self._length(path)
+
+    def replace(
+        self,
+        symbol: str,
+        interval: Union[str, KlineInterval],
+        chunks: Iterable[List[Dict[str, Any]]],
+    ) -> int:
+        """
+        用给定数据整体重建一个 交易对/周期，写完后原子替换
+
+        Args:
+            symbol: 交易对
+            interval: K线周期
+            chunks: 按时间升序的K线分块
+
+        Returns:
+            int: 重建后的K线数量
+        """
+        staging = self.begin_rebuild(symbol, interval)
+        for chunk in chunks:
+            staging.append(symbol, interval, chunk)
+        return self.commit_rebuild(symbol, interval)
+
+
+@lru_cache
+def get_kline_store() -> Optional[KlineStore]:
+    """获取全局列式K线缓存，未配置 KLINE_STORE_DIR 时返回 None"""
+    if not settings.KLINE_STORE_DIR:
+        return None
+    return KlineStore(settings.KLINE_STORE_DIR)
@@ -1,17 +1,43 @@
-from typing import Dict, List
+import asyncio
+from functools import lru_cache
+from typing import AsyncIterator, Dict, List, Mapping, Optional, Tuple
 
+import structlog
 from langchain.chat_models import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
 from langchain.schema import HumanMessage, SystemMessage
 
 from app.core.config import settings
+from app.core.llm_cache import LLMResponseCache, get_llm_cache, llm_cache_key
+from app.core.prompt_builder import PromptBuilder
+from app.core.rate_limit import LLMRateLimiter, call_with_retry, get_llm_rate_limiter
+from app.core.streaming import (
+    StreamEvent,
+    stream_analysis,
+    with_timeout,
+)
+from app.core.tokens import estimate_tokens
+
+logger = structlog.get_logger()
 
 
 class LLMAnalyzer:
     """LLM市场分析器"""
 
-    def __init__(self):
-        """初始化LLM分析器"""
+    def __init__(
+        self,
+        cache: Optional[LLMResponseCache] = None,
+        limiter: Optional[LLMRateLimiter] = None,
+    ):
+        """
+        初始化LLM分析器
+
+        Args:
+            cache: LLM 响应缓存，默认使用全局缓存（LLM_CACHE_ENABLED 关闭时不缓存）
+            limiter: RPM/TPM 限流器，默认使用全局限流器
+        """
+        self.cache = cache or get_llm_cache()
+        self.limiter = limiter or get_llm_rate_limiter()
         self.llm = ChatOpenAI(
             model_name=settings.LLM_MODEL,
             temperature=settings.LLM_TEMPERATURE,
@@ -26,7 +52,7 @@ class LLMAnalyzer:
 3. 潜在风险提示
 请用简洁的Markdown格式输出。"""
 
-        self.human_prompt = """最近60分钟BTCUSDT市场数据：
+        self.human_prompt = """最近60分钟{symbol}市场数据：
 {market_data}
 
 技术指标：
@@ -37,11 +63,18 @@ class LLMAnalyzer:
 
 请给出你的分析。"""
 
+        # 模板只编译一次，各段落由 PromptBuilder 按 token 预算渲染
+        self.prompt = ChatPromptTemplate.from_messages(
+            [("system", self.system_prompt), ("human", self.human_prompt)]
+        )
+        self.prompt_builder = PromptBuilder(self.system_prompt, self.human_prompt)
+
     async def analyze_market(
         self,
         market_data: Dict,
         technical_indicators: Dict,
         news_data: List[Dict],
+        symbol: str = "BTCUSDT",
     ) -> Dict:
         """
         分析市场数据
@@ -50,26 +83,147 @@ class LLMAnalyzer:
             market_data: 市场数据
             technical_indicators: 技术指标
             news_data: 新闻数据
+            symbol: 交易对
 
         Returns:
-            Dict: 分析结果
+            Dict: 分析结果（含 prompt_tokens：提示词的本地估算 token 数）
         """
-        # 构建提示
-        prompt = ChatPromptTemplate.from_messages(
-            [
-                SystemMessage(content=self.system_prompt),
-                HumanMessage(
-                    content=self.human_prompt.format(
-                        market_data=self._format_market_data(market_data),
-                        technical_indicators=self._format_indicators(technical_indicators),
-                        news_data=self._format_news(news_data),
-                    )
-                ),
-            ]
+        messages, prompt_tokens, key = self._prepare(
+            market_data, technical_indicators, news_data, symbol
         )
+        if self.cache is None:
+            return await self._generate(messages, prompt_tokens)
+
+        # 提示词与模型参数都相同时复用缓存结果
+        return await self.cache.get_or_compute(
+            key,
+            lambda: self._generate(messages, prompt_tokens),
+            model=settings.LLM_MODEL,
+        )
+
+    async def stream_market(
+        self,
+        market_data: Dict,
+        technical_indicators: Dict,
+        news_data: List[Dict],
+        symbol: str = "BTCUSDT",
+    ) -> AsyncIterator[StreamEvent]:
+        """
+        流式分析市场数据
 
-        # 调用LLM
-        response = await self.llm.agenerate([prompt.format_messages()])
+        模型输出逐段返回，情绪与置信度在输出过程中增量提取，一旦确定立即返回，
+        无需等待完整报告。与 analyze_market 共用响应缓存（内存与数据库）和
+        进行中的请求，命中时直接回放结果；模型输出受 LLM_TIMEOUT 限制。
+
+        Args:
+            market_data: 市场数据
+            technical_indicators: 技术指标
+            news_data: 新闻数据
+            symbol: 交易对
+
+        Yields:
+            StreamEvent: ("token", 文本)、("sentiment", 情绪)、("confidence", 置信度)，
+                最后是 ("done", 与 analyze_market 格式一致的分析结果)
+        """
+        messages, prompt_tokens, key = self._prepare(
+            market_data, technical_indicators, news_data, symbol
+        )
+
+        async def generate() -> AsyncIterator[StreamEvent]:
+            await self.limiter.acquire(prompt_tokens + settings.LLM_MAX_TOKENS)
+            chunks = (chunk.content async for chunk in self.llm.astream(messages))
+            async for event in stream_analysis(
+                with_timeout(chunks, settings.LLM_TIMEOUT), prompt_tokens
+            ):
+                yield event
+
+        if self.cache is None:
+            events = generate()
+        else:
+            events = self.cache.stream_or_compute(
+                key, generate, model=settings.LLM_MODEL
+            )
+        async for event in events:
+            yield event
+
+    def _prepare(
+        self,
+        market_data: Dict,
+        technical_indicators: Dict,
+        news_data: List[Dict],
+        symbol: str,
+    ) -> Tuple[List, int, str]:
+        """构建提示词，返回 (消息列表, 提示词 token 数, 缓存键)"""
+        built = self.prompt_builder.build(
+            market_data, technical_indicators, news_data, symbol=symbol
+        )
+        messages = self.prompt.format_messages(**built.sections)
+        logger.info(
+            "构建分析提示词",
+            symbol=symbol,
+            prompt_tokens=built.tokens,
+            news=built.news,
+            news_total=built.news_total,
+            indicators=built.indicators,
+        )
+        key = llm_cache_key(
+            [(message.type, message.content) for message in messages],
+            model=settings.LLM_MODEL,
+            temperature=settings.LLM_TEMPERATURE,
+            max_tokens=settings.LLM_MAX_TOKENS,
+        )
+        return messages, built.tokens, key
+
+    async def analyze_many(
+        self,
+        inputs: Mapping[str, Tuple[Dict, Dict, List[Dict]]],
+        concurrency: Optional[int] = None,
+    ) -> Dict[str, Dict]:
+        """
+        并发分析多个交易对
+
+        并发数受 concurrency 限制，实际的模型调用还受全局 RPM/TPM 限流约束；
+        单个交易对失败（重试耗尽）只记录日志，不影响其他交易对。
+
+        Args:
+            inputs: 交易对 -> (市场数据, 技术指标, 新闻数据)
+            concurrency: 同时进行的分析数，默认 LLM_ANALYSIS_CONCURRENCY
+
+        Returns:
+            Dict[str, Dict]: 交易对 -> 分析结果（不含失败的交易对）
+        """
+        semaphore = asyncio.Semaphore(
+            concurrency or settings.LLM_ANALYSIS_CONCURRENCY
+        )
+
+        async def analyze(symbol: str) -> Dict:
+            async with semaphore:
+                return await self.analyze_market(*inputs[symbol], symbol=symbol)
+
+        symbols = list(inputs)
+        results = await asyncio.gather(
+            *[analyze(symbol) for symbol in symbols], return_exceptions=True
+        )
+        analyses = {}
+        for symbol, result in zip(symbols, results):
+            if isinstance(result, Exception):
+                logger.error("市场分析失败", symbol=symbol, error=str(result))
+                continue
+            analyses[symbol] = result
+        return analyses
+
+    async def _call(self, messages: List, prompt_tokens: int):
+        """限流、超时与重试控制下调用模型，每次尝试都占用限流额度"""
+        return await call_with_retry(
+            lambda: self.llm.agenerate([messages]),
+            acquire=lambda: self.limiter.acquire(
+                prompt_tokens + settings.LLM_MAX_TOKENS
+            ),
+        )
+
+    async def _generate(self, messages: List, prompt_tokens: int) -> Dict:
+        """调用LLM并解析结果"""
+        response = await self._call(messages, prompt_tokens)
         analysis = response.generations[0][0].text
 
         # 解析结果
@@ -77,33 +231,27 @@ class LLMAnalyzer:
             "analysis": analysis,
             "sentiment": self._extract_sentiment(analysis),
             "confidence": self._extract_confidence(analysis),
+            "prompt_tokens": prompt_tokens,
         }
 
-    def _format_market_data(self, data: Dict) -> str:
-        """格式化市场数据"""
-        return f"""
-- 开盘价: {data['open']}
-- 最高价: {data['high']}
-- 最低价: {data['low']}
-- 收盘价: {data['close']}
-- 成交量: {data['volume']}
-"""
-
-    def _format_indicators(self, indicators: Dict) -> str:
-        """格式化技术指标"""
-        return f"""
-- MA5: {indicators['ma5']}
-- MA20: {indicators['ma20']}
-- RSI: {indicators['rsi']}
-- MACD: {indicators['macd']}
-- 布林带: 上轨={indicators['bb_upper']}, 中轨={indicators['bb_middle']}, 下轨={indicators['bb_lower']}
-"""
-
-    def _format_news(self, news: List[Dict]) -> str:
-        """格式化新闻数据"""
-        if not news:
-            return "暂无相关新闻"
-        return "\n".join([f"- {item['title']}: {item['summary']}" for item in news])
+    async def complete(self, system: str, prompt: str) -> Tuple[str, Dict[str, int]]:
+        """
+        单轮对话调用（供新闻处理等批量任务使用）
+
+        Args:
+            system: 系统提示
+            prompt: 用户提示
+
+        Returns:
+            Tuple[str, Dict[str, int]]: (回复文本, token 用量
+                prompt_tokens/completion_tokens，模型未返回时为空)
+        """
+        response = await self._call(
+            [SystemMessage(content=system), HumanMessage(content=prompt)],
+            estimate_tokens(system) + estimate_tokens(prompt),
+        )
+        usage = (response.llm_output or {}).get("token_usage", {})
+        return response.generations[0][0].text, usage
 
     def _extract_sentiment(self, analysis: str) -> str:
         """从分析中提取市场情绪"""
@@ -120,4 +268,10 @@ class LLMAnalyzer:
             confidence_str = analysis.split("置信度")[1].split("%")[0].strip()
             return int(confidence_str)
         except (IndexError, ValueError):
-            return 50  # 默认中等置信度 
\ No newline at end of file
+            return 50  # 默认中等置信度
+
+
+@lru_cache
+def get_llm_analyzer() -> LLMAnalyzer:
+    """获取全局 LLM 分析器"""
+    return LLMAnalyzer()
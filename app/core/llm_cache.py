@@ -0,0 +1,313 @@
+import asyncio
+import hashlib
+import json
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    Optional,
+    Sequence,
+    Tuple,
+)
+
+import structlog
+
+from app.core.config import settings
+from app.core.db import async_session_factory
+from app.core.streaming import StreamEvent, replay_analysis
+from app.datasource.repositories.market import MarketRepository
+
+logger = structlog.get_logger()
+
+
+def llm_cache_key(
+    messages: Sequence[Tuple[str, str]],
+    model: str,
+    temperature: float,
+    max_tokens: int,
+) -> str:
+    """
+    计算 LLM 请求的缓存键
+
+    Args:
+        messages: 渲染后的提示词 [(角色, 内容), ...]
+        model: 模型名称
+        temperature: 采样温度
+        max_tokens: 最大输出 token 数
+
+    Returns:
+        str: 提示词与模型参数的 SHA-256 十六进制哈希
+    """
+    payload = json.dumps(
+        {
+            "messages": [list(message) for message in messages],
+            "model": model,
+            "temperature": temperature,
+            "max_tokens": max_tokens,
+        },
+        ensure_ascii=False,
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """LLM 响应缓存
+
+    键为渲染后提示词与模型参数的哈希，输入相同（行情平静时段、多个调用方同时请求）
+    时不再重复调用模型。查找顺序：
+
+    - 内存 LRU：进程内最近使用的结果；
+    - 进行中的请求：相同键已有请求在调用模型时，等待其结果而不再发起新请求；
+    - 数据库：跨进程、跨重启共享的结果；
+    - 都未命中时调用模型，结果同时写入内存与数据库。
+
+    所有条目按 TTL 过期。数据库层出错时只记录日志，不影响分析本身。
+    """
+
+    def __init__(
+        self,
+        maxsize: Optional[int] = None,
+        ttl: Optional[float] = None,
+        persistent: Optional[bool] = None,
+        session_factory: Optional[Callable[[], Any]] = None,
+        clock: Callable[[], datetime] = datetime.utcnow,
+    ):
+        """
+        初始化缓存，参数默认读取 LLM_CACHE_* 配置
+
+        Args:
+            maxsize: 内存层最大条目数
+            ttl: 条目有效期（秒）
+            persistent: 是否启用数据库层
+            session_factory: 数据库会话工厂
+            clock: 时钟函数（UTC）
+        """
+        self.maxsize = maxsize or settings.LLM_CACHE_SIZE
+        self.ttl = timedelta(seconds=ttl or settings.LLM_CACHE_TTL)
+        self.persistent = (
+            settings.LLM_CACHE_PERSISTENT if persistent is None else persistent
+        )
+        self.session_factory = session_factory or async_session_factory
+        self.clock = clock
+        self._entries: "OrderedDict[str, Tuple[datetime, Dict[str, Any]]]" = (
+            OrderedDict()
+        )
+        self._inflight: Dict[str, "asyncio.Future[Dict[str, Any]]"] = {}
+        self.counters = {
+            "memory_hits": 0, "db_hits": 0, "misses": 0, "coalesced": 0
+        }
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        读取内存层
+
+        Args:
+            key: 缓存键
+
+        Returns:
+            Optional[Dict[str, Any]]: 分析结果，未命中或已过期时返回 None
+        """
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= self.clock():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key: str, response: Dict[str, Any], expires_at: datetime) -> None:
+        """写入内存层，超出容量时淘汰最久未使用的条目"""
+        self._entries[key] = (expires_at, response)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Dict[str, Any]]],
+        model: str = "",
+    ) -> Dict[str, Any]:
+        """
+        读取缓存，未命中时调用 compute 并写入
+
+        Args:
+            key: 缓存键（见 llm_cache_key）
+            compute: 调用模型并返回分析结果的协程函数
+            model: 模型名称，随数据库条目保存
+
+        Returns:
+            Dict[str, Any]: 分析结果
+        """
+        response = self.get(key)
+        if response is not None:
+            self.counters["memory_hits"] += 1
+            return response
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.counters["coalesced"] += 1
+        else:
+            task = asyncio.ensure_future(self._resolve(key, compute, model))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        # 调用方被取消时不取消共享的请求，其他等待者仍能拿到结果
+        return await asyncio.shield(task)
+
+    async def stream_or_compute(
+        self,
+        key: str,
+        stream: Callable[[], AsyncIterator[StreamEvent]],
+        model: str = "",
+    ) -> AsyncIterator[StreamEvent]:
+        """
+        流式读取缓存，未命中时转发 stream 的事件并写入
+
+        与 get_or_compute 共用各缓存层与进行中的请求：命中内存/数据库，或相同键
+        已有请求（流式或非流式）在调用模型时，拿到结果后一次性回放；否则由本调用方
+        调用模型并逐段转发，("done", 结果) 到达时写入缓存并交给同时等待的调用方。
+
+        Args:
+            key: 缓存键（见 llm_cache_key）
+            stream: 调用模型并产生流式事件的函数，最后一个事件为 ("done", 结果)
+            model: 模型名称，随数据库条目保存
+
+        Yields:
+            StreamEvent: 与 stream_analysis 格式一致的事件
+        """
+        response = self.get(key)
+        if response is not None:
+            self.counters["memory_hits"] += 1
+            for event in replay_analysis(response):
+                yield event
+            return
+
+        future = self._inflight.get(key)
+        if future is not None:
+            self.counters["coalesced"] += 1
+            response = await asyncio.shield(future)
+            for event in replay_analysis(response):
+                yield event
+            return
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        future.add_done_callback(lambda done: self._finish(key, done))
+        try:
+            response = await self._load(key)
+            if response is not None:
+                self.counters["db_hits"] += 1
+                future.set_result(response)
+                for event in replay_analysis(response):
+                    yield event
+                return
+
+            self.counters["misses"] += 1
+            async for event in stream():
+                if event[0] == "done":
+                    now = self.clock()
+                    self.put(key, event[1], now + self.ttl)
+                    future.set_result(event[1])
+                    await self._store(key, model, event[1], now)
+                    logger.debug("LLM缓存未命中", key=key[:12], model=model)
+                yield event
+            if not future.done():
+                raise RuntimeError("模型输出未完成")
+        except BaseException as e:
+            # 调用方断开（GeneratorExit/取消）时等待者收到普通异常，而不是被取消
+            if not future.done():
+                future.set_exception(
+                    e if isinstance(e, Exception) else RuntimeError("流式请求已中断")
+                )
+            raise
+
+    def _finish(self, key: str, task: "asyncio.Future[Dict[str, Any]]") -> None:
+        """请求结束后移出进行中列表；所有等待者都已取消时也取走异常，避免告警"""
+        self._inflight.pop(key, None)
+        if not task.cancelled():
+            task.exception()
+
+    async def _resolve(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Dict[str, Any]]],
+        model: str,
+    ) -> Dict[str, Any]:
+        response = await self._load(key)
+        if response is not None:
+            self.counters["db_hits"] += 1
+            return response
+
+        self.counters["misses"] += 1
+        response = await compute()
+        now = self.clock()
+        self.put(key, response, now + self.ttl)
+        await self._store(key, model, response, now)
+        logger.debug("LLM缓存未命中", key=key[:12], model=model)
+        return response
+
+    async def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        """读取数据库层，命中时回填内存层"""
+        if not self.persistent:
+            return None
+        try:
+            async with self.session_factory() as session:
+                entry = await MarketRepository(session).get_llm_cache(
+                    key, self.clock()
+                )
+        except Exception as e:
+            logger.warning("读取LLM缓存失败", error=str(e))
+            return None
+        if entry is None:
+            return None
+        self.put(key, entry.response, entry.expires_at)
+        return entry.response
+
+    async def _store(
+        self,
+        key: str,
+        model: str,
+        response: Dict[str, Any],
+        now: datetime,
+    ) -> None:
+        if not self.persistent:
+            return
+        try:
+            async with self.session_factory() as session:
+                await MarketRepository(session).save_llm_cache(
+                    key, model, response, now, now + self.ttl
+                )
+        except Exception as e:
+            logger.warning("写入LLM缓存失败", error=str(e))
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        缓存统计
+
+        Returns:
+            Dict[str, Any]: 各层命中数、未命中数、合并的并发请求数、
+                内存条目数、进行中的请求数与命中率
+        """
+        lookups = sum(self.counters.values())
+        hits = lookups - self.counters["misses"]
+        return {
+            **self.counters,
+            "size": len(self._entries),
+            "inflight": len(self._inflight),
+            "hit_rate": hits / lookups if lookups else 0.0,
+        }
+
+
+@lru_cache
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    """获取全局 LLM 响应缓存，LLM_CACHE_ENABLED 关闭时返回 None"""
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    return LLMResponseCache()
@@ -0,0 +1,178 @@
+from collections import Counter
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+
+from app.core.config import settings
+from app.core.tokens import estimate_tokens
+from app.datasource.clustering import cluster_representatives
+
+# 技术指标行：(所需字段, 行模板, 优先级)，按展示顺序排列，预算不足时先舍弃优先级低的
+INDICATOR_LINES: Tuple[Tuple[Tuple[str, ...], str, int], ...] = (
+    (("ma5",), "- MA5: {ma5}", 2),
+    (("ma20",), "- MA20: {ma20}", 2),
+    (("rsi",), "- RSI: {rsi}", 0),
+    (("macd",), "- MACD: {macd}", 1),
+    (
+        ("bb_upper", "bb_middle", "bb_lower"),
+        "- 布林带: 上轨={bb_upper}, 中轨={bb_middle}, 下轨={bb_lower}",
+        3,
+    ),
+)
+
+MARKET_DATA_TEMPLATE = """
+- 开盘价: {open}
+- 最高价: {high}
+- 最低价: {low}
+- 收盘价: {close}
+- 成交量: {volume}
+"""
+
+NO_NEWS = "暂无相关新闻"
+
+
+@dataclass(frozen=True)
+class BuiltPrompt:
+    """渲染好的提示词各段落及其 token 统计"""
+
+    sections: Dict[str, str]  # human 模板的变量 -> 段落文本
+    tokens: int               # 整个提示词（含系统提示）的估算 token 数
+    indicators: int           # 保留的指标行数
+    news: int                 # 保留的新闻条数
+    news_total: int           # 输入的新闻条数（聚类合并前）
+
+
+class PromptBuilder:
+    """按 token 预算组装市场分析提示词
+
+    系统提示与模板骨架的 token 数在初始化时计算一次。每次分析时行情段落完整保留，
+    技术指标按优先级、新闻按排序依次加入，直到用完预算；新闻先按近似重复聚类
+    合并，再按报道来源数与发布时间排序，单条新闻按字符数截断。
+    """
+
+    def __init__(
+        self,
+        system_prompt: str,
+        human_template: str,
+        token_budget: Optional[int] = None,
+        news_item_chars: Optional[int] = None,
+    ):
+        """
+        初始化提示词构建器，参数默认读取 LLM_PROMPT_* 配置
+
+        Args:
+            system_prompt: 系统提示
+            human_template: 用户提示模板，变量为 symbol/market_data/
+                technical_indicators/news_data
+            token_budget: 整个提示词的 token 上限
+            news_item_chars: 单条新闻的字符数上限
+        """
+        self.system_prompt = system_prompt
+        self.human_template = human_template
+        self.token_budget = token_budget or settings.LLM_PROMPT_TOKEN_BUDGET
+        self.news_item_chars = news_item_chars or settings.LLM_PROMPT_NEWS_CHARS
+        self.base_tokens = estimate_tokens(system_prompt) + estimate_tokens(
+            human_template.format(
+                symbol="", market_data="", technical_indicators="", news_data=""
+            )
+        )
+
+    def build(
+        self,
+        market_data: Mapping[str, Any],
+        technical_indicators: Mapping[str, Any],
+        news_data: Sequence[Mapping[str, Any]],
+        symbol: str = "",
+    ) -> BuiltPrompt:
+        """
+        渲染提示词各段落
+
+        Args:
+            market_data: 行情数据（open/high/low/close/volume）
+            technical_indicators: 技术指标，缺少的指标直接跳过
+            news_data: 新闻列表（title/summary，可带 published_at 与 cluster_id）
+            symbol: 交易对
+
+        Returns:
+            BuiltPrompt: 段落文本与 token 统计
+        """
+        market = MARKET_DATA_TEMPLATE.format(**market_data)
+        remaining = (
+            self.token_budget
+            - self.base_tokens
+            - estimate_tokens(symbol)
+            - estimate_tokens(market)
+        )
+
+        indicators, remaining = self._fit_indicators(technical_indicators, remaining)
+        news, _ = self._fit_news(news_data, remaining)
+
+        sections = {
+            "symbol": symbol,
+            "market_data": market,
+            "technical_indicators": "\n" + "\n".join(indicators) + "\n",
+            "news_data": "\n".join(news) if news else NO_NEWS,
+        }
+        tokens = self.base_tokens + sum(
+            estimate_tokens(text) for text in sections.values()
+        )
+        return BuiltPrompt(
+            sections=sections,
+            tokens=tokens,
+            indicators=len(indicators),
+            news=len(news),
+            news_total=len(news_data),
+        )
+
+    def _fit_indicators(
+        self, indicators: Mapping[str, Any], remaining: int
+    ) -> Tuple[List[str], int]:
+        """按优先级保留预算内的指标行，输出保持展示顺序"""
+        lines = {
+            position: template.format(**{key: indicators[key] for key in keys})
+            for position, (keys, template, _) in enumerate(INDICATOR_LINES)
+            if all(key in indicators for key in keys)
+        }
+        kept = set()
+        for position in sorted(lines, key=lambda p: INDICATOR_LINES[p][2]):
+            cost = estimate_tokens(lines[position]) + 1
+            if cost <= remaining:
+                kept.add(position)
+                remaining -= cost
+        return [lines[position] for position in sorted(kept)], remaining
+
+    def rank_news(
+        self, news: Sequence[Mapping[str, Any]]
+    ) -> List[Mapping[str, Any]]:
+        """
+        新闻排序：每个聚类只保留代表条目，多来源报道的事件在前，其次按发布时间倒序
+
+        Args:
+            news: 新闻列表
+
+        Returns:
+            List[Mapping[str, Any]]: 排序后的新闻
+        """
+        sizes = Counter(item["cluster_id"] for item in news if item.get("cluster_id"))
+
+        def score(item: Mapping[str, Any]) -> Tuple[int, datetime]:
+            size = sizes.get(item.get("cluster_id"), 1)
+            return size, item.get("published_at") or datetime.min
+
+        return sorted(cluster_representatives(news), key=score, reverse=True)
+
+    def _fit_news(
+        self, news: Sequence[Mapping[str, Any]], remaining: int
+    ) -> Tuple[List[str], int]:
+        """按排序依次加入预算内的新闻"""
+        lines = []
+        for item in self.rank_news(news):
+            summary = item.get("summary")
+            line = f"- {item['title']}: {summary}" if summary else f"- {item['title']}"
+            if len(line) > self.news_item_chars:
+                line = line[:self.news_item_chars - 1] + "…"
+            cost = estimate_tokens(line) + 1
+            if cost <= remaining:
+                lines.append(line)
+                remaining -= cost
+        return lines, remaining
@@ -0,0 +1,169 @@
+import asyncio
+import random
+import time
+from functools import lru_cache
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+import structlog
+
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """令牌桶：容量为 capacity，每秒补充 rate 个令牌"""
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.rate = rate
+        self.capacity = capacity
+        self.clock = clock
+        self.tokens = capacity
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        elapsed = now - self._updated
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """取出 amount 个令牌还需等待的秒数（超过容量的按容量计）"""
+        self._refill()
+        missing = min(amount, self.capacity) - self.tokens
+        return max(missing, 0) / self.rate
+
+    def take(self, amount: float) -> None:
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+
+class LLMRateLimiter:
+    """LLM 客户端侧限流：每分钟请求数（RPM）与每分钟 token 数（TPM）
+
+    两个令牌桶的容量都是一分钟的额度。请求按到达顺序排队，
+    两个桶都有足够令牌时才放行，避免触发服务商的限流错误。
+    """
+
+    def __init__(
+        self,
+        rpm: Optional[float] = None,
+        tpm: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+    ):
+        """
+        初始化限流器，参数默认读取 LLM_RPM_LIMIT/LLM_TPM_LIMIT 配置
+
+        Args:
+            rpm: 每分钟请求数上限
+            tpm: 每分钟 token 数上限
+            clock: 时钟函数（秒）
+            sleep: 等待函数
+        """
+        rpm = rpm or settings.LLM_RPM_LIMIT
+        tpm = tpm or settings.LLM_TPM_LIMIT
+        self.requests = TokenBucket(rpm / 60, rpm, clock)
+        self.tokens = TokenBucket(tpm / 60, tpm, clock)
+        self._sleep = sleep
+        self._lock = asyncio.Lock()
+        self.counters = {"acquired": 0, "throttled": 0, "waited_seconds": 0.0}
+
+    async def acquire(self, tokens: int) -> float:
+        """
+        等待额度并占用一次请求与 tokens 个 token
+
+        Args:
+            tokens: 本次请求预计消耗的 token 数（提示词 + 最大输出）
+
+        Returns:
+            float: 等待的秒数
+        """
+        waited = 0.0
+        async with self._lock:
+            while True:
+                wait = max(self.requests.wait_time(1), self.tokens.wait_time(tokens))
+                if wait <= 0:
+                    break
+                await self._sleep(wait)
+                waited += wait
+            self.requests.take(1)
+            self.tokens.take(tokens)
+
+        self.counters["acquired"] += 1
+        if waited:
+            self.counters["throttled"] += 1
+            self.counters["waited_seconds"] += waited
+        return waited
+
+    def stats(self) -> Dict[str, Any]:
+        """限流统计：放行次数、被限流次数、累计等待时间与当前剩余额度"""
+        return {
+            **self.counters,
+            "requests_available": self.requests.tokens,
+            "tokens_available": self.tokens.tokens,
+        }
+
+
+async def call_with_retry(
+    func: Callable[[], Awaitable[T]],
+    retries: Optional[int] = None,
+    timeout: Optional[float] = None,
+    base_delay: Optional[float] = None,
+    max_delay: Optional[float] = None,
+    acquire: Optional[Callable[[], Awaitable[Any]]] = None,
+    sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep,
+) -> T:
+    """
+    带超时与重试地调用协程函数
+
+    每次调用限时 timeout 秒；失败（含超时）后按指数退避重试，
+    等待时间在 [0, min(max_delay, base_delay * 2^n)] 内随机取值，
+    避免大量并发请求在同一时刻重试。
+
+    Args:
+        func: 无参协程函数，每次重试重新调用
+        retries: 最大重试次数，默认 LLM_MAX_RETRIES
+        timeout: 单次调用超时（秒），默认 LLM_TIMEOUT
+        base_delay: 退避基数（秒），默认 LLM_RETRY_BASE_DELAY
+        max_delay: 单次等待上限（秒），默认 LLM_RETRY_MAX_DELAY
+        acquire: 每次调用前等待的协程函数（如限流），等待时间不计入超时
+        sleep: 等待函数
+
+    Returns:
+        T: func 的返回值，重试耗尽时抛出最后一次的异常
+    """
+    retries = settings.LLM_MAX_RETRIES if retries is None else retries
+    timeout = timeout or settings.LLM_TIMEOUT
+    base_delay = base_delay or settings.LLM_RETRY_BASE_DELAY
+    max_delay = max_delay or settings.LLM_RETRY_MAX_DELAY
+
+    for attempt in range(retries + 1):
+        if acquire is not None:
+            await acquire()
+        try:
+            return await asyncio.wait_for(func(), timeout)
+        except Exception as e:
+            if attempt >= retries:
+                raise
+            delay = random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+            logger.warning(
+                "LLM调用失败，稍后重试",
+                attempt=attempt + 1,
+                delay=round(delay, 2),
+                error=str(e) or type(e).__name__,
+            )
+            await sleep(delay)
+
+
+@lru_cache
+def get_llm_rate_limiter() -> LLMRateLimiter:
+    """获取全局 LLM 限流器（同一账号的所有调用共享额度）"""
+    return LLMRateLimiter()
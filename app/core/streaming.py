@@ -0,0 +1,177 @@
+import asyncio
+import json
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+SENTIMENT_KEYWORDS = ("看涨", "看跌")
+CONFIDENCE_KEYWORD = "置信度"
+DEFAULT_CONFIDENCE = 50
+
+StreamEvent = Tuple[str, Any]
+
+
+class SignalExtractor:
+    """在流式输出过程中增量提取市场情绪与置信度
+
+    规则与 LLMAnalyzer._extract_sentiment/_extract_confidence 一致，
+    但每次只扫描新到达的文本（加上关键词长度的重叠部分），无需反复扫描全文：
+
+    - 情绪：出现“看涨”即确定为看涨；只出现“看跌”时暂定为看跌；都未出现为中性；
+    - 置信度：第一个“置信度”之后出现“%”即确定，无法解析为整数时为默认值 50；
+      没有“%”时在输出结束后解析。
+    """
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self._tail = ""
+        self._seen = set()
+        # 第一个“置信度”之后、“%”之前的文本，None 表示尚未出现“置信度”
+        self._pending: Optional[str] = None
+        self.confidence: Optional[int] = None
+
+    @property
+    def text(self) -> str:
+        return "".join(self._parts)
+
+    @property
+    def sentiment(self) -> str:
+        for keyword in SENTIMENT_KEYWORDS:
+            if keyword in self._seen:
+                return keyword
+        return "中性"
+
+    def feed(self, chunk: str) -> List[StreamEvent]:
+        """
+        追加一段输出
+
+        Args:
+            chunk: 新到达的文本
+
+        Returns:
+            List[StreamEvent]: 本次新确定或发生变化的信号，
+                ("sentiment", 情绪) 与 ("confidence", 置信度)
+        """
+        events: List[StreamEvent] = []
+        if not chunk:
+            return events
+        self._parts.append(chunk)
+        # 保留上一段末尾的字符，跨段的关键词也能匹配
+        window = self._tail + chunk
+        self._tail = window[-(len(CONFIDENCE_KEYWORD) - 1):]
+
+        before = self.sentiment
+        self._seen.update(k for k in SENTIMENT_KEYWORDS if k in window)
+        if self.sentiment != before:
+            events.append(("sentiment", self.sentiment))
+
+        if self.confidence is None:
+            if self._pending is None:
+                position = window.find(CONFIDENCE_KEYWORD)
+                if position >= 0:
+                    self._pending = window[position + len(CONFIDENCE_KEYWORD):]
+            else:
+                self._pending += chunk
+            if self._pending is not None and "%" in self._pending:
+                self.confidence = parse_confidence(self._pending.split("%")[0])
+                self._pending = ""
+                events.append(("confidence", self.confidence))
+        return events
+
+    def result(self) -> Dict[str, Any]:
+        """输出结束后的最终结果（与 analyze_market 的返回格式一致）"""
+        confidence = self.confidence
+        if confidence is None:
+            # 出现“置信度”但直到结束都没有“%”时，解析其后的全部文本
+            confidence = (
+                DEFAULT_CONFIDENCE if self._pending is None
+                else parse_confidence(self._pending)
+            )
+        return {
+            "analysis": self.text,
+            "sentiment": self.sentiment,
+            "confidence": confidence,
+        }
+
+
+def parse_confidence(value: str) -> int:
+    """解析置信度数值，无法解析时返回默认值"""
+    try:
+        return int(value.strip())
+    except ValueError:
+        return DEFAULT_CONFIDENCE
+
+
+async def stream_analysis(
+    chunks: AsyncIterator[str], prompt_tokens: int
+) -> AsyncIterator[StreamEvent]:
+    """
+    把模型的流式输出转换为分析事件
+
+    Args:
+        chunks: 模型逐段输出的文本
+        prompt_tokens: 提示词的估算 token 数，随最终结果返回
+
+    Yields:
+        StreamEvent: ("token", 文本)、("sentiment", 情绪)、("confidence", 置信度)，
+            最后是 ("done", 分析结果)
+    """
+    extractor = SignalExtractor()
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        yield "token", chunk
+        for event in extractor.feed(chunk):
+            yield event
+    yield "done", {**extractor.result(), "prompt_tokens": prompt_tokens}
+
+
+async def with_timeout(
+    chunks: AsyncIterator[str], timeout: float
+) -> AsyncIterator[str]:
+    """
+    限制等待模型输出的总时间
+
+    只累计等待模型的时间，下游消费事件的时间不计入。
+
+    Args:
+        chunks: 模型逐段输出的文本
+        timeout: 超时（秒）
+
+    Yields:
+        str: 原样转发的文本，累计等待超过 timeout 时抛出 asyncio.TimeoutError
+    """
+    loop = asyncio.get_running_loop()
+    iterator = chunks.__aiter__()
+    remaining = timeout
+    while True:
+        started = loop.time()
+        try:
+            chunk = await asyncio.wait_for(iterator.__anext__(), remaining)
+        except StopAsyncIteration:
+            return
+        remaining -= loop.time() - started
+        yield chunk
+
+
+def replay_analysis(response: Dict[str, Any]) -> List[StreamEvent]:
+    """把已有的分析结果（如缓存命中）转换为与流式输出相同的事件序列"""
+    return [
+        ("sentiment", response["sentiment"]),
+        ("confidence", response["confidence"]),
+        ("token", response["analysis"]),
+        ("done", response),
+    ]
+
+
+def format_sse(event: str, data: Any) -> str:
+    """
+    编码为 Server-Sent Events 消息
+
+    Args:
+        event: 事件名
+        data: 事件数据，编码为 JSON
+
+    Returns:
+        str: SSE 消息文本
+    """
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
@@ -7,6 +7,21 @@ class DataSourceType(str, Enum):
     BINANCE = "binance"
     COINGLASS = "coinglass"
 
+class KlineInterval(str, Enum):
+    """K线周期（与 Binance interval 参数一致）"""
+    M1 = "1m"
+    M5 = "5m"
+    M15 = "15m"
+    H1 = "1h"
+    H4 = "4h"
+    D1 = "1d"
+
+    @property
+    def seconds(self) -> int:
+        """周期长度（秒）"""
+        unit = {"m": 60, "h": 3600, "d": 86400}[self.value[-1]]
+        return int(self.value[:-1]) * unit
+
 class DataSourceConfig(Dict[str, Any]):
     """数据源配置基类"""
     pass
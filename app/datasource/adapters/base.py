@@ -1,42 +1,155 @@
-from typing import Dict, Any
+import hashlib
+from typing import Dict, Any, List, Optional
 import aiohttp
 import structlog
+from app.core.http import HttpClientManager, decode_json, get_http_client
 from app.datasource.models.datasource import DataSource
 from app.core.types import DataSourceProtocol
 
 logger = structlog.get_logger()
 
+# 运行时写入 DataSource.config 的字段，重新注册数据源时需保留
+RUNTIME_CONFIG_KEYS = ("watermark", "validators", "resume")
+
+
+class NotModified(Exception):
+    """数据源响应自上次成功入库以来未变化"""
+
+
 class BaseAdapter(DataSourceProtocol):
     """数据源适配器基类"""
-    def __init__(self, source: DataSource):
+    def __init__(
+        self, source: DataSource, http: Optional[HttpClientManager] = None
+    ):
         self.source = source
-        self.session = aiohttp.ClientSession()
+        # 共享连接池，会话的生命周期由 HttpClientManager 管理
+        self.http = http or get_http_client()
+        # 本次增量获取到的最新时间与响应校验信息，入库成功后由 commit 写入配置
+        self.pending_watermark: Optional[int] = None
+        self.pending_validators: Dict[str, Dict[str, Optional[str]]] = {}
+        # 本次获取后的续传游标：None 表示不变，空字典表示缺口已补齐
+        self.pending_resume: Optional[Dict[str, int]] = None
+        # 已收到但尚未被调用方确认有效的响应校验信息
+        self._received_validators: Dict[str, Dict[str, Optional[str]]] = {}
+        # 最近一次增量获取是否因数据未变化而跳过
+        self.unchanged = False
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        return self.http.session
+
+    @property
+    def watermark(self) -> Optional[int]:
+        """已入库的最新新闻时间（Unix 秒），保存在 DataSource.config 中"""
+        return (self.source.config or {}).get("watermark")
+
+    @property
+    def resume(self) -> Optional[Dict[str, int]]:
+        """分页补齐缺口的续传游标，保存在 DataSource.config 中"""
+        return (self.source.config or {}).get("resume")
+
+    @property
+    def validators(self) -> Dict[str, Dict[str, Optional[str]]]:
+        """请求参数 -> 上次入库时响应的 ETag/Last-Modified/内容哈希"""
+        return (self.source.config or {}).get("validators", {})
+
+    def commit(self) -> None:
+        """推进水位线并保存响应校验信息与续传游标（需由调用方提交数据库会话）"""
+        config = dict(self.source.config or {})
+        if self.pending_watermark is not None and (
+            self.watermark is None or self.pending_watermark > self.watermark
+        ):
+            config["watermark"] = self.pending_watermark
+        if self.pending_validators:
+            config["validators"] = {**self.validators, **self.pending_validators}
+        if self.pending_resume:
+            config["resume"] = self.pending_resume
+        elif self.pending_resume is not None:
+            config.pop("resume", None)
+        # JSON 列需整体赋值才能被 ORM 识别为已修改
+        if config != (self.source.config or {}):
+            self.source.config = config
+        self.pending_watermark = None
+        self.pending_validators = {}
+        self.pending_resume = None
 
-    async def fetch(self, **kwargs) -> Dict[str, Any]:
-        """获取原始数据"""
+    @staticmethod
+    def request_key(params: Dict[str, Any]) -> str:
+        """请求参数 -> 校验信息的键"""
+        return "&".join(f"{k}={v}" for k, v in sorted(params.items()))
+
+    def accept(self, **params) -> None:
+        """
+        确认条件请求的响应有效（如接口状态正常且包含数据），
+        其校验信息在 commit 时保存；未确认的错误响应不会被记为“未变化”
+
+        Args:
+            **params: 与 fetch 相同的查询参数
+        """
+        key = self.request_key(params)
+        if key in self._received_validators:
+            self.pending_validators[key] = self._received_validators.pop(key)
+
+    async def fetch_incremental(self, **kwargs) -> List[Dict[str, Any]]:
+        """增量获取新闻，不支持增量的数据源退化为获取最新一页"""
+        return await self.fetch_news()
+
+    async def fetch(self, conditional: bool = False, **kwargs) -> Dict[str, Any]:
+        """
+        获取原始数据
+
+        Args:
+            conditional: 是否为条件请求。携带上次入库时的 ETag/Last-Modified，
+                服务端返回 304 或响应内容哈希与上次相同时抛出 NotModified，
+                跳过 JSON 解析；新的校验信息经 accept 确认后在 commit 时保存
+            **kwargs: 查询参数
+
+        Returns:
+            Dict[str, Any]: 响应数据，失败时为空字典
+        """
         try:
             headers = self._get_headers()
+            key = self.request_key(kwargs)
+            validator = self.validators.get(key, {}) if conditional else {}
+            if validator.get("etag"):
+                headers["If-None-Match"] = validator["etag"]
+            if validator.get("last_modified"):
+                headers["If-Modified-Since"] = validator["last_modified"]
             logger.info("发送API请求", url=self.source.api_url, params=kwargs)
             
             async with self.session.get(
                 self.source.api_url,
                 headers=headers,
-                params=kwargs,
-                timeout=30  # 设置超时时间
+                params=kwargs
             ) as response:
+                if response.status == 304 and conditional:
+                    raise NotModified(key)
                 if response.status != 200:
                     error_msg = f"API请求失败: HTTP {response.status}"
                     logger.error(error_msg, url=self.source.api_url)
                     return {}
+
+                body = await response.read()
+                if conditional:
+                    digest = hashlib.sha256(body).hexdigest()
+                    if digest == validator.get("digest"):
+                        raise NotModified(key)
+                    self._received_validators[key] = {
+                        "etag": response.headers.get("ETag"),
+                        "last_modified": response.headers.get("Last-Modified"),
+                        "digest": digest
+                    }
                     
                 try:
-                    data = await response.json()
-                    logger.debug("API响应数据", data=data)
+                    data = decode_json(body)
+                    logger.debug("API响应数据", bytes=len(body))
                     return data
                 except Exception as e:
                     logger.error("解析API响应失败", error=str(e))
                     return {}
                     
+        except NotModified:
+            raise
         except aiohttp.ClientError as e:
             logger.error("API请求异常", error=str(e))
             return {}
@@ -56,8 +169,4 @@ class BaseAdapter(DataSourceProtocol):
         return headers
 
     async def close(self) -> None:
-        """关闭会话"""
-        try:
-            await self.session.close()
-        except Exception as e:
-            logger.error("关闭会话失败", error=str(e)) 
\ No newline at end of file
+        """释放适配器资源（共享会话不在此关闭，由应用关闭流程统一释放）"""
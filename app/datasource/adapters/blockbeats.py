@@ -1,7 +1,11 @@
-from typing import Dict, List, Any
+import asyncio
+import math
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
 import structlog
 from datetime import datetime
-from app.datasource.adapters.base import BaseAdapter
+
+from app.core.config import settings
+from app.datasource.adapters.base import BaseAdapter, NotModified
 
 logger = structlog.get_logger()
 
@@ -10,57 +14,270 @@ class BlockBeatsAdapter(BaseAdapter):
     async def fetch_news(self, page: int = 1, size: int = 10) -> List[Dict[str, Any]]:
         """获取新闻数据"""
         try:
-            # 添加必要的查询参数
-            params = {
-                "page": page,
-                "size": size,
-                "type": "push",  # 获取重要新闻
-                "lang": "cn"     # 获取中文新闻
-            }
-            
-            data = await self.fetch(**params)
-            if not data:
-                logger.error("BlockBeats API返回空数据")
-                return []
-                
-            if data.get("status") != 0:  # 注意：API 使用 status 而不是 code
-                error_msg = data.get("message", "未知错误")
-                logger.error("BlockBeats API错误", error=error_msg)
-                return []
-                
-            news_list = data.get("data", {}).get("data", [])
-            if not news_list:
-                logger.warning("BlockBeats API返回空新闻列表")
-                return []
-                
-            # 处理新闻数据
-            processed_news = []
-            for news in news_list:
-                try:
-                    # 将 Unix 时间戳转换为 datetime 对象
-                    timestamp = int(news.get("create_time", "0"))
-                    publish_time = datetime.fromtimestamp(timestamp)
-                    
-                    processed_news.append({
-                        # API 返回字段
-                        "title": news.get("title", ""),
-                        "content": news.get("content", ""),
-                        "link": news.get("link", ""),
-                        "publishTime": publish_time,
-                        "type": news.get("type", "push"),
-                        
-                        # 辅助字段
-                        "source": "blockbeats",
-                        "status": "pending",
-                        "processed_at": None
-                    })
-                except (ValueError, TypeError) as e:
-                    logger.error("处理新闻数据失败", error=str(e), news=news)
-                    continue
-                
+            news_list = await self._fetch_page(page, size) or []
+            processed_news = list(self._normalize(news_list))
             logger.info("成功获取新闻数据", count=len(processed_news))
             return processed_news
-            
+
         except Exception as e:
             logger.error("获取新闻数据失败", error=str(e))
-            return [] 
\ No newline at end of file
+            return []
+
+    async def fetch_incremental(
+        self,
+        size: Optional[int] = None,
+        max_pages: Optional[int] = None,
+        concurrency: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        增量获取水位线之后的新闻
+
+        先取第1页；若第1页最旧的新闻仍晚于水位线，按已获取数据的时间密度估算
+        缺口页数，分批并发获取后续页，直到某页到达水位线或达到页数上限。
+        首次运行（没有水位线）只取第1页。第1页使用条件请求，内容自上次入库后
+        未变化时直接返回空列表并标记 unchanged。
+
+        达到页数上限时水位线推进到最新的新闻，未获取的缺口记为续传游标
+        （首个未获取条目的偏移与缺口的时间范围）；之后每次增量获取完成后，
+        用剩余的页数从游标处继续补齐，新出现的新闻数量用于换算游标偏移。
+        中途有页获取失败时已获取的新闻照常返回，但保留原水位线、续传游标与
+        校验信息，下次从原位置重新补齐。
+
+        Args:
+            size: 每页数量，默认 NEWS_FETCH_PAGE_SIZE
+            max_pages: 单次最多获取的页数，默认 NEWS_FETCH_MAX_PAGES
+            concurrency: 并发获取的页数，默认 NEWS_FETCH_CONCURRENCY
+
+        Returns:
+            List[Dict[str, Any]]: 水位线之后（含）与补齐缺口的新闻
+        """
+        size = size or settings.NEWS_FETCH_PAGE_SIZE
+        max_pages = max_pages or settings.NEWS_FETCH_MAX_PAGES
+        concurrency = concurrency or settings.NEWS_FETCH_CONCURRENCY
+        watermark = self.watermark
+        resume = self.resume
+        self.unchanged = False
+        self.pending_validators = {}
+        self.pending_resume = None
+
+        # 每页到达后立即规范化，原始数据不跨页保留；pages 只记录 (条数, 最新, 最旧)
+        records: List[Dict[str, Any]] = []
+        pages: List[Tuple[int, int, int]] = []
+        newer = 0  # 晚于水位线的条数，即上次获取之后新出现的条数
+
+        def take(
+            news_list: List[Dict[str, Any]],
+            since: Optional[int],
+            before: Optional[int] = None,
+        ) -> Tuple[int, int, int]:
+            nonlocal newer
+            timestamps = [self._timestamp(news) for news in news_list]
+            if before is None and watermark is not None:
+                newer += sum(timestamp > watermark for timestamp in timestamps)
+            page = (
+                len(news_list), max(timestamps, default=0), min(timestamps, default=0)
+            )
+            pages.append(page)
+            records.extend(self._normalize(news_list, since=since, before=before))
+            return page
+
+        async def walk(
+            page: int,
+            last: int,
+            bound: int,
+            before: Optional[int] = None,
+            head: Optional[Tuple[int, int, int]] = None,
+        ) -> Tuple[bool, int, bool]:
+            """
+            从 page 页起分批并发获取到 last 页，某页不满一页或到达 bound 时停止
+
+            Args:
+                page: 起始页
+                last: 最后一页（含）
+                bound: 只获取到该时间为止
+                before: 只保留不晚于该时间的新闻
+                head: 已获取的上一页 (条数, 最新, 最旧)
+
+            Returns:
+                Tuple[bool, int, bool]: (是否没有失败, 下一个未获取的页, 是否到达 bound)
+            """
+            fetched = 1 if head else 0
+            count, top, oldest = head or (size, None, None)
+            while True:
+                if fetched and (count < size or oldest <= bound):
+                    return True, page, True
+                if page > last:
+                    return True, page, False
+
+                # 按已获取数据的时间密度估算缺口页数，缺口小时逐页获取
+                remaining = 1
+                if fetched:
+                    per_page = max((top - oldest) / fetched, 1)
+                    remaining = math.ceil((oldest - bound) / per_page)
+                batch = max(1, min(concurrency, remaining, last - page + 1))
+
+                results = await asyncio.gather(*[
+                    self._fetch_page(number, size)
+                    for number in range(page, page + batch)
+                ])
+                for result in results:
+                    if result is None:
+                        return False, page, False
+                    count, newest, oldest = take(result, since=bound, before=before)
+                    top = newest if top is None else top
+                    fetched += 1
+                    page += 1
+                    if count < size or oldest <= bound:
+                        break
+
+        complete = False
+        try:
+            # 有续传游标时第1页不使用条件请求，数据源没有新内容时也继续补齐
+            first = await self._fetch_page(1, size, conditional=not resume)
+            if first is None:
+                self.pending_validators = {}
+                return []
+            head = take(first, since=watermark)
+            complete, next_page, reached = True, 2, True
+            if watermark is not None:
+                complete, next_page, reached = await walk(
+                    2, max_pages, watermark, head=head
+                )
+
+            if complete and not reached:
+                # 达到页数上限：从下一页续传，直到原水位线（与未完成的缺口合并）
+                self.pending_resume = {
+                    "offset": (next_page - 1) * size,
+                    "before": min(page[2] for page in pages),
+                    "until": min(watermark, resume["until"]) if resume else watermark,
+                }
+                logger.warning(
+                    "BlockBeats 增量获取达到页数上限，下次从断点续传",
+                    source=self.source.name,
+                    max_pages=max_pages,
+                    resume=self.pending_resume,
+                )
+            elif complete and resume:
+                # 用剩余页数从续传游标处补齐缺口，游标偏移随新出现的条数后移
+                offset = resume["offset"] + newer
+                self.pending_resume = {**resume, "offset": offset}
+                budget = max_pages - next_page + 1
+                if budget > 0:
+                    start, fetched = offset // size + 1, len(pages)
+                    _, next_page, reached = await walk(
+                        start, start + budget - 1, resume["until"],
+                        before=resume["before"],
+                    )
+                    self.pending_resume = {} if reached else {
+                        "offset": max(offset, (next_page - 1) * size),
+                        "before": min(
+                            [resume["before"]] + [page[2] for page in pages[fetched:]]
+                        ),
+                        "until": resume["until"],
+                    }
+        except NotModified:
+            self.unchanged = True
+            logger.debug("BlockBeats 新闻未变化", source=self.source.name)
+            return []
+        except Exception as e:
+            logger.error("增量获取新闻数据失败", error=str(e))
+            complete = False
+
+        if not complete:
+            self.pending_validators = {}
+            self.pending_resume = None
+            logger.warning(
+                "BlockBeats 增量获取中断，保留原水位线",
+                source=self.source.name,
+                pages=len(pages),
+                watermark=watermark
+            )
+        elif records:
+            self.pending_watermark = max(page[1] for page in pages)
+        logger.info(
+            "增量获取新闻数据",
+            count=len(records),
+            pages=len(pages),
+            watermark=watermark
+        )
+        return records
+
+    async def _fetch_page(
+        self, page: int, size: int, conditional: bool = False
+    ) -> Optional[List[Dict[str, Any]]]:
+        """获取一页原始新闻，请求失败或接口返回错误时返回 None"""
+        # 添加必要的查询参数
+        params = {
+            "page": page,
+            "size": size,
+            "type": "push",  # 获取重要新闻
+            "lang": "cn"     # 获取中文新闻
+        }
+
+        data = await self.fetch(conditional=conditional, **params)
+        if not data:
+            logger.error("BlockBeats API返回空数据", page=page)
+            return None
+
+        if data.get("status") != 0:  # 注意：API 使用 status 而不是 code
+            error_msg = data.get("message", "未知错误")
+            logger.error("BlockBeats API错误", error=error_msg, page=page)
+            return None
+
+        news_list = data.get("data", {}).get("data", [])
+        if not news_list:
+            logger.warning("BlockBeats API返回空新闻列表", page=page)
+        elif conditional:
+            self.accept(**params)
+        return news_list
+
+    @staticmethod
+    def _timestamp(news: Dict[str, Any]) -> int:
+        try:
+            return int(news.get("create_time", "0"))
+        except (ValueError, TypeError):
+            return 0
+
+    def _normalize(
+        self,
+        news_list: Iterable[Dict[str, Any]],
+        since: Optional[int] = None,
+        before: Optional[int] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        逐条规范化新闻数据
+
+        Args:
+            news_list: 接口返回的原始新闻
+            since: 只保留发布时间不早于该时间（Unix 秒）的新闻
+            before: 只保留发布时间不晚于该时间（Unix 秒）的新闻
+
+        Returns:
+            Iterator[Dict[str, Any]]: save_news 所需格式的新闻
+        """
+        for news in news_list:
+            try:
+                # 将 Unix 时间戳转换为 datetime 对象
+                timestamp = int(news.get("create_time", "0"))
+                if since is not None and timestamp < since:
+                    continue
+                if before is not None and timestamp > before:
+                    continue
+                publish_time = datetime.fromtimestamp(timestamp)
+
+                yield {
+                    # API 返回字段
+                    "title": news.get("title", ""),
+                    "content": news.get("content", ""),
+                    "link": news.get("link", ""),
+                    "publishTime": publish_time,
+                    "type": news.get("type", "push"),
+
+                    # 辅助字段
+                    "source": "blockbeats",
+                    "status": "pending",
+                    "processed_at": None
+                }
+            except (ValueError, TypeError) as e:
+                logger.error("处理新闻数据失败", error=str(e), news=news)
+                continue
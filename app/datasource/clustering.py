@@ -0,0 +1,287 @@
+import re
+import zlib
+from collections import deque
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Deque, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+import structlog
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.datasource.models.market import news_item_hash
+from app.datasource.repositories.datasource import DataSourceRepository
+
+logger = structlog.get_logger()
+
+_PRIME = (1 << 31) - 1
+_TAG = re.compile(r"<[^>]+>")
+_NON_WORD = re.compile(r"[\W_]+")
+
+
+def shingles(title: str, content: str = "", size: int = 2) -> Set[str]:
+    """
+    提取标题与正文的字符 n-gram
+
+    去除 HTML 标签、标点与空白并转为小写，中英文统一按字符切分。
+
+    Args:
+        title: 标题
+        content: 正文
+        size: n-gram 长度
+
+    Returns:
+        Set[str]: n-gram 集合
+    """
+    text = _NON_WORD.sub("", _TAG.sub(" ", f"{title} {content}").lower())
+    if len(text) <= size:
+        return {text} if text else set()
+    return {text[i:i + size] for i in range(len(text) - size + 1)}
+
+
+class MinHasher:
+    """MinHash 签名：两条签名相同位置取值相等的比例估计 Jaccard 相似度"""
+
+    def __init__(self, num_perm: int = 64, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self._a = rng.integers(1, _PRIME, num_perm, dtype=np.uint64)[:, None]
+        self._b = rng.integers(0, _PRIME, num_perm, dtype=np.uint64)[:, None]
+
+    def signature(self, features: Iterable[str]) -> np.ndarray:
+        hashes = np.fromiter(
+            (zlib.crc32(f.encode("utf-8")) & _PRIME for f in features),
+            dtype=np.uint64,
+        )
+        if not len(hashes):
+            return np.full(self.num_perm, _PRIME, dtype=np.uint64)
+        return ((self._a * hashes + self._b) % _PRIME).min(axis=1)
+
+
+class NearDuplicateIndex:
+    """MinHash LSH 近似重复索引
+
+    签名按 bands 分段，任一分段完全相同的条目成为候选，再用签名估计的
+    Jaccard 相似度确认。只保留时间窗口内的条目，内存占用有上限。
+    """
+
+    def __init__(
+        self,
+        num_perm: int = 64,
+        bands: int = 16,
+        threshold: float = 0.5,
+        window: timedelta = timedelta(hours=24),
+        max_items: int = 50000,
+    ):
+        """
+        初始化索引
+
+        Args:
+            num_perm: 签名长度，需能被 bands 整除
+            bands: LSH 分段数，分段越多召回越高
+            threshold: 判定为近似重复的 Jaccard 相似度下限
+            window: 只与该时间范围内的新闻比较
+            max_items: 索引条目上限
+        """
+        if num_perm % bands:
+            raise ValueError("num_perm 必须能被 bands 整除")
+        self.hasher = MinHasher(num_perm)
+        self.rows = num_perm // bands
+        self.bands = bands
+        self.threshold = threshold
+        self.window = window
+        self.max_items = max_items
+        self._entries: Dict[str, Tuple[np.ndarray, str, datetime]] = {}
+        self._buckets: Dict[Tuple[int, bytes], List[str]] = {}
+        self._order: Deque[Tuple[datetime, str]] = deque()
+        self._latest: Optional[datetime] = None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _keys(self, signature: np.ndarray) -> List[Tuple[int, bytes]]:
+        return [
+            (band, signature[band * self.rows:(band + 1) * self.rows].tobytes())
+            for band in range(self.bands)
+        ]
+
+    def _evict(self) -> None:
+        """按加入顺序淘汰超出数量上限或早于时间窗口的条目"""
+        while self._order and (
+            len(self._order) > self.max_items
+            or self._order[0][0] < self._latest - self.window
+        ):
+            _, key = self._order.popleft()
+            signature, _, _ = self._entries.pop(key)
+            for bucket in self._keys(signature):
+                members = self._buckets[bucket]
+                members.remove(key)
+                if not members:
+                    del self._buckets[bucket]
+
+    def match(self, signature: np.ndarray, timestamp: datetime) -> Optional[str]:
+        """
+        查找近似重复条目所在的聚类
+
+        Args:
+            signature: MinHash 签名
+            timestamp: 新闻发布时间，只与时间窗口内的条目比较
+
+        Returns:
+            Optional[str]: 相似度最高且达到阈值的条目的聚类 ID
+        """
+        candidates = {
+            key
+            for bucket in self._keys(signature)
+            for key in self._buckets.get(bucket, ())
+        }
+        best, best_score = None, self.threshold
+        for key in candidates:
+            other, cluster_id, other_time = self._entries[key]
+            if abs(timestamp - other_time) > self.window:
+                continue
+            score = float(np.mean(signature == other))
+            if score >= best_score:
+                best, best_score = cluster_id, score
+        return best
+
+    def add(
+        self, key: str, signature: np.ndarray, cluster_id: str, timestamp: datetime
+    ) -> None:
+        """加入条目（同一 key 只记录一次）"""
+        if key in self._entries:
+            return
+        self._entries[key] = (signature, cluster_id, timestamp)
+        for bucket in self._keys(signature):
+            self._buckets.setdefault(bucket, []).append(key)
+        self._order.append((timestamp, key))
+        self._latest = max(self._latest or timestamp, timestamp)
+        self._evict()
+
+
+class NewsClusterer:
+    """入库前为新闻分配近似重复聚类
+
+    不同来源对同一事件的报道标题略有差异，精确去重无法识别。这里按标题 + 正文的
+    MinHash 签名在近期新闻中查找近似重复，命中则沿用其 cluster_id，否则以自身的
+    content_hash 作为新聚类的 ID（即聚类的代表条目）。
+    """
+
+    def __init__(
+        self,
+        threshold: Optional[float] = None,
+        num_perm: Optional[int] = None,
+        bands: Optional[int] = None,
+        window_hours: Optional[float] = None,
+        max_items: Optional[int] = None,
+    ):
+        """
+        初始化聚类器，参数默认读取 NEWS_CLUSTER_* 配置
+
+        Args:
+            threshold: 判定为近似重复的 Jaccard 相似度下限
+            num_perm: MinHash 签名长度
+            bands: LSH 分段数
+            window_hours: 只与近 N 小时的新闻比较
+            max_items: 索引条目上限
+        """
+        self.index = NearDuplicateIndex(
+            num_perm=num_perm or settings.NEWS_CLUSTER_NUM_PERM,
+            bands=bands or settings.NEWS_CLUSTER_BANDS,
+            threshold=threshold or settings.NEWS_CLUSTER_THRESHOLD,
+            window=timedelta(hours=window_hours or settings.NEWS_CLUSTER_WINDOW_HOURS),
+            max_items=max_items or settings.NEWS_CLUSTER_MAX_ITEMS,
+        )
+        self.is_warm = False
+        self.counters = {"assigned": 0, "clustered": 0}
+
+    async def warmup(self, session: AsyncSession) -> int:
+        """
+        从数据库加载时间窗口内的新闻重建索引
+
+        Args:
+            session: 数据库会话
+
+        Returns:
+            int: 加载的新闻数量
+        """
+        since = datetime.utcnow() - self.index.window
+        rows = await DataSourceRepository(session).get_recent_news_for_clustering(
+            since
+        )
+        for row in rows:
+            signature = self.index.hasher.signature(shingles(row.title, row.content))
+            self.index.add(
+                row.content_hash,
+                signature,
+                row.cluster_id or row.content_hash,
+                row.create_time,
+            )
+        self.is_warm = True
+        logger.info("新闻聚类索引预热完成", count=len(rows))
+        return len(rows)
+
+    def assign(
+        self, news_list: List[Dict[str, Any]], source_name: str
+    ) -> List[Dict[str, Any]]:
+        """
+        为新闻写入 cluster_id（原地修改）
+
+        Args:
+            news_list: 适配器输出的新闻列表，按顺序处理，批内也会相互聚类
+            source_name: 数据源名称
+
+        Returns:
+            List[Dict[str, Any]]: 传入的新闻列表
+        """
+        for news_data in news_list:
+            content_hash = news_item_hash(news_data, source_name)
+            signature = self.index.hasher.signature(
+                shingles(news_data["title"], news_data.get("content", ""))
+            )
+            cluster_id = self.index.match(signature, news_data["publishTime"])
+            if cluster_id:
+                self.counters["clustered"] += 1
+            else:
+                cluster_id = content_hash
+            news_data["cluster_id"] = cluster_id
+            self.index.add(
+                content_hash, signature, cluster_id, news_data["publishTime"]
+            )
+            self.counters["assigned"] += 1
+        return news_list
+
+    def stats(self) -> Dict[str, Any]:
+        """聚类统计：处理数、归入已有聚类的数量与索引大小"""
+        return {**self.counters, "indexed": len(self.index)}
+
+
+def cluster_representatives(news: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    每个聚类只保留第一条新闻
+
+    Args:
+        news: 新闻列表（可带 cluster_id，没有的视为独立聚类）
+
+    Returns:
+        List[Dict[str, Any]]: 去除近似重复后的新闻，保持原有顺序
+    """
+    seen: Set[str] = set()
+    result = []
+    for item in news:
+        cluster_id = item.get("cluster_id")
+        if cluster_id:
+            if cluster_id in seen:
+                continue
+            seen.add(cluster_id)
+        result.append(item)
+    return result
+
+
+@lru_cache
+def get_news_clusterer() -> Optional[NewsClusterer]:
+    """获取全局新闻聚类器，NEWS_CLUSTER_ENABLED 关闭时返回 None"""
+    if not settings.NEWS_CLUSTER_ENABLED:
+        return None
+    return NewsClusterer()
@@ -0,0 +1,153 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+
+import structlog
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.datasource.models.market import news_item_hash
+from app.datasource.repositories.datasource import DataSourceRepository
+
+logger = structlog.get_logger()
+
+
+class SeenSet:
+    """单个数据源的已见哈希集合：精确 LRU
+
+    在 LRU 中的条目确定已见，直接丢弃；不在 LRU 中的条目（新条目或已被淘汰）
+    交给数据库去重，因此不会误丢新条目。
+    """
+
+    def __init__(self, lru_size: int):
+        self.lru_size = lru_size
+        self._recent: "OrderedDict[str, None]" = OrderedDict()
+
+    def check(self, digest: str) -> bool:
+        """判断哈希是否已见（在 LRU 中）"""
+        if digest in self._recent:
+            self._recent.move_to_end(digest)
+            return True
+        return False
+
+    def add(self, digest: str) -> None:
+        if digest in self._recent:
+            self._recent.move_to_end(digest)
+            return
+        self._recent[digest] = None
+        while len(self._recent) > self.lru_size:
+            self._recent.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._recent)
+
+
+class NewsDeduplicator:
+    """新闻去重前置层
+
+    每个数据源维护一个 SeenSet，首次使用时从 news_data 加载近 N 天的哈希预热。
+    拉取到的新闻先经过这里过滤，已见过的条目不再进入数据库去重。
+    """
+
+    def __init__(
+        self,
+        lru_size: Optional[int] = None,
+        warmup_days: Optional[int] = None,
+    ):
+        """
+        初始化去重器，参数默认读取 NEWS_DEDUP_* 配置
+
+        Args:
+            lru_size: 每个数据源精确 LRU 的条目上限
+            warmup_days: 预热时加载的天数
+        """
+        self.lru_size = lru_size or settings.NEWS_DEDUP_LRU_SIZE
+        self.warmup_days = warmup_days or settings.NEWS_DEDUP_WARMUP_DAYS
+        self._sources: Dict[str, SeenSet] = {}
+        self.stats_by_source: Dict[str, Dict[str, int]] = {}
+
+    def _seen(self, source_name: str) -> SeenSet:
+        if source_name not in self._sources:
+            self._sources[source_name] = SeenSet(self.lru_size)
+            self.stats_by_source[source_name] = {"checked": 0, "dropped": 0, "new": 0}
+        return self._sources[source_name]
+
+    def is_warm(self, source_name: str) -> bool:
+        return source_name in self._sources
+
+    async def warmup(self, session: AsyncSession, source_name: str) -> int:
+        """
+        从数据库加载数据源近期新闻的哈希
+
+        Args:
+            session: 数据库会话
+            source_name: 数据源名称
+
+        Returns:
+            int: 加载的哈希数量
+        """
+        since = datetime.utcnow() - timedelta(days=self.warmup_days)
+        repository = DataSourceRepository(session)
+        hashes = await repository.get_recent_news_hashes(source_name, since)
+        seen = self._seen(source_name)
+        for digest in hashes:
+            seen.add(digest)
+        logger.info("新闻去重预热完成", source=source_name, count=len(hashes))
+        return len(hashes)
+
+    def filter(
+        self, source_name: str, news_list: List[Dict[str, Any]]
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        过滤已见过的新闻
+
+        Args:
+            source_name: 数据源名称
+            news_list: 适配器返回的新闻列表
+
+        Returns:
+            Tuple[List[Dict[str, Any]], int]: (需要入库的新闻, 丢弃的数量)
+        """
+        seen = self._seen(source_name)
+        stats = self.stats_by_source[source_name]
+        fresh = []
+        for news_data in news_list:
+            stats["checked"] += 1
+            if seen.check(news_item_hash(news_data, source_name)):
+                stats["dropped"] += 1
+                continue
+            stats["new"] += 1
+            fresh.append(news_data)
+        return fresh, len(news_list) - len(fresh)
+
+    def mark(self, source_name: str, news_list: List[Dict[str, Any]]) -> None:
+        """记录已入库（或确认重复）的新闻"""
+        seen = self._seen(source_name)
+        for news_data in news_list:
+            seen.add(news_item_hash(news_data, source_name))
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        去重统计
+
+        Returns:
+            Dict[str, Dict[str, Any]]: 数据源 -> checked/dropped/new/
+                hit_rate/lru_size
+        """
+        result = {}
+        for source_name, seen in self._sources.items():
+            stats = dict(self.stats_by_source[source_name])
+            checked = stats["checked"]
+            stats["hit_rate"] = stats["dropped"] / checked if checked else 0.0
+            stats["lru_size"] = len(seen)
+            result[source_name] = stats
+        return result
+
+
+@lru_cache
+def get_news_deduplicator() -> Optional[NewsDeduplicator]:
+    """获取全局新闻去重器，NEWS_DEDUP_ENABLED 关闭时返回 None"""
+    if not settings.NEWS_DEDUP_ENABLED:
+        return None
+    return NewsDeduplicator()
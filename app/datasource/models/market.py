@@ -1,10 +1,57 @@
+import hashlib
 from datetime import datetime
-from typing import Optional
+from typing import Any, Dict, Optional
 
-from sqlalchemy import DateTime, Float, Integer, String, Text, ForeignKey, Index
+from sqlalchemy import DDL, JSON, DateTime, Float, Integer, String, Text, ForeignKey, Index, UniqueConstraint, event
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.db import Base
+from app.core.types import KlineInterval
+
+
+def news_content_hash(
+    link: Optional[str], title: str, source: str, create_time: datetime
+) -> str:
+    """
+    计算新闻去重哈希
+
+    有链接时以链接为准，否则使用 来源 + 标题 + 发布时间
+
+    Returns:
+        str: SHA-256 十六进制字符串
+    """
+    if link:
+        key = f"link:{link}"
+    else:
+        key = f"title:{source}|{title}|{create_time.isoformat()}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+
+def news_item_hash(news_data: Dict[str, Any], source_name: str) -> str:
+    """
+    计算适配器输出的新闻条目的去重哈希
+
+    Args:
+        news_data: 新闻条目（BlockBeatsAdapter.fetch_news 的输出格式）
+        source_name: 数据源名称，条目未带 source 时使用
+
+    Returns:
+        str: 与入库后 content_hash 相同的哈希
+    """
+    return news_content_hash(
+        news_data.get("link") or "",
+        news_data["title"],
+        news_data.get("source") or source_name,
+        news_data["publishTime"],
+    )
+
+
+def _default_content_hash(context) -> str:
+    """直接构造 News 对象写入时补齐去重哈希"""
+    params = context.get_current_parameters()
+    return news_content_hash(
+        params.get("link"), params["title"], params["source"], params["create_time"]
+    )
 
 
 class News(Base):
@@ -26,6 +73,9 @@ class News(Base):
     sentiment: Mapped[Optional[str]] = mapped_column(String(20), nullable=True, comment="情感分析结果")
     status: Mapped[str] = mapped_column(String(20), default="pending", comment="处理状态")
     processed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True, comment="处理时间")
+    enrich_attempts: Mapped[int] = mapped_column(Integer, nullable=False, default=0, server_default="0", comment="摘要/情绪处理的尝试次数")
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False, default=_default_content_hash, comment="去重哈希")
+    cluster_id: Mapped[Optional[str]] = mapped_column(String(64), nullable=True, comment="近似重复聚类ID（代表条目的去重哈希）")
     
     # 系统字段
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, comment="记录创建时间")
@@ -36,9 +86,134 @@ class News(Base):
         Index("idx_news_create_time", "create_time"),
         Index("idx_news_source", "source"),
         Index("idx_news_status", "status"),
+        Index("uq_news_content_hash", "content_hash", unique=True),
+        Index("idx_news_cluster_id", "cluster_id"),
     )
 
 
+# 全文检索（title + content）
+# PostgreSQL：pg_trgm 三元组 GIN 索引 + ILIKE 子串匹配（tsvector 的 simple/english
+#   分词会把整段中文当作一个词，无法检索中文子串）
+# SQLite：FTS5 外部内容表（trigram 分词，支持中文子串），由触发器与 news_data 同步
+# 已有数据库由迁移 add_news_search/news_search_trgm 创建，这里负责 create_all 建表的场景
+# 查询中的表达式需与索引表达式完全一致，索引才会生效
+NEWS_SEARCH_TEXT = (
+    "(coalesce(news_data.title, '') || ' ' || coalesce(news_data.content, ''))"
+)
+NEWS_SEARCH_DDL = {
+    "postgresql": [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        "CREATE INDEX idx_news_search_trgm ON news_data "
+        f"USING GIN ({NEWS_SEARCH_TEXT} gin_trgm_ops)",
+    ],
+    "sqlite": [
+        "CREATE VIRTUAL TABLE news_fts USING fts5(title, content, "
+        "content='news_data', content_rowid='id', tokenize='trigram')",
+        "CREATE TRIGGER news_fts_ai AFTER INSERT ON news_data BEGIN "
+        "INSERT INTO news_fts(rowid, title, content) "
+        "VALUES (new.id, new.title, new.content); END",
+        "CREATE TRIGGER news_fts_ad AFTER DELETE ON news_data BEGIN "
+        "INSERT INTO news_fts(news_fts, rowid, title, content) "
+        "VALUES ('delete', old.id, old.title, old.content); END",
+        "CREATE TRIGGER news_fts_au AFTER UPDATE OF title, content ON news_data BEGIN "
+        "INSERT INTO news_fts(news_fts, rowid, title, content) "
+        "VALUES ('delete', old.id, old.title, old.content); "
+        "INSERT INTO news_fts(rowid, title, content) "
+        "VALUES (new.id, new.title, new.content); END",
+    ],
+}
+
+event.listen(
+    News.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS news_fts").execute_if(dialect="sqlite"),
+)
+for _dialect, _statements in NEWS_SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(
+            News.__table__,
+            "after_create",
+            DDL(_statement).execute_if(dialect=_dialect),
+        )
+
+
+class Kline(Base):
+    """K线数据模型"""
+
+    __tablename__ = "klines"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    symbol: Mapped[str] = mapped_column(String(20), nullable=False, comment="交易对")
+    timestamp: Mapped[datetime] = mapped_column(DateTime, nullable=False, comment="开盘时间(UTC)")
+    open: Mapped[float] = mapped_column(Float, nullable=False, comment="开盘价")
+    high: Mapped[float] = mapped_column(Float, nullable=False, comment="最高价")
+    low: Mapped[float] = mapped_column(Float, nullable=False, comment="最低价")
+    close: Mapped[float] = mapped_column(Float, nullable=False, comment="收盘价")
+    volume: Mapped[float] = mapped_column(Float, nullable=False, comment="成交量")
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, comment="记录创建时间")
+
+    # 同一交易对同一时间只保留一根K线，批量写入依赖该约束去重
+    __table_args__ = (
+        UniqueConstraint("symbol", "timestamp", name="uq_klines_symbol_timestamp"),
+    )
+
+
+class KlineRollupMixin:
+    """多周期聚合K线字段
+
+    由1分钟K线聚合而来，字段与 TimescaleDB 连续聚合视图的输出列一致
+    """
+
+    symbol: Mapped[str] = mapped_column(String(20), primary_key=True, comment="交易对")
+    timestamp: Mapped[datetime] = mapped_column(DateTime, primary_key=True, comment="周期开始时间(UTC)")
+    open: Mapped[float] = mapped_column(Float, nullable=False, comment="开盘价")
+    high: Mapped[float] = mapped_column(Float, nullable=False, comment="最高价")
+    low: Mapped[float] = mapped_column(Float, nullable=False, comment="最低价")
+    close: Mapped[float] = mapped_column(Float, nullable=False, comment="收盘价")
+    volume: Mapped[float] = mapped_column(Float, nullable=False, comment="成交量")
+
+
+class Kline5m(KlineRollupMixin, Base):
+    """5分钟K线"""
+
+    __tablename__ = "klines_5m"
+
+
+class Kline15m(KlineRollupMixin, Base):
+    """15分钟K线"""
+
+    __tablename__ = "klines_15m"
+
+
+class Kline1h(KlineRollupMixin, Base):
+    """1小时K线"""
+
+    __tablename__ = "klines_1h"
+
+
+class Kline4h(KlineRollupMixin, Base):
+    """4小时K线"""
+
+    __tablename__ = "klines_4h"
+
+
+class Kline1d(KlineRollupMixin, Base):
+    """日K线"""
+
+    __tablename__ = "klines_1d"
+
+
+# K线周期 -> 模型
+KLINE_MODELS = {
+    KlineInterval.M1: Kline,
+    KlineInterval.M5: Kline5m,
+    KlineInterval.M15: Kline15m,
+    KlineInterval.H1: Kline1h,
+    KlineInterval.H4: Kline4h,
+    KlineInterval.D1: Kline1d,
+}
+
+
 class MarketAnalysis(Base):
     """市场分析结果模型"""
 
@@ -53,4 +228,15 @@ class MarketAnalysis(Base):
     technical_sentiment: Mapped[str] = mapped_column(String(20))
     news_sentiment: Mapped[Optional[str]] = mapped_column(String(20), nullable=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
-    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow) 
\ No newline at end of file
+    updated_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow) 
+
+class LLMCacheEntry(Base):
+    """LLM 响应缓存模型（键为渲染后提示词与模型参数的哈希）"""
+
+    __tablename__ = "llm_cache"
+
+    key: Mapped[str] = mapped_column(String(64), primary_key=True, comment="提示词与模型参数的 SHA-256")
+    model: Mapped[str] = mapped_column(String(50), comment="模型名称")
+    response: Mapped[Dict[str, Any]] = mapped_column(JSON, comment="分析结果")
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, index=True, comment="过期时间")
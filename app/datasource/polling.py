@@ -0,0 +1,126 @@
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, Optional
+
+import structlog
+
+from app.core.config import settings
+
+logger = structlog.get_logger()
+
+
+class SourcePollState:
+    """单个数据源的轮询状态"""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.rate = 0.0            # 新条目到达速率（条/秒，指数平滑）
+        self.last_observed: Optional[float] = None
+        self.last_new = 0
+
+
+class AdaptivePoller:
+    """根据新条目到达速率自适应调整轮询间隔
+
+    每次拉取后用 save_news 实际写入的条数更新到达速率（指数平滑），
+    目标是每次轮询约取到 target_items 条新内容：间隔 = target_items / 速率。
+    突发时间隔可立即缩短；没有新内容时速率衰减，间隔按 backoff 倍数逐步放宽。
+    间隔始终限制在 [min_interval, max_interval] 内。
+    """
+
+    def __init__(
+        self,
+        min_interval: Optional[float] = None,
+        max_interval: Optional[float] = None,
+        target_items: Optional[float] = None,
+        backoff: Optional[float] = None,
+        smoothing: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        初始化轮询控制器，参数默认读取 NEWS_POLL_* 配置
+
+        Args:
+            min_interval: 最短轮询间隔（秒）
+            max_interval: 最长轮询间隔（秒）
+            target_items: 每次轮询期望取到的新条目数
+            backoff: 单次调整时间隔最多放大的倍数
+            smoothing: 到达速率的平滑系数（0-1，越大越灵敏）
+            clock: 时钟函数（秒）
+        """
+        self.min_interval = min_interval or settings.NEWS_POLL_MIN_INTERVAL
+        self.max_interval = max_interval or settings.NEWS_POLL_MAX_INTERVAL
+        self.target_items = target_items or settings.NEWS_POLL_TARGET_ITEMS
+        self.backoff = backoff or settings.NEWS_POLL_BACKOFF
+        self.smoothing = smoothing or settings.NEWS_POLL_SMOOTHING
+        self.clock = clock
+        self._sources: Dict[str, SourcePollState] = {}
+
+    def _clamp(self, interval: float) -> float:
+        return min(max(interval, self.min_interval), self.max_interval)
+
+    def interval(self, source_name: str, default: float) -> float:
+        """
+        当前轮询间隔
+
+        Args:
+            source_name: 数据源名称
+            default: 尚无观测时使用的间隔（通常为 DataSource.fetch_interval）
+
+        Returns:
+            float: 轮询间隔（秒）
+        """
+        state = self._sources.get(source_name)
+        return state.interval if state else self._clamp(default)
+
+    def observe(self, source_name: str, new_items: int, default: float) -> float:
+        """
+        记录一次拉取结果并计算下一次轮询间隔
+
+        Args:
+            source_name: 数据源名称
+            new_items: 本次新写入的条数
+            default: 首次观测时的初始间隔
+
+        Returns:
+            float: 下一次轮询间隔（秒）
+        """
+        now = self.clock()
+        state = self._sources.get(source_name)
+        if state is None:
+            state = self._sources[source_name] = SourcePollState(self._clamp(default))
+        elapsed = (
+            now - state.last_observed if state.last_observed is not None
+            else state.interval
+        )
+        state.last_observed = now
+        state.last_new = new_items
+
+        rate = new_items / max(elapsed, 1e-9)
+        state.rate = self.smoothing * rate + (1 - self.smoothing) * state.rate
+
+        target = self.target_items / state.rate if state.rate > 0 else self.max_interval
+        state.interval = self._clamp(min(target, state.interval * self.backoff))
+        return state.interval
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """
+        各数据源的轮询状态
+
+        Returns:
+            Dict[str, Dict[str, Any]]: 数据源 -> interval/rate_per_minute/last_new
+        """
+        return {
+            name: {
+                "interval": state.interval,
+                "rate_per_minute": state.rate * 60,
+                "last_new": state.last_new,
+            }
+            for name, state in self._sources.items()
+        }
+
+
+@lru_cache
+def get_news_poller() -> AdaptivePoller:
+    """获取全局新闻轮询控制器"""
+    return AdaptivePoller()
@@ -1,16 +1,32 @@
 from datetime import datetime
-from typing import Dict, List, Any, Optional
-from sqlalchemy import select, and_
+from typing import Dict, Iterable, List, Any, Optional, Tuple
+from sqlalchemy import (
+    and_, column, func, literal_column, or_, select, table, update
+)
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.datasource.models.datasource import DataSource
-from app.datasource.models.market import News
+from app.datasource.models.market import NEWS_SEARCH_TEXT, News, news_item_hash
 
 class DataSourceRepository:
     """数据源仓储层"""
+
+    # 单条 INSERT 的最大行数，避免超出数据库绑定参数上限
+    BATCH_SIZE = 500
+
     def __init__(self, session: AsyncSession):
         self.session = session
 
+    def _insert(self, model):
+        """根据数据库方言返回支持 ON CONFLICT 的 insert 构造器"""
+        dialect = self.session.bind.dialect.name
+        if dialect == "postgresql":
+            return postgresql.insert(model)
+        if dialect == "sqlite":
+            return sqlite.insert(model)
+        raise NotImplementedError(f"不支持的数据库: {dialect}")
+
     async def get_by_name(self, name: str) -> Optional[DataSource]:
         """根据名称获取数据源"""
         stmt = select(DataSource).where(
@@ -26,44 +42,291 @@ class DataSourceRepository:
         result = await self.session.execute(stmt)
         return result.scalars().all()
 
-    async def save_news(self, news_list: List[Dict[str, Any]], source_name: str) -> None:
-        """保存新闻数据"""
+    async def save_news(
+        self, news_list: Iterable[Dict[str, Any]], source_name: str
+    ) -> Tuple[int, int]:
+        """
+        批量保存新闻数据
+
+        去重规则：链接相同，或 来源 + 标题 + 发布时间 相同视为重复。
+        批内先按去重哈希合并；已入库的 标题 + 发布时间 组合用一次集合查询排除；
+        其余新闻用 INSERT ... ON CONFLICT (content_hash) DO NOTHING 批量写入。
+
+        Args:
+            news_list: 新闻列表或生成器（BlockBeatsAdapter.fetch_news 的输出格式），
+                只遍历一次
+            source_name: 数据源名称
+
+        Returns:
+            Tuple[int, int]: (新写入数量, 跳过的重复数量)
+        """
+        rows: Dict[str, Dict[str, Any]] = {}
+        total = 0
         for news_data in news_list:
-            # TODO: better check
-            # 检查是否已存在
-            # 1. 首先通过链接检查（最可靠）
-            if news_data.get("link"):
-                stmt = select(News).where(News.link == news_data["link"])
-                result = await self.session.execute(stmt)
-                if result.scalar_one_or_none():
-                    continue
-            
-            # 2. 如果链接不存在，则通过标题、来源和发布时间检查
-            stmt = select(News).where(
-                and_(
-                    News.title == news_data["title"],
-                    News.source == source_name,
-                    News.create_time == news_data["publishTime"]
-                )
+            total += 1
+            content_hash = news_item_hash(news_data, source_name)
+            rows.setdefault(content_hash, {
+                "title": news_data["title"],
+                "content": news_data.get("content", ""),
+                "link": news_data.get("link") or "",
+                "create_time": news_data["publishTime"],
+                "type": news_data.get("type", "push"),
+                "source": news_data.get("source") or source_name,
+                "status": news_data.get("status") or "pending",
+                "processed_at": news_data.get("processed_at"),
+                "content_hash": content_hash,
+                "cluster_id": news_data.get("cluster_id"),
+            })
+
+        pending = list(rows.values())
+        for start in range(0, len(pending), self.BATCH_SIZE):
+            batch = pending[start:start + self.BATCH_SIZE]
+            stmt = select(News.source, News.title, News.create_time).where(
+                News.source.in_(list({row["source"] for row in batch})),
+                News.title.in_(list({row["title"] for row in batch})),
+                News.create_time.in_(list({row["create_time"] for row in batch})),
+            )
+            existing = set((await self.session.execute(stmt)).all())
+            for row in batch:
+                if (row["source"], row["title"], row["create_time"]) in existing:
+                    rows.pop(row["content_hash"])
+
+        inserted = 0
+        pending = list(rows.values())
+        now = datetime.utcnow()
+        for start in range(0, len(pending), self.BATCH_SIZE):
+            batch = [
+                {**row, "created_at": now, "updated_at": now}
+                for row in pending[start:start + self.BATCH_SIZE]
+            ]
+            stmt = (
+                self._insert(News)
+                .values(batch)
+                .on_conflict_do_nothing(index_elements=["content_hash"])
             )
             result = await self.session.execute(stmt)
-            if result.scalar_one_or_none():
-                continue
-            
-            news = News(
-                title=news_data["title"],
-                content=news_data.get("content", ""),
-                link=news_data.get("link", ""),
-                create_time=news_data["publishTime"],
-                type=news_data.get("type", "push"),
-
-                source=news_data.get("source"),
-                status=news_data.get("status"),
-                processed_at=news_data.get("processed_at")
+            inserted += max(result.rowcount, 0)
+
+        await self.session.commit()
+        return inserted, total - inserted
+
+    async def get_recent_news_hashes(
+        self, source_name: str, since: datetime
+    ) -> List[str]:
+        """
+        获取数据源近期新闻的去重哈希
+
+        Args:
+            source_name: 数据源名称
+            since: 开始时间（按新闻发布时间）
+
+        Returns:
+            List[str]: 去重哈希，按发布时间升序
+        """
+        stmt = (
+            select(News.content_hash)
+            .where(News.source == source_name, News.create_time >= since)
+            .order_by(News.create_time)
+        )
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def get_recent_news_for_clustering(self, since: datetime) -> List[Any]:
+        """
+        获取近期新闻的聚类所需字段
+
+        Args:
+            since: 起始时间
+
+        Returns:
+            List[Any]: 按发布时间升序的 (content_hash, cluster_id, title, content,
+                create_time) 行
+        """
+        stmt = (
+            select(
+                News.content_hash,
+                News.cluster_id,
+                News.title,
+                News.content,
+                News.create_time,
             )
-            self.session.add(news)
+            .where(News.create_time >= since)
+            .order_by(News.create_time)
+        )
+        result = await self.session.execute(stmt)
+        return list(result.all())
+
+    async def get_recent_news(self, since: datetime, limit: int) -> List[News]:
+        """
+        获取近期新闻
+
+        Args:
+            since: 起始时间（按发布时间）
+            limit: 数量上限
+
+        Returns:
+            List[News]: 新闻，新的在前
+        """
+        stmt = (
+            select(News)
+            .where(News.create_time >= since)
+            .order_by(News.create_time.desc())
+            .limit(limit)
+        )
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def claim_pending_news(
+        self, limit: int, stale_before: datetime
+    ) -> List[News]:
+        """
+        认领待处理的新闻（pending -> processing）
 
+        超过 stale_before 仍处于 processing 的新闻视为上次处理中断，重新认领。
+        PostgreSQL 下使用 FOR UPDATE SKIP LOCKED，多个工作进程不会认领同一条新闻。
+
+        Args:
+            limit: 认领数量上限
+            stale_before: processing 状态的超时时间点
+
+        Returns:
+            List[News]: 已认领的新闻，新的在前
+        """
+        stmt = (
+            select(News)
+            .where(
+                or_(
+                    News.status == "pending",
+                    and_(News.status == "processing", News.updated_at < stale_before),
+                )
+            )
+            .order_by(News.create_time.desc())
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        result = await self.session.execute(stmt)
+        news = list(result.scalars().all())
+        if news:
+            await self.session.execute(
+                update(News)
+                .where(News.id.in_([item.id for item in news]))
+                .values(status="processing", updated_at=datetime.utcnow())
+            )
         await self.session.commit()
+        return news
+
+    async def save_news_enrichment(self, results: List[Dict[str, Any]]) -> int:
+        """
+        批量写回新闻处理结果（按主键批量 UPDATE）
+
+        Args:
+            results: 每条包含 id/summary/sentiment/status/processed_at/
+                enrich_attempts，所有条目的字段需一致
+
+        Returns:
+            int: 更新的条数
+        """
+        if not results:
+            return 0
+        now = datetime.utcnow()
+        await self.session.execute(
+            update(News), [{**row, "updated_at": now} for row in results]
+        )
+        await self.session.commit()
+        return len(results)
+
+    async def count_news_by_status(self) -> Dict[str, int]:
+        """
+        按处理状态统计新闻数量
+
+        Returns:
+            Dict[str, int]: 状态 -> 数量
+        """
+        result = await self.session.execute(
+            select(News.status, func.count()).group_by(News.status)
+        )
+        return {status: count for status, count in result.all()}
+
+    def _search_match(self, query: str):
+        """
+        构造全文检索的 FROM 子句、匹配条件与相关度表达式（越大越相关）
+
+        Returns:
+            Tuple: (FROM 子句, 匹配条件, 相关度表达式)
+        """
+        news = News.__table__
+        dialect = self.session.bind.dialect.name
+        if dialect == "postgresql":
+            # 每个词做子串匹配（词之间为 AND），由 pg_trgm 索引加速；
+            # 不足3个字符的词无法使用三元组索引，但结果仍然正确
+            text = literal_column(NEWS_SEARCH_TEXT)
+            match = and_(*(
+                text.ilike(
+                    "%" + term.replace("\\", "\\\\").replace("%", "\\%")
+                    .replace("_", "\\_") + "%",
+                    escape="\\",
+                )
+                for term in query.split()
+            ))
+            return news, match, func.word_similarity(query, text)
+        if dialect == "sqlite":
+            # 每个词作为短语匹配（词之间为 AND），避免输入被解析为 FTS5 语法
+            terms = " ".join(
+                '"' + term.replace('"', '""') + '"' for term in query.split()
+            )
+            fts = table("news_fts", column("rowid"))
+            match = literal_column("news_fts").op("MATCH")(terms)
+            rank = -func.bm25(literal_column("news_fts"))
+            return news.join(fts, fts.c.rowid == News.id), match, rank
+        raise NotImplementedError(f"不支持的数据库: {dialect}")
+
+    async def search_news(
+        self,
+        query: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+        limit: int = 20,
+        order: str = "rank",
+        after: Optional[Tuple[Any, int]] = None,
+    ) -> List[Tuple[News, float]]:
+        """
+        全文检索新闻标题与正文
+
+        Args:
+            query: 检索词，空格分隔的多个词需同时匹配
+            start: 发布时间下限（含）
+            end: 发布时间上限（不含）
+            limit: 返回数量
+            order: rank 按相关度降序，time 按发布时间降序
+            after: 上一页最后一条的 (排序值, id)，用于键集分页
+
+        Returns:
+            List[Tuple[News, float]]: (新闻, 相关度)
+        """
+        from_clause, match, rank = self._search_match(query)
+        conditions = [match]
+        if start:
+            conditions.append(News.create_time >= start)
+        if end:
+            conditions.append(News.create_time < end)
+
+        matched = (
+            select(News.id, News.create_time, rank.label("rank"))
+            .select_from(from_clause)
+            .where(*conditions)
+            .subquery()
+        )
+
+        key = matched.c.rank if order == "rank" else matched.c.create_time
+        stmt = select(News, matched.c.rank).join(matched, matched.c.id == News.id)
+        if after is not None:
+            value, last_id = after
+            stmt = stmt.where(
+                or_(key < value, and_(key == value, matched.c.id < last_id))
+            )
+        stmt = stmt.order_by(key.desc(), matched.c.id.desc()).limit(limit)
+        result = await self.session.execute(stmt)
+        return [(news, rank) for news, rank in result.all()]
 
     async def update_source_status(self, source_name: str) -> None:
         """更新数据源状态"""
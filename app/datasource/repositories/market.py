@@ -0,0 +1,341 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.datasource.models.market import Kline, LLMCacheEntry, MarketAnalysis
+
+BAR_COLUMNS = ("symbol", "timestamp", "open", "high", "low", "close", "volume")
+
+
+class MarketRepository:
+    """行情数据仓储层"""
+
+    # 单条 INSERT 的最大行数，避免超出数据库绑定参数上限
+    BATCH_SIZE = 1000
+
+    def __init__(self, session: AsyncSession):
+        self.session = session
+
+    def _insert(self, model):
+        """根据数据库方言返回支持 ON CONFLICT 的 insert 构造器"""
+        dialect = self.session.bind.dialect.name
+        if dialect == "postgresql":
+            return postgresql.insert(model)
+        if dialect == "sqlite":
+            return sqlite.insert(model)
+        raise NotImplementedError(f"不支持的数据库: {dialect}")
+
+    async def upsert_klines(self, klines: List[Dict[str, Any]]) -> int:
+        """
+        批量写入K线，已存在的 (symbol, timestamp) 直接跳过
+
+        Args:
+            klines: K线字典列表（symbol/timestamp/open/high/low/close/volume）
+
+        Returns:
+            int: 实际插入的行数
+        """
+        inserted = 0
+        for start in range(0, len(klines), self.BATCH_SIZE):
+            batch = klines[start:start + self.BATCH_SIZE]
+            stmt = (
+                self._insert(Kline)
+                .values(batch)
+                .on_conflict_do_nothing(index_elements=["symbol", "timestamp"])
+            )
+            result = await self.session.execute(stmt)
+            inserted += max(result.rowcount, 0)
+
+        await self.session.commit()
+        return inserted
+
+    async def get_latest_timestamps(
+        self, symbols: Sequence[str], model=Kline
+    ) -> Dict[str, datetime]:
+        """
+        获取各交易对最新一根K线的时间
+
+        Args:
+            symbols: 交易对列表
+            model: K线模型，默认1分钟K线
+
+        Returns:
+            Dict[str, datetime]: 交易对 -> 最新K线时间（无数据的交易对不在结果中）
+        """
+        stmt = (
+            select(model.symbol, func.max(model.timestamp))
+            .where(model.symbol.in_(symbols))
+            .group_by(model.symbol)
+        )
+        result = await self.session.execute(stmt)
+        return {symbol: timestamp for symbol, timestamp in result.all()}
+
+    async def get_window_stats(
+        self, symbols: Sequence[str], start: datetime, model=Kline
+    ) -> Dict[str, Tuple[int, datetime, datetime]]:
+        """
+        统计各交易对 start 之后的K线数量与首尾时间
+
+        Args:
+            symbols: 交易对列表
+            start: 开始时间（包含）
+            model: K线模型，默认1分钟K线
+
+        Returns:
+            Dict[str, Tuple[int, datetime, datetime]]: 交易对 -> (数量, 最早时间, 最新时间)
+        """
+        stmt = (
+            select(
+                model.symbol,
+                func.count(),
+                func.min(model.timestamp),
+                func.max(model.timestamp),
+            )
+            .where(model.symbol.in_(symbols), model.timestamp >= start)
+            .group_by(model.symbol)
+        )
+        result = await self.session.execute(stmt)
+        return {row[0]: tuple(row[1:]) for row in result.all()}
+
+    async def get_timestamps(
+        self, symbol: str, start: datetime, model=Kline
+    ) -> List[datetime]:
+        """
+        获取单个交易对 start 之后的全部K线时间，按时间升序
+
+        Args:
+            symbol: 交易对
+            start: 开始时间（包含）
+            model: K线模型，默认1分钟K线
+
+        Returns:
+            List[datetime]: K线时间列表
+        """
+        stmt = (
+            select(model.timestamp)
+            .where(model.symbol == symbol, model.timestamp >= start)
+            .order_by(model.timestamp)
+        )
+        result = await self.session.execute(stmt)
+        return list(result.scalars().all())
+
+    async def get_bars(
+        self,
+        model,
+        symbols: Sequence[str],
+        start: datetime,
+        end: Optional[datetime] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        按时间范围获取K线，按交易对和时间升序
+
+        Args:
+            model: K线模型（Kline 或聚合K线模型）
+            symbols: 交易对列表
+            start: 开始时间（包含）
+            end: 结束时间（不包含）
+
+        Returns:
+            List[Dict[str, Any]]: K线字典列表
+        """
+        columns = [getattr(model, name) for name in BAR_COLUMNS]
+        stmt = select(*columns).where(
+            model.symbol.in_(symbols),
+            model.timestamp >= start,
+        )
+        if end is not None:
+            stmt = stmt.where(model.timestamp < end)
+        stmt = stmt.order_by(model.symbol, model.timestamp)
+        result = await self.session.execute(stmt)
+        return [dict(row._mapping) for row in result.all()]
+
+    async def get_bars_page(
+        self,
+        model,
+        symbol: str,
+        after: Optional[datetime] = None,
+        limit: int = BATCH_SIZE,
+    ) -> List[Dict[str, Any]]:
+        """
+        按时间游标分页获取单个交易对的K线，按时间升序
+
+        Args:
+            model: K线模型（Kline 或聚合K线模型）
+            symbol: 交易对
+            after: 游标时间（不包含），为空则从头开始
+            limit: 每页行数
+
+        Returns:
+            List[Dict[str, Any]]: K线字典列表
+        """
+        columns = [getattr(model, name) for name in BAR_COLUMNS]
+        stmt = select(*columns).where(model.symbol == symbol)
+        if after is not None:
+            stmt = stmt.where(model.timestamp > after)
+        stmt = stmt.order_by(model.timestamp).limit(limit)
+        result = await self.session.execute(stmt)
+        return [dict(row._mapping) for row in result.all()]
+
+    async def get_latest_bar(
+        self, model, symbol: str
+    ) -> Optional[Dict[str, Any]]:
+        """
+        获取单个交易对最新一根K线
+
+        Args:
+            model: K线模型
+            symbol: 交易对
+
+        Returns:
+            Optional[Dict[str, Any]]: K线字典，无数据时返回 None
+        """
+        columns = [getattr(model, name) for name in BAR_COLUMNS]
+        stmt = (
+            select(*columns)
+            .where(model.symbol == symbol)
+            .order_by(model.timestamp.desc())
+            .limit(1)
+        )
+        row = (await self.session.execute(stmt)).first()
+        return dict(row._mapping) if row else None
+
+    async def get_recent_bars(
+        self, model, symbol: str, limit: int
+    ) -> List[Dict[str, Any]]:
+        """
+        获取单个交易对最近的K线，按时间升序
+
+        Args:
+            model: K线模型
+            symbol: 交易对
+            limit: K线数量
+
+        Returns:
+            List[Dict[str, Any]]: K线字典列表
+        """
+        columns = [getattr(model, name) for name in BAR_COLUMNS]
+        stmt = (
+            select(*columns)
+            .where(model.symbol == symbol)
+            .order_by(model.timestamp.desc())
+            .limit(limit)
+        )
+        result = await self.session.execute(stmt)
+        return [dict(row._mapping) for row in reversed(result.all())]
+
+    async def get_symbols(self, model) -> List[str]:
+        """
+        获取有K线数据的交易对
+
+        Args:
+            model: K线模型
+
+        Returns:
+            List[str]: 交易对列表
+        """
+        result = await self.session.execute(
+            select(model.symbol).distinct().order_by(model.symbol)
+        )
+        return list(result.scalars().all())
+
+    async def upsert_bars(self, model, bars: List[Dict[str, Any]]) -> int:
+        """
+        批量写入聚合K线，已存在的周期用最新聚合值覆盖
+
+        Args:
+            model: 聚合K线模型
+            bars: K线字典列表
+
+        Returns:
+            int: 写入的行数
+        """
+        written = 0
+        for start in range(0, len(bars), self.BATCH_SIZE):
+            stmt = self._insert(model).values(bars[start:start + self.BATCH_SIZE])
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["symbol", "timestamp"],
+                set_={
+                    name: stmt.excluded[name]
+                    for name in ("open", "high", "low", "close", "volume")
+                },
+            )
+            result = await self.session.execute(stmt)
+            written += max(result.rowcount, 0)
+
+        await self.session.commit()
+        return written
+
+    async def save_analyses(self, analyses: List[Dict[str, Any]]) -> int:
+        """
+        批量保存市场分析结果
+
+        Args:
+            analyses: MarketAnalysis 字段字典列表
+
+        Returns:
+            int: 保存的条数
+        """
+        self.session.add_all([MarketAnalysis(**row) for row in analyses])
+        await self.session.commit()
+        return len(analyses)
+
+    async def get_llm_cache(
+        self, key: str, now: datetime
+    ) -> Optional[LLMCacheEntry]:
+        """
+        读取未过期的 LLM 响应缓存
+
+        Args:
+            key: 缓存键
+            now: 当前时间（UTC）
+
+        Returns:
+            Optional[LLMCacheEntry]: 缓存条目，不存在或已过期时返回 None
+        """
+        result = await self.session.execute(
+            select(LLMCacheEntry).where(
+                LLMCacheEntry.key == key, LLMCacheEntry.expires_at > now
+            )
+        )
+        return result.scalar_one_or_none()
+
+    async def save_llm_cache(
+        self,
+        key: str,
+        model: str,
+        response: Dict[str, Any],
+        now: datetime,
+        expires_at: datetime,
+    ) -> None:
+        """
+        写入 LLM 响应缓存（同一键覆盖旧值），并清理已过期的条目
+
+        Args:
+            key: 缓存键
+            model: 模型名称
+            response: 分析结果
+            now: 当前时间（UTC）
+            expires_at: 过期时间（UTC）
+        """
+        stmt = self._insert(LLMCacheEntry).values(
+            key=key,
+            model=model,
+            response=response,
+            created_at=now,
+            expires_at=expires_at,
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["key"],
+            set_={
+                name: stmt.excluded[name]
+                for name in ("model", "response", "created_at", "expires_at")
+            },
+        )
+        await self.session.execute(stmt)
+        await self.session.execute(
+            delete(LLMCacheEntry).where(LLMCacheEntry.expires_at <= now)
+        )
+        await self.session.commit()
@@ -4,17 +4,26 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.datasource.models.datasource import DataSource
 from app.datasource.repositories.datasource import DataSourceRepository
-from app.datasource.adapters.base import BaseAdapter
+from app.datasource.adapters.base import BaseAdapter, RUNTIME_CONFIG_KEYS
 from app.datasource.adapters.blockbeats import BlockBeatsAdapter
+from app.datasource.clustering import NewsClusterer, get_news_clusterer
+from app.datasource.dedup import NewsDeduplicator, get_news_deduplicator
 from app.core.types import DataSourceType, DataSourceProtocol
 
 logger = structlog.get_logger()
 
 class DataSourceService:
     """数据源服务层"""
-    def __init__(self, session: AsyncSession):
+    def __init__(
+        self,
+        session: AsyncSession,
+        deduplicator: Optional[NewsDeduplicator] = None,
+        clusterer: Optional[NewsClusterer] = None
+    ):
         self.session = session
         self.repository = DataSourceRepository(session)
+        self.deduplicator = deduplicator or get_news_deduplicator()
+        self.clusterer = clusterer or get_news_clusterer()
         self._adapters: Dict[str, DataSourceProtocol] = {}
         # TODO: 从配置文件中读取默认数据源
         self._default_sources = {
@@ -52,7 +61,12 @@ class DataSourceService:
             existing.api_url = api_url
             existing.api_key = api_key
             existing.api_secret = api_secret
-            existing.config = config or {}
+            # 保留运行时写入的水位线与响应校验信息
+            runtime = {
+                key: value for key, value in (existing.config or {}).items()
+                if key in RUNTIME_CONFIG_KEYS
+            }
+            existing.config = {**runtime, **(config or {})}
             existing.fetch_interval = fetch_interval
             existing.is_active = is_active
             await self.session.commit()
@@ -108,23 +122,66 @@ class DataSourceService:
         finally:
             await adapter.close()
 
-    async def fetch_and_save_news(self, source_name: str, **kwargs) -> None:
-        """获取并保存新闻数据"""
+    async def fetch_and_save_news(self, source_name: str, **kwargs) -> int:
+        """获取并保存新闻数据
+
+        未指定分页参数时按水位线增量获取，入库成功后推进水位线；
+        数据源响应未变化时本次拉取直接结束
+
+        Returns:
+            int: 新写入的新闻数量
+        """
         try:
             # 获取数据
-            news_list = await self.fetch_news(source_name, **kwargs)
+            adapter = None
+            if kwargs:
+                news_list = await self.fetch_news(source_name, **kwargs)
+            else:
+                adapter = await self.get_adapter(source_name)
+                if not adapter:
+                    raise ValueError(f"数据源不存在或未激活: {source_name}")
+                try:
+                    news_list = await adapter.fetch_incremental()
+                finally:
+                    await adapter.close()
+
+                # 数据未变化：跳过解析、去重与写库，只记录本次拉取
+                if adapter.unchanged:
+                    await self.repository.update_source_status(source_name)
+                    logger.info("新闻数据未变化", source=source_name)
+                    return 0
             
-            # 保存数据
-            await self.repository.save_news(news_list, source_name)
+            # 内存去重：已见过的新闻不再进入数据库
+            dropped = 0
+            if self.deduplicator:
+                if not self.deduplicator.is_warm(source_name):
+                    await self.deduplicator.warmup(self.session, source_name)
+                news_list, dropped = self.deduplicator.filter(source_name, news_list)
+
+            # 保存数据（近似重复的新闻归入同一聚类）
+            inserted, skipped = 0, 0
+            if news_list and self.clusterer:
+                if not self.clusterer.is_warm:
+                    await self.clusterer.warmup(self.session)
+                self.clusterer.assign(news_list, source_name)
+            if news_list:
+                inserted, skipped = await self.repository.save_news(news_list, source_name)
+                if self.deduplicator:
+                    self.deduplicator.mark(source_name, news_list)
             
-            # 更新状态
+            # 更新状态（与水位线、响应校验信息一同提交）
+            if adapter:
+                adapter.commit()
             await self.repository.update_source_status(source_name)
             
             logger.info(
                 "成功获取并保存新闻数据",
                 source=source_name,
-                count=len(news_list)
+                count=len(news_list) + dropped,
+                inserted=inserted,
+                skipped=skipped + dropped
             )
+            return inserted
         except Exception as e:
             logger.error(
                 "获取新闻数据失败",
@@ -0,0 +1,99 @@
+from datetime import timedelta
+from typing import Any, Dict, Optional, Union
+
+import pandas as pd
+import structlog
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.indicator_cache import (
+    IndicatorCache,
+    compute_snapshot,
+    get_indicator_cache,
+)
+from app.core.kline_store import KlineStore, get_kline_store
+from app.core.types import KlineInterval
+from app.datasource.models.market import KLINE_MODELS
+from app.datasource.repositories.market import MarketRepository
+
+logger = structlog.get_logger()
+
+
+class MarketService:
+    """行情服务层"""
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        store: Optional[KlineStore] = None,
+        cache: Optional[IndicatorCache] = None,
+    ):
+        self.session = session
+        self.repository = MarketRepository(session)
+        self.store = store if store is not None else get_kline_store()
+        self.cache = cache if cache is not None else get_indicator_cache()
+
+    async def get_indicator_snapshot(
+        self,
+        symbol: str,
+        interval: Union[str, KlineInterval] = KlineInterval.M1,
+        lookback: Optional[int] = None,
+    ) -> Optional[Dict[str, Any]]:
+        """
+        获取交易对最新一根K线的技术指标
+
+        先只查询最新一根K线，缓存命中时不读取更多K线、不重新计算。
+        缓存键包含最新K线的收盘价与成交量，聚合周期未完成的K线更新后重新计算。
+        列式缓存的最新K线与数据库一致时从缓存读取K线计算。
+
+        Args:
+            symbol: 交易对
+            interval: K线周期
+            lookback: 计算指标时读取的K线数量，默认 INDICATOR_LOOKBACK
+
+        Returns:
+            Optional[Dict[str, Any]]: 指标快照，无K线数据时返回 None
+        """
+        interval = KlineInterval(interval)
+        lookback = lookback or settings.INDICATOR_LOOKBACK
+        model = KLINE_MODELS[interval]
+
+        bar = await self.repository.get_latest_bar(model, symbol)
+        if bar is None:
+            return None
+        last_timestamp = bar["timestamp"]
+        revision = (float(bar["close"]), float(bar["volume"]))
+
+        # 缓存需包含最近 lookback 根K线，且最新K线与数据库一致才能替代数据库
+        # （只有部分历史，或写入失败待重试而落后于数据库时回退）
+        use_store = (
+            self.store is not None
+            and self.store.last_timestamp(symbol, interval) == last_timestamp
+            and self.store.covers(
+                symbol,
+                interval,
+                last_timestamp - timedelta(seconds=interval.seconds * (lookback - 1)),
+            )
+        )
+        if use_store:
+            last = self.store.tail(symbol, interval, 1)
+            use_store = (float(last["close"][0]), float(last["volume"][0])) == revision
+
+        key = self.cache.make_key(symbol, interval, last_timestamp, revision=revision)
+        snapshot = self.cache.get(key)
+        if snapshot is not None:
+            return snapshot
+
+        if use_store:
+            columns = self.store.tail(symbol, interval, lookback)
+            df = pd.DataFrame(
+                {name: columns[name] for name in columns if name != "timestamp"},
+                index=pd.to_datetime(columns["timestamp"], unit="ms"),
+            )
+        else:
+            bars = await self.repository.get_recent_bars(model, symbol, lookback)
+            df = pd.DataFrame(bars).drop(columns="symbol").set_index("timestamp")
+        snapshot = compute_snapshot(df)
+        self.cache.put(key, snapshot)
+        logger.debug("指标缓存未命中", symbol=symbol, interval=interval.value)
+        return snapshot
@@ -0,0 +1,180 @@
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Protocol, Sequence, Tuple
+
+import structlog
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.db import async_session_factory
+from app.datasource.models.market import Kline, News
+from app.datasource.repositories.datasource import DataSourceRepository
+from app.datasource.repositories.market import MarketRepository
+from app.datasource.services.market import MarketService
+
+logger = structlog.get_logger()
+
+# 提示词中的行情段落覆盖最近60根1分钟K线
+MARKET_WINDOW = 60
+
+AnalysisInputs = Tuple[Dict[str, Any], Dict[str, Any], List[Dict[str, Any]]]
+
+
+class MarketAnalyzer(Protocol):
+    """多交易对分析接口（LLMAnalyzer.analyze_many）"""
+
+    async def analyze_many(
+        self, inputs: Dict[str, AnalysisInputs]
+    ) -> Dict[str, Dict[str, Any]]:
+        ...
+
+
+def summarize_bars(bars: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """把按时间升序的K线合并为一根（开/高/低/收/量）"""
+    return {
+        "open": bars[0]["open"],
+        "high": max(bar["high"] for bar in bars),
+        "low": min(bar["low"] for bar in bars),
+        "close": bars[-1]["close"],
+        "volume": sum(bar["volume"] for bar in bars),
+    }
+
+
+def news_sentiment(news: Sequence[News]) -> Optional[str]:
+    """已处理新闻中出现最多的情绪，没有已处理新闻时返回 None"""
+    counts = Counter(item.sentiment for item in news if item.sentiment)
+    return counts.most_common(1)[0][0] if counts else None
+
+
+class MarketAnalysisJob:
+    """定期对多个交易对做 LLM 市场分析
+
+    每轮为 LLM_ANALYSIS_SYMBOLS 中的交易对准备行情、技术指标与近期新闻，
+    交给 analyze_many 并发分析（受 RPM/TPM 限流约束），结果批量写入
+    market_analysis。缺少K线数据的交易对跳过。
+    """
+
+    def __init__(
+        self,
+        analyzer: Optional[MarketAnalyzer] = None,
+        session_factory: Optional[sessionmaker] = None,
+        symbols: Optional[Sequence[str]] = None,
+        news_hours: Optional[float] = None,
+        news_limit: Optional[int] = None,
+    ):
+        """
+        初始化分析任务，参数默认读取 LLM_ANALYSIS_* 配置
+
+        Args:
+            analyzer: 分析器，默认首次使用时创建 LLMAnalyzer
+            session_factory: 数据库会话工厂，默认使用全局 async_session_factory
+            symbols: 交易对列表
+            news_hours: 参考近 N 小时的新闻
+            news_limit: 读取的新闻条数上限
+        """
+        self._analyzer = analyzer
+        self.session_factory = session_factory or async_session_factory
+        self.symbols = list(symbols or settings.LLM_ANALYSIS_SYMBOLS)
+        self.news_window = timedelta(
+            hours=news_hours or settings.LLM_ANALYSIS_NEWS_HOURS
+        )
+        self.news_limit = news_limit or settings.LLM_ANALYSIS_NEWS_LIMIT
+
+    @property
+    def analyzer(self) -> MarketAnalyzer:
+        if self._analyzer is None:
+            # 延迟导入：只有真正调用模型时才需要 LLM 相关依赖
+            from app.core.llm import LLMAnalyzer
+
+            self._analyzer = LLMAnalyzer()
+        return self._analyzer
+
+    async def collect_inputs(
+        self, session: AsyncSession
+    ) -> Tuple[Dict[str, AnalysisInputs], Dict[str, Dict[str, Any]]]:
+        """
+        准备各交易对的分析输入
+
+        Args:
+            session: 数据库会话
+
+        Returns:
+            Tuple[Dict[str, AnalysisInputs], Dict[str, Dict[str, Any]]]:
+                (交易对 -> (行情, 指标, 新闻), 交易对 -> 持久化所需的附加字段)
+        """
+        news = await DataSourceRepository(session).get_recent_news(
+            datetime.utcnow() - self.news_window, self.news_limit
+        )
+        news_data = [
+            {
+                "title": item.title,
+                "summary": item.summary,
+                "published_at": item.create_time,
+                "cluster_id": item.cluster_id or item.content_hash,
+            }
+            for item in news
+        ]
+        sentiment = news_sentiment(news)
+
+        market = MarketService(session)
+        repository = MarketRepository(session)
+        inputs: Dict[str, AnalysisInputs] = {}
+        extras: Dict[str, Dict[str, Any]] = {}
+        for symbol in self.symbols:
+            snapshot = await market.get_indicator_snapshot(symbol)
+            bars = await repository.get_recent_bars(Kline, symbol, MARKET_WINDOW)
+            if snapshot is None or not bars:
+                logger.warning("缺少K线数据，跳过分析", symbol=symbol)
+                continue
+            inputs[symbol] = (summarize_bars(bars), snapshot, news_data)
+            extras[symbol] = {
+                "timestamp": snapshot["timestamp"],
+                "technical_sentiment": snapshot["sentiment"],
+                "news_sentiment": sentiment,
+            }
+        return inputs, extras
+
+    async def run_once(self) -> int:
+        """
+        分析一轮并保存结果
+
+        Returns:
+            int: 保存的分析结果数
+        """
+        started = time.monotonic()
+        async with self.session_factory() as session:
+            inputs, extras = await self.collect_inputs(session)
+        if not inputs:
+            return 0
+
+        results = await self.analyzer.analyze_many(inputs)
+        rows = [
+            {
+                "symbol": symbol,
+                "analysis": result["analysis"],
+                "sentiment": result["sentiment"],
+                "confidence": result["confidence"],
+                **extras[symbol],
+            }
+            for symbol, result in results.items()
+        ]
+        async with self.session_factory() as session:
+            await MarketRepository(session).save_analyses(rows)
+
+        elapsed = time.monotonic() - started
+        logger.info(
+            "市场分析完成",
+            symbols=len(inputs),
+            saved=len(rows),
+            failed=len(inputs) - len(rows),
+            elapsed=round(elapsed, 1),
+        )
+        if elapsed > settings.LLM_ANALYSIS_INTERVAL:
+            logger.warning(
+                "市场分析耗时超过调度间隔",
+                elapsed=round(elapsed, 1),
+                interval=settings.LLM_ANALYSIS_INTERVAL,
+            )
+        return len(rows)
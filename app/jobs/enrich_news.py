@@ -0,0 +1,322 @@
+import asyncio
+import json
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Protocol, Sequence, Tuple
+
+import structlog
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.core.db import async_session_factory
+from app.core.tokens import estimate_tokens
+from app.datasource.models.market import News
+from app.datasource.repositories.datasource import DataSourceRepository
+
+logger = structlog.get_logger()
+
+SENTIMENTS = ("看涨", "看跌", "中性")
+
+ENRICH_SYSTEM_PROMPT = """你是一位加密货币新闻分析助手。
+下面每条新闻以 [编号] 开头。请为每条新闻写一句不超过60字的中文摘要，并判断其对市场的情绪（看涨/看跌/中性）。
+只输出 JSON 数组，不要输出其他内容，每个元素形如：
+{"id": 编号, "summary": "摘要", "sentiment": "看涨"}"""
+
+# 每条新闻在回复中大约占用的 token 数，用于限制单次请求的输出长度
+RESPONSE_TOKENS_PER_ITEM = 80
+
+
+class CompletionClient(Protocol):
+    """LLM 单轮对话接口（LLMAnalyzer.complete）"""
+
+    async def complete(
+        self, system: str, prompt: str
+    ) -> Tuple[str, Dict[str, int]]:
+        ...
+
+
+def render_news_item(news: News, content_chars: int) -> str:
+    """渲染单条新闻，正文按字符数截断"""
+    content = " ".join(news.content.split())[:content_chars]
+    return f"[{news.id}] {news.title}\n{content}"
+
+
+def pack_batches(
+    items: Sequence[Tuple[News, str]],
+    token_budget: int,
+    max_items: int,
+) -> List[List[Tuple[News, str]]]:
+    """
+    按 token 预算把新闻打包为多个请求
+
+    按顺序贪心装箱：加入下一条会超出预算或条数上限时开始新的请求。
+    单条即超出预算的新闻独占一个请求。
+
+    Args:
+        items: (新闻, 渲染文本) 列表
+        token_budget: 单次请求的提示词 token 上限（含系统提示）
+        max_items: 单次请求的新闻条数上限
+
+    Returns:
+        List[List[Tuple[News, str]]]: 每个请求包含的新闻
+    """
+    budget = token_budget - estimate_tokens(ENRICH_SYSTEM_PROMPT)
+    batches: List[List[Tuple[News, str]]] = []
+    current: List[Tuple[News, str]] = []
+    used = 0
+    for item in items:
+        tokens = estimate_tokens(item[1]) + 1
+        if current and (used + tokens > budget or len(current) >= max_items):
+            batches.append(current)
+            current, used = [], 0
+        current.append(item)
+        used += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def parse_enrichment(text: str, ids: Sequence[int]) -> Dict[int, Dict[str, Any]]:
+    """
+    解析模型回复
+
+    Args:
+        text: 模型回复，应包含 JSON 数组（允许前后有多余文字或代码块标记）
+        ids: 本次请求的新闻 ID，不在其中的条目会被忽略
+
+    Returns:
+        Dict[int, Dict[str, Any]]: 新闻 ID -> {summary, sentiment}，
+            无法识别的情绪记为中性
+    """
+    start, end = text.find("["), text.rfind("]")
+    if start < 0 or end <= start:
+        return {}
+    try:
+        rows = json.loads(text[start:end + 1])
+    except ValueError:
+        return {}
+
+    wanted = set(ids)
+    results: Dict[int, Dict[str, Any]] = {}
+    for row in rows:
+        if not isinstance(row, dict):
+            continue
+        try:
+            news_id = int(row.get("id"))
+        except (TypeError, ValueError):
+            continue
+        summary = str(row.get("summary") or "").strip()
+        if news_id not in wanted or not summary:
+            continue
+        sentiment = row.get("sentiment")
+        results[news_id] = {
+            "summary": summary,
+            "sentiment": sentiment if sentiment in SENTIMENTS else "中性",
+        }
+    return results
+
+
+class NewsEnrichmentWorker:
+    """待处理新闻的批量摘要与情绪分析
+
+    每轮从数据库认领一批 pending 新闻（状态改为 processing），按 token 预算把
+    多条新闻打包进同一个 LLM 请求，多个请求在信号量限制下并发执行，最后把
+    结果一次性批量写回。处理中断的新闻超时后会被重新认领。
+
+    模型回复中解析出的新闻记为 done，模型已回复但缺少或无法解析的记为 failed；
+    请求本身失败（限流、超时、服务不可用）的新闻放回 pending，下一轮重试，
+    累计尝试 max_attempts 次仍失败时才记为 failed。
+    """
+
+    def __init__(
+        self,
+        llm: Optional[CompletionClient] = None,
+        session_factory: Optional[sessionmaker] = None,
+        claim_size: Optional[int] = None,
+        items_per_request: Optional[int] = None,
+        token_budget: Optional[int] = None,
+        content_chars: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        stale_seconds: Optional[float] = None,
+        max_attempts: Optional[int] = None,
+    ):
+        """
+        初始化处理器，参数默认读取 NEWS_ENRICH_* 配置
+
+        Args:
+            llm: LLM 客户端，默认首次使用时创建 LLMAnalyzer
+            session_factory: 数据库会话工厂，默认使用全局 async_session_factory
+            claim_size: 每轮认领的新闻数
+            items_per_request: 单次请求最多打包的新闻数
+            token_budget: 单次请求的提示词 token 上限
+            content_chars: 每条新闻正文截取的字符数
+            concurrency: 同时进行的请求数
+            stale_seconds: processing 状态的超时时长（秒）
+            max_attempts: 请求失败的新闻最多尝试的次数
+        """
+        self._llm = llm
+        self.session_factory = session_factory or async_session_factory
+        self.claim_size = claim_size or settings.NEWS_ENRICH_CLAIM_SIZE
+        # 每条新闻的回复约占 RESPONSE_TOKENS_PER_ITEM，打包条数不能让回复超出 LLM_MAX_TOKENS
+        self.items_per_request = min(
+            items_per_request or settings.NEWS_ENRICH_ITEMS_PER_REQUEST,
+            max(1, settings.LLM_MAX_TOKENS // RESPONSE_TOKENS_PER_ITEM),
+        )
+        self.token_budget = token_budget or settings.NEWS_ENRICH_TOKEN_BUDGET
+        self.content_chars = content_chars or settings.NEWS_ENRICH_CONTENT_CHARS
+        self.stale_after = timedelta(
+            seconds=stale_seconds or settings.NEWS_ENRICH_STALE_SECONDS
+        )
+        self.max_attempts = max_attempts or settings.NEWS_ENRICH_MAX_ATTEMPTS
+        self._semaphore = asyncio.Semaphore(
+            concurrency or settings.NEWS_ENRICH_CONCURRENCY
+        )
+        self.counters = {
+            "claimed": 0,
+            "done": 0,
+            "failed": 0,
+            "requeued": 0,
+            "requests": 0,
+            "request_errors": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+        }
+        self.busy_seconds = 0.0
+
+    @property
+    def llm(self) -> CompletionClient:
+        if self._llm is None:
+            # 延迟导入：只有真正调用模型时才需要 LLM 相关依赖
+            from app.core.llm import LLMAnalyzer
+
+            self._llm = LLMAnalyzer()
+        return self._llm
+
+    async def run_once(self) -> int:
+        """
+        处理一轮待处理新闻
+
+        Returns:
+            int: 本轮处理完成（done + failed）的新闻数，不含放回 pending 的新闻
+        """
+        started = time.monotonic()
+        async with self.session_factory() as session:
+            news = await DataSourceRepository(session).claim_pending_news(
+                self.claim_size, datetime.utcnow() - self.stale_after
+            )
+        if not news:
+            return 0
+        self.counters["claimed"] += len(news)
+
+        items = [(item, render_news_item(item, self.content_chars)) for item in news]
+        batches = pack_batches(items, self.token_budget, self.items_per_request)
+        results = await asyncio.gather(*[self._process(batch) for batch in batches])
+        rows = [row for batch_rows in results for row in batch_rows]
+
+        async with self.session_factory() as session:
+            await DataSourceRepository(session).save_news_enrichment(rows)
+
+        counts = Counter(row["status"] for row in rows)
+        self.counters["done"] += counts["done"]
+        self.counters["failed"] += counts["failed"]
+        self.counters["requeued"] += counts["pending"]
+        self.busy_seconds += time.monotonic() - started
+        logger.info(
+            "新闻处理完成",
+            claimed=len(news),
+            requests=len(batches),
+            done=counts["done"],
+            failed=counts["failed"],
+            requeued=counts["pending"],
+        )
+        return counts["done"] + counts["failed"]
+
+    async def _process(
+        self, batch: List[Tuple[News, str]]
+    ) -> List[Dict[str, Any]]:
+        """调用一次 LLM 处理一批新闻，返回待写回的行"""
+        prompt = "\n\n".join(text for _, text in batch)
+        ids = [news.id for news, _ in batch]
+        parsed: Dict[int, Dict[str, Any]] = {}
+        answered = False
+        async with self._semaphore:
+            self.counters["requests"] += 1
+            try:
+                text, usage = await self.llm.complete(ENRICH_SYSTEM_PROMPT, prompt)
+                answered = True
+            except Exception as e:
+                self.counters["request_errors"] += 1
+                logger.error("新闻处理请求失败", count=len(batch), error=str(e))
+            else:
+                # 模型未返回用量时按本地估算计费
+                self.counters["prompt_tokens"] += usage.get(
+                    "prompt_tokens",
+                    estimate_tokens(ENRICH_SYSTEM_PROMPT) + estimate_tokens(prompt),
+                )
+                self.counters["completion_tokens"] += usage.get(
+                    "completion_tokens", estimate_tokens(text)
+                )
+                parsed = parse_enrichment(text, ids)
+
+        now = datetime.utcnow()
+        rows = []
+        for news, _ in batch:
+            attempts = (news.enrich_attempts or 0) + 1
+            if news.id in parsed:
+                status = "done"
+            elif answered or attempts >= self.max_attempts:
+                status = "failed"
+            else:
+                # 请求失败与新闻内容无关，放回队列等待下一轮
+                status = "pending"
+            rows.append({
+                "id": news.id,
+                "summary": parsed.get(news.id, {}).get("summary"),
+                "sentiment": parsed.get(news.id, {}).get("sentiment"),
+                "status": status,
+                "processed_at": None if status == "pending" else now,
+                "enrich_attempts": attempts,
+            })
+        return rows
+
+    @property
+    def cost(self) -> float:
+        """累计费用（美元），按 LLM_PRICE_* 配置计算"""
+        return (
+            self.counters["prompt_tokens"] / 1000 * settings.LLM_PRICE_PROMPT_PER_1K
+            + self.counters["completion_tokens"]
+            / 1000
+            * settings.LLM_PRICE_COMPLETION_PER_1K
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        处理统计
+
+        Returns:
+            Dict[str, Any]: 各计数器、累计费用，以及吞吐量
+                items_per_minute（按实际处理耗时）与 items_per_dollar
+        """
+        cost = self.cost
+        return {
+            **self.counters,
+            "cost": cost,
+            "busy_seconds": self.busy_seconds,
+            "items_per_request": (
+                self.counters["claimed"] / self.counters["requests"]
+                if self.counters["requests"] else 0.0
+            ),
+            "items_per_minute": (
+                self.counters["done"] / self.busy_seconds * 60
+                if self.busy_seconds else 0.0
+            ),
+            "items_per_dollar": self.counters["done"] / cost if cost else 0.0,
+        }
+
+
+@lru_cache
+def get_news_enrichment_worker() -> NewsEnrichmentWorker:
+    """获取全局新闻处理器"""
+    return NewsEnrichmentWorker()
@@ -1,84 +1,347 @@
 import asyncio
-from datetime import datetime, timezone
-from typing import List
+import math
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
 
 import structlog
 from binance import AsyncClient
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.models.market import Kline
+from app.core.kline_store import KlineStore, get_kline_store, to_ms
+from app.core.types import KlineInterval
+from app.datasource.repositories.market import MarketRepository
+from app.jobs.rollup_market import KlineRollup
 
 logger = structlog.get_logger()
 
 
-async def fetch_market_data(session: AsyncSession) -> None:
+def kline_to_dict(symbol: str, k: Sequence[Any]) -> Dict[str, Any]:
     """
-    从Binance获取市场数据并保存到数据库
+    将 Binance K线数组转换为入库字典
 
     Args:
-        session: 数据库会话
+        symbol: 交易对
+        k: Binance 返回的单根K线 [开盘时间, 开, 高, 低, 收, 量, 收盘时间, ...]
+
+    Returns:
+        Dict[str, Any]: K线字典，时间为 UTC naive datetime
     """
-    try:
-        # 初始化Binance客户端
-        client = await AsyncClient.create(
-            settings.BINANCE_API_KEY,
-            settings.BINANCE_API_SECRET,
-        )
+    return {
+        "symbol": symbol,
+        "timestamp": datetime.fromtimestamp(k[0] / 1000, tz=timezone.utc).replace(
+            tzinfo=None
+        ),
+        "open": float(k[1]),
+        "high": float(k[2]),
+        "low": float(k[3]),
+        "close": float(k[4]),
+        "volume": float(k[5]),
+    }
+
+
+class KlineIngestor:
+    """多交易对K线批量采集器
+
+    复用同一个 Binance 客户端，按页并发拉取K线（并发数受限），
+    最后通过一条 INSERT ... ON CONFLICT DO NOTHING 批量写入。
+
+    每轮从数据库中最新K线的下一根开始按时间顺序补齐，缺口超过 max_pages
+    页时分多轮逐步补齐；某页拉取失败时只写入它之前的连续分页，下一轮从
+    断点重新拉取，K线表中不会留下空洞。
+
+    websocket 断线等原因留下的中间空洞（之后已有更新的K线）不会被水位线覆盖，
+    每轮检查最近 gap_scan_bars 根K线的数量，缺少K线时定位空洞并单独补齐。
+    """
+
+    def __init__(
+        self,
+        client: Optional[AsyncClient] = None,
+        symbols: Optional[Sequence[str]] = None,
+        interval: Optional[str] = None,
+        limit: Optional[int] = None,
+        concurrency: Optional[int] = None,
+        max_pages: Optional[int] = None,
+        rollup: Optional[KlineRollup] = None,
+        store: Optional[KlineStore] = None,
+        gap_scan_bars: Optional[int] = None,
+    ):
+        """
+        初始化采集器
 
-        # 获取BTCUSDT的1分钟K线数据
-        klines = await client.get_klines(
-            symbol="BTCUSDT",
-            interval="1m",
-            limit=1,
+        Args:
+            client: Binance 客户端，不传则首次使用时创建
+            symbols: 交易对列表
+            interval: K线周期
+            limit: 单页K线数量
+            concurrency: 最大并发请求数
+            max_pages: 每个交易对每轮最多拉取的页数
+            rollup: 多周期聚合器，仅在采集1分钟K线时生效
+            store: 列式K线缓存，入库后同步写入
+            gap_scan_bars: 检查中间空洞的最近K线数量，0 表示不检查
+        """
+        self._client = client
+        self.symbols = list(symbols or settings.MARKET_SYMBOLS)
+        self.interval = KlineInterval(interval or settings.MARKET_KLINE_INTERVAL)
+        self.limit = limit or settings.MARKET_FETCH_LIMIT
+        self.max_pages = max_pages or settings.MARKET_BACKFILL_MAX_PAGES
+        self.gap_scan_bars = (
+            gap_scan_bars if gap_scan_bars is not None
+            else settings.MARKET_GAP_SCAN_BARS
         )
+        self._semaphore = asyncio.Semaphore(
+            concurrency or settings.MARKET_FETCH_CONCURRENCY
+        )
+        self.store = store if store is not None else get_kline_store()
+        self.rollup = None
+        if self.interval == KlineInterval.M1:
+            self.rollup = rollup or KlineRollup(store=self.store)
+        # 已入库但尚未成功写入缓存/聚合的K线，下一轮重试
+        self._downstream_pending: List[Dict[str, Any]] = []
 
-        # 转换数据格式
-        kline_data = []
-        for k in klines:
-            kline = Kline(
-                symbol="BTCUSDT",
-                timestamp=datetime.fromtimestamp(k[0] / 1000, tz=timezone.utc),
-                open=float(k[1]),
-                high=float(k[2]),
-                low=float(k[3]),
-                close=float(k[4]),
-                volume=float(k[5]),
+    async def get_client(self) -> AsyncClient:
+        """获取（必要时创建）Binance 客户端"""
+        if self._client is None:
+            self._client = await AsyncClient.create(
+                settings.BINANCE_API_KEY,
+                settings.BINANCE_API_SECRET,
             )
-            kline_data.append(kline)
+        return self._client
+
+    async def close(self) -> None:
+        """关闭客户端连接"""
+        if self._client is not None:
+            await self._client.close_connection()
+            self._client = None
+
+    def _page_starts(
+        self, latest: Optional[datetime], now_ms: int
+    ) -> List[Optional[int]]:
+        """
+        计算需要拉取的分页起始时间
+
+        无历史数据时只拉取最新一页；否则从最新K线的下一根开始按时间顺序补齐，
+        页数不超过 max_pages，剩余缺口留到下一轮。
+        """
+        if latest is None:
+            return [None]
+
+        interval_ms = self.interval.seconds * 1000
+        start_ms = int(latest.replace(tzinfo=timezone.utc).timestamp() * 1000)
+        start_ms += interval_ms
+        page_ms = interval_ms * self.limit
+        pages = min(max(math.ceil((now_ms - start_ms) / page_ms), 0), self.max_pages)
+        return [start_ms + i * page_ms for i in range(pages)]
+
+    def _gap_starts(
+        self, gaps: Sequence[Tuple[datetime, datetime]], budget: int
+    ) -> List[int]:
+        """计算补齐中间空洞的分页起始时间，页数不超过 budget"""
+        page_ms = self.interval.seconds * 1000 * self.limit
+        starts: List[int] = []
+        for gap_start, gap_end in gaps:
+            start_ms, end_ms = to_ms(gap_start), to_ms(gap_end)
+            while start_ms < end_ms and len(starts) < budget:
+                starts.append(start_ms)
+                start_ms += page_ms
+        return starts
 
-        # 检查是否已存在相同时间戳的数据
-        for kline in kline_data:
-            stmt = select(Kline).where(
-                Kline.symbol == kline.symbol,
-                Kline.timestamp == kline.timestamp,
+    async def find_gaps(
+        self, repository: MarketRepository, latest: Dict[str, datetime]
+    ) -> Dict[str, List[Tuple[datetime, datetime]]]:
+        """
+        查找最近 gap_scan_bars 根K线范围内的中间空洞
+
+        先按交易对统计K线数量与首尾时间，只有数量少于应有数量的交易对
+        才读取时间列定位空洞。
+
+        Args:
+            repository: 行情仓储
+            latest: 交易对 -> 数据库中最新K线时间
+
+        Returns:
+            Dict[str, List[Tuple[datetime, datetime]]]: 交易对 -> 空洞列表，
+                每个空洞为 (第一根缺失K线时间, 空洞后第一根K线时间)
+        """
+        if not self.gap_scan_bars or not latest:
+            return {}
+
+        interval = timedelta(seconds=self.interval.seconds)
+        start = min(latest.values()) - interval * (self.gap_scan_bars - 1)
+        stats = await repository.get_window_stats(list(latest), start)
+        gaps: Dict[str, List[Tuple[datetime, datetime]]] = {}
+        for symbol, (count, first, last) in stats.items():
+            expected = (last - first) // interval + 1
+            if count >= expected:
+                continue
+            timestamps = await repository.get_timestamps(symbol, start)
+            gaps[symbol] = [
+                (prev + interval, current)
+                for prev, current in zip(timestamps, timestamps[1:])
+                if current - prev > interval
+            ]
+            logger.warning(
+                "发现K线空洞", symbol=symbol, missing=expected - count,
+                gaps=len(gaps[symbol]),
             )
-            result = await session.execute(stmt)
-            existing = result.scalar_one_or_none()
-
-            if existing is None:
-                session.add(kline)
-                logger.info(
-                    "新增K线数据",
-                    symbol=kline.symbol,
-                    timestamp=kline.timestamp,
-                )
-            else:
-                logger.info(
-                    "K线数据已存在",
-                    symbol=kline.symbol,
-                    timestamp=kline.timestamp,
-                )
-
-        await session.commit()
-        logger.info("市场数据获取完成")
+        return gaps
+
+    async def _fetch_page(
+        self, symbol: str, start_ms: Optional[int], now_ms: int
+    ) -> List[Dict[str, Any]]:
+        """拉取单页K线，丢弃尚未收盘的K线"""
+        params = {
+            "symbol": symbol,
+            "interval": self.interval.value,
+            "limit": self.limit,
+        }
+        if start_ms is not None:
+            params["startTime"] = start_ms
+
+        async with self._semaphore:
+            client = await self.get_client()
+            klines = await client.get_klines(**params)
 
+        return [kline_to_dict(symbol, k) for k in klines if k[6] < now_ms]
+
+    async def fetch(
+        self,
+        latest: Dict[str, datetime],
+        gaps: Optional[Dict[str, List[Tuple[datetime, datetime]]]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        并发拉取所有交易对的K线
+
+        Args:
+            latest: 交易对 -> 数据库中最新K线时间
+            gaps: 交易对 -> 中间空洞列表，与水位线之后的分页共用 max_pages
+
+        Returns:
+            List[Dict[str, Any]]: 已收盘的K线，每个交易对只包含从水位线起
+                连续拉取成功的分页，以及拉取成功的空洞分页
+        """
+        now_ms = int(time.time() * 1000)
+        gaps = gaps or {}
+        plans = {
+            symbol: self._page_starts(latest.get(symbol), now_ms)
+            for symbol in self.symbols
+        }
+        gap_plans = {
+            symbol: self._gap_starts(
+                gaps.get(symbol, []), self.max_pages - len(plans[symbol])
+            )
+            for symbol in self.symbols
+        }
+        tasks = [
+            self._fetch_page(symbol, start_ms, now_ms)
+            for symbol in self.symbols
+            for start_ms in plans[symbol] + gap_plans[symbol]
+        ]
+        results = iter(await asyncio.gather(*tasks, return_exceptions=True))
+
+        klines: List[Dict[str, Any]] = []
+        for symbol in self.symbols:
+            pages = [next(results) for _ in plans[symbol]]
+            gap_pages = [next(results) for _ in gap_plans[symbol]]
+            # 空洞在水位线之前，各页独立写入，失败的页下一轮仍会被检查出来
+            for result in gap_pages:
+                if isinstance(result, Exception):
+                    logger.error("K线空洞分页拉取失败", symbol=symbol, error=str(result))
+                else:
+                    klines.extend(result)
+            for index, result in enumerate(pages):
+                if isinstance(result, Exception):
+                    # 之后的分页即使成功也不写入，否则水位线会越过失败的分页
+                    logger.error(
+                        "K线分页拉取失败",
+                        symbol=symbol,
+                        dropped_pages=len(pages) - index,
+                        error=str(result),
+                    )
+                    break
+                klines.extend(result)
+        return klines
+
+    async def ingest(self, session: AsyncSession) -> int:
+        """
+        执行一轮采集并写入数据库
+
+        Args:
+            session: 数据库会话
+
+        Returns:
+            int: 新写入的K线数量
+        """
+        repository = MarketRepository(session)
+        latest = await repository.get_latest_timestamps(self.symbols)
+        gaps = await self.find_gaps(repository, latest)
+        klines = await self.fetch(latest, gaps)
+        inserted = await repository.upsert_klines(klines) if klines else 0
+        await self._write_downstream(session, klines)
+        logger.info(
+            "市场数据获取完成",
+            symbols=len(self.symbols),
+            interval=self.interval.value,
+            fetched=len(klines),
+            inserted=inserted,
+        )
+        return inserted
+
+    async def _write_downstream(
+        self, session: AsyncSession, klines: List[Dict[str, Any]]
+    ) -> None:
+        """
+        把本轮拉取的K线写入列式缓存与多周期聚合
+
+        两者都按时间覆盖写入，可重复执行。写入失败的K线保留到下一轮重试：
+        它们已在数据库中，之后不会再被拉取，不重试的话缓存与聚合表会永久缺失。
+
+        Args:
+            session: 数据库会话
+            klines: 本轮拉取的K线
+        """
+        batch = self._downstream_pending + klines
+        if not batch:
+            return
+        try:
+            if self.store:
+                self.store.append_many(self.interval, batch)
+            if self.rollup:
+                await self.rollup.rollup(session, batch)
+        except Exception as e:
+            await session.rollback()
+            self._downstream_pending = batch
+            logger.error(
+                "K线缓存/聚合写入失败，下一轮重试", error=str(e), pending=len(batch)
+            )
+            return
+        self._downstream_pending = []
+
+
+async def fetch_market_data(
+    session: AsyncSession, ingestor: Optional[KlineIngestor] = None
+) -> int:
+    """
+    从Binance获取市场数据并保存到数据库
+
+    Args:
+        session: 数据库会话
+        ingestor: 复用的采集器；不传则本次新建并在结束时关闭
+
+    Returns:
+        int: 新写入的K线数量
+    """
+    owned = ingestor is None
+    ingestor = ingestor or KlineIngestor()
+    try:
+        return await ingestor.ingest(session)
     except Exception as e:
         logger.error("市场数据获取失败", error=str(e))
         raise
     finally:
-        await client.close_connection()
+        if owned:
+            await ingestor.close()
 
 
 async def main():
@@ -90,4 +353,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    asyncio.run(main())
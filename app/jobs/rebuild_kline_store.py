@@ -0,0 +1,84 @@
+import argparse
+import asyncio
+from typing import Dict, Optional, Sequence
+
+import structlog
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.kline_store import KlineStore, get_kline_store
+from app.core.types import KlineInterval
+from app.datasource.models.market import KLINE_MODELS
+from app.datasource.repositories.market import MarketRepository
+
+logger = structlog.get_logger()
+
+
+async def rebuild_kline_store(
+    session: AsyncSession,
+    store: KlineStore,
+    symbols: Optional[Sequence[str]] = None,
+    intervals: Optional[Sequence[str]] = None,
+    chunk_size: int = 10000,
+) -> Dict[str, int]:
+    """
+    从数据库全量重建列式K线缓存
+
+    每个 交易对/周期 按时间游标分页读取，写入临时目录后原子替换，
+    重建期间读者仍可读取旧数据。
+
+    Args:
+        session: 数据库会话
+        store: 列式K线缓存
+        symbols: 需要重建的交易对，默认为数据库中已有的全部交易对
+        intervals: 需要重建的周期，默认全部周期
+        chunk_size: 每次读取的行数
+
+    Returns:
+        Dict[str, int]: "周期/交易对" -> 重建后的K线数量
+    """
+    repository = MarketRepository(session)
+    targets = [KlineInterval(i) for i in intervals] if intervals else list(KLINE_MODELS)
+    rebuilt: Dict[str, int] = {}
+    for interval in targets:
+        model = KLINE_MODELS[interval]
+        names = symbols or await repository.get_symbols(model)
+        for symbol in names:
+            staging = store.begin_rebuild(symbol, interval)
+            after = None
+            while True:
+                bars = await repository.get_bars_page(model, symbol, after, chunk_size)
+                if not bars:
+                    break
+                staging.append(symbol, interval, bars)
+                after = bars[-1]["timestamp"]
+            rebuilt[f"{interval.value}/{symbol}"] = store.commit_rebuild(
+                symbol, interval
+            )
+            logger.info(
+                "K线缓存重建完成",
+                symbol=symbol,
+                interval=interval.value,
+                count=rebuilt[f"{interval.value}/{symbol}"],
+            )
+    return rebuilt
+
+
+async def main():
+    """主函数"""
+    from app.core.db import async_session_factory
+
+    parser = argparse.ArgumentParser(description="从数据库重建列式K线缓存")
+    parser.add_argument("--symbols", nargs="*", help="交易对，默认全部")
+    parser.add_argument("--intervals", nargs="*", help="K线周期，默认全部")
+    args = parser.parse_args()
+
+    store = get_kline_store()
+    if store is None:
+        parser.error("未配置 KLINE_STORE_DIR")
+
+    async with async_session_factory() as session:
+        await rebuild_kline_store(session, store, args.symbols, args.intervals)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,172 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import structlog
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.kline_store import KlineStore, get_kline_store
+from app.core.types import KlineInterval
+from app.datasource.models.market import KLINE_MODELS
+from app.datasource.repositories.market import MarketRepository
+
+logger = structlog.get_logger()
+
+
+def bucket_start(timestamp: datetime, interval: KlineInterval) -> datetime:
+    """
+    计算K线所在周期的开始时间（UTC，按 Unix 纪元对齐）
+
+    Args:
+        timestamp: K线时间（UTC naive datetime）
+        interval: 目标周期
+
+    Returns:
+        datetime: 周期开始时间
+    """
+    epoch = int(timestamp.replace(tzinfo=timezone.utc).timestamp())
+    start = epoch - epoch % interval.seconds
+    return datetime.fromtimestamp(start, tz=timezone.utc).replace(tzinfo=None)
+
+
+def aggregate_bars(
+    bars: Iterable[Dict[str, Any]], interval: KlineInterval
+) -> List[Dict[str, Any]]:
+    """
+    将低周期K线聚合为高周期K线
+
+    Args:
+        bars: 按交易对、时间升序排列的K线
+        interval: 目标周期
+
+    Returns:
+        List[Dict[str, Any]]: 聚合后的K线
+    """
+    result: List[Dict[str, Any]] = []
+    current: Optional[Dict[str, Any]] = None
+    for bar in bars:
+        start = bucket_start(bar["timestamp"], interval)
+        if (
+            current is None
+            or current["symbol"] != bar["symbol"]
+            or current["timestamp"] != start
+        ):
+            current = {
+                "symbol": bar["symbol"],
+                "timestamp": start,
+                "open": bar["open"],
+                "high": bar["high"],
+                "low": bar["low"],
+                "close": bar["close"],
+                "volume": bar["volume"],
+            }
+            result.append(current)
+            continue
+
+        current["high"] = max(current["high"], bar["high"])
+        current["low"] = min(current["low"], bar["low"])
+        current["close"] = bar["close"]
+        current["volume"] += bar["volume"]
+    return result
+
+
+class KlineRollup:
+    """多周期K线增量聚合
+
+    新的1分钟K线入库后，只重算被触及的周期。各周期逐级聚合
+    （如 5m <- 1m，15m <- 5m，1h <- 15m），每个周期只需读取少量下级K线。
+    若聚合表已由迁移创建为 TimescaleDB 连续聚合视图，则由数据库负责刷新，这里直接跳过。
+    """
+
+    def __init__(
+        self,
+        intervals: Optional[Sequence[str]] = None,
+        store: Optional[KlineStore] = None,
+    ):
+        """
+        初始化聚合器
+
+        Args:
+            intervals: 需要聚合的周期，默认读取 MARKET_ROLLUP_INTERVALS
+            store: 列式K线缓存，聚合结果同步写入
+        """
+        self.store = store if store is not None else get_kline_store()
+        if intervals is None:
+            intervals = settings.MARKET_ROLLUP_INTERVALS
+        targets = sorted({KlineInterval(i) for i in intervals}, key=lambda i: i.seconds)
+
+        # 为每个周期选择可整除的最大已聚合周期作为数据源
+        self.plan: List[Tuple[KlineInterval, KlineInterval]] = []
+        available = [KlineInterval.M1]
+        for target in targets:
+            if target == KlineInterval.M1:
+                continue
+            source = max(
+                (i for i in available if target.seconds % i.seconds == 0),
+                key=lambda i: i.seconds,
+            )
+            self.plan.append((target, source))
+            available.append(target)
+
+        self._continuous_aggregates: Optional[bool] = None
+
+    async def _uses_continuous_aggregates(self, session: AsyncSession) -> bool:
+        """检测聚合表是否为 TimescaleDB 连续聚合视图"""
+        if self._continuous_aggregates is None:
+            self._continuous_aggregates = False
+            if session.bind.dialect.name == "postgresql" and self.plan:
+                table = KLINE_MODELS[self.plan[0][0]].__tablename__
+                result = await session.execute(
+                    text("SELECT relkind FROM pg_class WHERE relname = :name"),
+                    {"name": table},
+                )
+                self._continuous_aggregates = result.scalar_one_or_none() == "v"
+        return self._continuous_aggregates
+
+    async def rollup(
+        self, session: AsyncSession, klines: Iterable[Dict[str, Any]]
+    ) -> Dict[str, int]:
+        """
+        根据新入库的1分钟K线更新各周期聚合
+
+        Args:
+            session: 数据库会话
+            klines: 新入库的1分钟K线（至少包含 symbol/timestamp）
+
+        Returns:
+            Dict[str, int]: 周期 -> 写入的聚合K线数量
+        """
+        touched: Dict[KlineInterval, Set[Tuple[str, datetime]]] = {
+            KlineInterval.M1: {(k["symbol"], k["timestamp"]) for k in klines}
+        }
+        if not touched[KlineInterval.M1] or not self.plan:
+            return {}
+        if await self._uses_continuous_aggregates(session):
+            return {}
+
+        repository = MarketRepository(session)
+        written: Dict[str, int] = {}
+        for target, source in self.plan:
+            buckets = {
+                (symbol, bucket_start(ts, target)) for symbol, ts in touched[source]
+            }
+            touched[target] = buckets
+
+            symbols = sorted({symbol for symbol, _ in buckets})
+            start = min(ts for _, ts in buckets)
+            end = max(ts for _, ts in buckets) + timedelta(seconds=target.seconds)
+            rows = await repository.get_bars(KLINE_MODELS[source], symbols, start, end)
+
+            bars = [
+                bar for bar in aggregate_bars(rows, target)
+                if (bar["symbol"], bar["timestamp"]) in buckets
+            ]
+            written[target.value] = await repository.upsert_bars(
+                KLINE_MODELS[target], bars
+            )
+            if self.store:
+                self.store.append_many(target, bars)
+
+        logger.debug("K线聚合完成", written=written)
+        return written
@@ -0,0 +1,196 @@
+import asyncio
+import json
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import structlog
+import websockets
+
+from app.core.config import settings
+from app.core.kline_store import KlineStore, get_kline_store
+from app.core.db import async_session_factory
+from app.core.types import KlineInterval
+from app.datasource.repositories.market import MarketRepository
+from app.jobs.fetch_market import kline_to_dict
+from app.jobs.rollup_market import KlineRollup
+
+logger = structlog.get_logger()
+
+
+class KlineStreamIngestor:
+    """Binance 组合K线流采集器
+
+    订阅多交易对的 <symbol>@kline_<interval> 组合流，只保留已收盘的K线，
+    按数量或时间触发微批写入；连接断开后按指数退避自动重连。
+    断线期间缺失的K线由调度器定期运行的 fetch_market_data 补齐。
+    """
+
+    def __init__(
+        self,
+        symbols: Optional[Sequence[str]] = None,
+        interval: Optional[str] = None,
+        base_url: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        flush_interval: Optional[float] = None,
+        session_factory=None,
+        on_kline: Optional[Callable[[Dict[str, Any]], None]] = None,
+        rollup: Optional[KlineRollup] = None,
+        store: Optional[KlineStore] = None,
+    ):
+        """
+        初始化采集器
+
+        Args:
+            symbols: 交易对列表
+            interval: K线周期
+            base_url: websocket 服务地址
+            batch_size: 缓冲达到该数量立即写库
+            flush_interval: 最长写库间隔（秒）
+            session_factory: 数据库会话工厂
+            on_kline: 每根收盘K线的回调（如推入增量指标引擎）
+            rollup: 多周期聚合器，仅在采集1分钟K线时生效
+            store: 列式K线缓存，入库后同步写入
+        """
+        self.symbols = list(symbols or settings.MARKET_SYMBOLS)
+        self.interval = KlineInterval(interval or settings.MARKET_KLINE_INTERVAL)
+        self.base_url = (base_url or settings.MARKET_STREAM_URL).rstrip("/")
+        self.batch_size = batch_size or settings.MARKET_STREAM_BATCH_SIZE
+        self.flush_interval = flush_interval or settings.MARKET_STREAM_FLUSH_INTERVAL
+        self.session_factory = session_factory or async_session_factory
+        self.on_kline = on_kline
+        self.store = store if store is not None else get_kline_store()
+        self.rollup = None
+        if self.interval == KlineInterval.M1:
+            self.rollup = rollup or KlineRollup(store=self.store)
+
+        self.max_buffer = self.batch_size * 20
+        self.reconnect_delay = 1.0
+        self.max_reconnect_delay = 60.0
+
+        self._buffer: List[Dict[str, Any]] = []
+        self._flush_event = asyncio.Event()
+        self._flush_lock = asyncio.Lock()
+        self._consumers: List[asyncio.Task] = []
+        self._stopped: Optional[asyncio.Event] = None
+        self._running = False
+
+    def stream_urls(self) -> List[str]:
+        """按单连接最大流数量切分组合流地址"""
+        streams = [f"{s.lower()}@kline_{self.interval.value}" for s in self.symbols]
+        size = settings.MARKET_STREAM_MAX_STREAMS
+        return [
+            f"{self.base_url}/stream?streams={'/'.join(streams[i:i + size])}"
+            for i in range(0, len(streams), size)
+        ]
+
+    async def run(self) -> None:
+        """启动采集，直到 stop() 被调用"""
+        self._running = True
+        self._stopped = asyncio.Event()
+        self._consumers = [
+            asyncio.create_task(self._consume(url)) for url in self.stream_urls()
+        ]
+        flusher = asyncio.create_task(self._flush_loop())
+        logger.info(
+            "K线流采集已启动",
+            symbols=len(self.symbols),
+            connections=len(self._consumers),
+        )
+        try:
+            await asyncio.gather(*self._consumers)
+        except asyncio.CancelledError:
+            pass
+        finally:
+            # 持有写库锁时再取消，避免中断进行中的批量写入
+            async with self._flush_lock:
+                flusher.cancel()
+            await asyncio.gather(flusher, return_exceptions=True)
+            await self.flush()
+            self._stopped.set()
+
+    async def stop(self) -> None:
+        """停止采集并写入剩余缓冲"""
+        self._running = False
+        for task in self._consumers:
+            task.cancel()
+        if self._stopped is not None:
+            await self._stopped.wait()
+        logger.info("K线流采集已停止")
+
+    async def _consume(self, url: str) -> None:
+        """消费单个组合流连接，断开后自动重连"""
+        delay = self.reconnect_delay
+        while self._running:
+            try:
+                async with websockets.connect(url) as ws:
+                    delay = self.reconnect_delay
+                    logger.info("K线流已连接", url=url)
+                    async for message in ws:
+                        self._handle_message(message)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("K线流连接断开，准备重连", error=str(e), delay=delay)
+
+            if self._running:
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_reconnect_delay)
+
+    def _handle_message(self, message: str) -> None:
+        """解析推送消息，收盘K线进入缓冲"""
+        try:
+            payload = json.loads(message)
+            k = payload.get("data", payload).get("k")
+        except (ValueError, AttributeError) as e:
+            logger.error("解析K线消息失败", error=str(e))
+            return
+
+        # 只处理已收盘的K线
+        if not k or not k.get("x"):
+            return
+
+        kline = kline_to_dict(k["s"], [k["t"], k["o"], k["h"], k["l"], k["c"], k["v"]])
+        self._buffer.append(kline)
+        if self.on_kline:
+            self.on_kline(kline)
+        if len(self._buffer) >= self.batch_size:
+            self._flush_event.set()
+
+    async def _flush_loop(self) -> None:
+        """按数量或时间触发写库"""
+        while True:
+            try:
+                await asyncio.wait_for(self._flush_event.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+    async def flush(self) -> int:
+        """
+        将缓冲中的K线批量写库
+
+        Returns:
+            int: 新写入的K线数量
+        """
+        async with self._flush_lock:
+            self._flush_event.clear()
+            if not self._buffer:
+                return 0
+
+            batch, self._buffer = self._buffer, []
+            try:
+                async with self.session_factory() as session:
+                    inserted = await MarketRepository(session).upsert_klines(batch)
+                    # 缓存与聚合按时间覆盖写入，整批重复执行无副作用；不以 inserted
+                    # 为条件，K线已入库但下游写入失败时，重试会补上缺失的部分
+                    if self.store:
+                        self.store.append_many(self.interval, batch)
+                    if self.rollup:
+                        await self.rollup.rollup(session, batch)
+            except Exception as e:
+                # 写库失败时放回缓冲等待下次写入，超出上限丢弃最旧的数据
+                self._buffer = (batch + self._buffer)[-self.max_buffer:]
+                logger.error("K线批量写入失败", error=str(e), pending=len(self._buffer))
+                return 0
+
+            logger.debug("K线批量写入完成", count=len(batch), inserted=inserted)
+            return inserted
@@ -1,16 +1,25 @@
 import asyncio
 import logging
 from datetime import datetime
+from typing import Dict, Optional
 
 import structlog
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.interval import IntervalTrigger
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
 
 from app.core.config import settings
 from app.core.db import async_session_factory
+from app.core.http import get_http_client
+from app.datasource.polling import AdaptivePoller, get_news_poller
+from app.datasource.repositories.datasource import DataSourceRepository
 from app.datasource.services.datasource import DataSourceService
 from app.core.types import DataSourceType
+from app.jobs.analyze_market import MarketAnalysisJob
+from app.jobs.enrich_news import NewsEnrichmentWorker, get_news_enrichment_worker
+from app.jobs.fetch_market import KlineIngestor, fetch_market_data
+from app.jobs.stream_market import KlineStreamIngestor
 
 # 配置日志
 logging.basicConfig(
@@ -19,20 +28,54 @@ logging.basicConfig(
 )
 logger = structlog.get_logger()
 
+# 单个数据源新闻拉取任务的 ID 前缀
+NEWS_JOB_PREFIX = "fetch_news:"
+
 
 class JobScheduler:
     """任务调度器"""
 
-    def __init__(self):
-        """初始化调度器"""
+    def __init__(
+        self,
+        session_factory: Optional[sessionmaker] = None,
+        poller: Optional[AdaptivePoller] = None,
+        enrichment: Optional[NewsEnrichmentWorker] = None,
+        market_analysis: Optional[MarketAnalysisJob] = None,
+        market_ingestor: Optional[KlineIngestor] = None,
+    ):
+        """
+        初始化调度器
+
+        Args:
+            session_factory: 数据库会话工厂，默认使用全局 async_session_factory
+            poller: 自适应轮询控制器，NEWS_POLL_ADAPTIVE 开启时生效
+            enrichment: 新闻处理器，NEWS_ENRICH_ENABLED 开启时定期运行
+            market_analysis: 市场分析任务，LLM_ANALYSIS_ENABLED 开启时定期运行
+            market_ingestor: K线采集器，MARKET_FETCH_ENABLED 开启时定期补齐K线
+        """
         self.scheduler = AsyncIOScheduler()
+        self.session_factory = session_factory or async_session_factory
+        self.poller = poller or get_news_poller()
+        self.enrichment = enrichment or get_news_enrichment_worker()
+        self.market_analysis = market_analysis or MarketAnalysisJob(
+            session_factory=self.session_factory
+        )
+        # 复用同一个采集器（及其 Binance 客户端），关闭调度器时释放
+        self.market_ingestor = market_ingestor or KlineIngestor()
+        self.adaptive = settings.NEWS_POLL_ADAPTIVE
+        # 数据源 -> 配置的 fetch_interval
+        self._fetch_intervals: Dict[str, int] = {}
         self.data_source_service = None
+        self.market_stream = None
+        self._market_stream_task = None
+        # 限制同时执行的新闻拉取任务数
+        self._news_semaphore = asyncio.Semaphore(settings.NEWS_FETCH_MAX_SOURCES)
         self._setup_jobs()
 
     async def _init_data_sources(self):
         """初始化数据源服务"""
         try:
-            async with async_session_factory() as session:
+            async with self.session_factory() as session:
                 self.data_source_service = DataSourceService(session)
                 # 注册默认数据源
                 await self.data_source_service.register_default_sources()
@@ -43,35 +86,150 @@ class JobScheduler:
 
     def _setup_jobs(self):
         """设置定时任务"""
-        # 新闻数据获取任务
+        # 定期同步数据源，为每个活跃数据源维护独立的新闻拉取任务
         self.scheduler.add_job(
-            self._fetch_news_job,
-            CronTrigger(minute=f"*/{settings.BLOCKBEATS_FETCH_INTERVAL // 60}"),
-            id="fetch_news",
-            name="获取新闻数据",
+            self.sync_news_jobs,
+            IntervalTrigger(seconds=settings.NEWS_SOURCE_SYNC_INTERVAL),
+            id="sync_news_sources",
+            name="同步新闻数据源",
         )
+        # 定期通过 REST 拉取K线，同时补齐 websocket 断线期间缺失的K线
+        if settings.MARKET_FETCH_ENABLED:
+            self.scheduler.add_job(
+                self._fetch_market_job,
+                IntervalTrigger(seconds=settings.MARKET_FETCH_INTERVAL),
+                id="fetch_market",
+                name="获取K线数据",
+                max_instances=1,
+                coalesce=True,
+            )
+        if settings.NEWS_ENRICH_ENABLED:
+            self.scheduler.add_job(
+                self._enrich_news_job,
+                IntervalTrigger(seconds=settings.NEWS_ENRICH_INTERVAL),
+                id="enrich_news",
+                name="新闻摘要与情绪分析",
+                max_instances=1,
+                coalesce=True,
+            )
+        if settings.LLM_ANALYSIS_ENABLED:
+            self.scheduler.add_job(
+                self._market_analysis_job,
+                IntervalTrigger(seconds=settings.LLM_ANALYSIS_INTERVAL),
+                id="analyze_market",
+                name="LLM市场分析",
+                max_instances=1,
+                coalesce=True,
+            )
 
-    async def _fetch_news_job(self):
-        """新闻数据获取任务"""
+    async def sync_news_jobs(self) -> None:
+        """
+        按数据库中的活跃数据源增删新闻拉取任务
+
+        新增或重新激活的数据源添加任务，停用或删除的数据源移除任务，
+        fetch_interval 变化时按新间隔重新调度。自适应模式下使用
+        轮询控制器当前的间隔。
+        """
         try:
-            async with async_session_factory() as session:
-                service = DataSourceService(session)
-                # 获取所有活跃的数据源
-                sources = await service.repository.get_active_sources()
-                for source in sources:
-                    try:
-                        await service.fetch_and_save_news(source.name)
-                        logger.info("新闻数据获取任务完成", source=source.name)
-                    except Exception as e:
-                        logger.error("新闻数据获取任务失败", source=source.name, error=str(e))
+            async with self.session_factory() as session:
+                sources = await DataSourceRepository(session).get_active_sources()
         except Exception as e:
-            logger.error("新闻数据获取任务失败", error=str(e))
+            logger.error("同步新闻数据源失败", error=str(e))
+            return
+
+        self._fetch_intervals = {
+            source.name: source.fetch_interval for source in sources
+        }
+        intervals = {
+            name: self._poll_interval(name) for name in self._fetch_intervals
+        }
+        for job in self.scheduler.get_jobs():
+            if not job.id.startswith(NEWS_JOB_PREFIX):
+                continue
+            name = job.id[len(NEWS_JOB_PREFIX):]
+            interval = intervals.pop(name, None)
+            if interval is None:
+                job.remove()
+                logger.info("移除新闻拉取任务", source=name)
+            else:
+                self._reschedule(name, interval)
+
+        for name, interval in intervals.items():
+            self.scheduler.add_job(
+                self._fetch_news_job,
+                IntervalTrigger(seconds=interval),
+                args=[name],
+                id=f"{NEWS_JOB_PREFIX}{name}",
+                name=f"获取新闻数据: {name}",
+                max_instances=1,
+                coalesce=True,
+            )
+            logger.info("添加新闻拉取任务", source=name, interval=interval)
+
+    def _poll_interval(self, source_name: str) -> int:
+        """数据源当前的轮询间隔（秒）"""
+        default = self._fetch_intervals.get(source_name, settings.FETCH_NEWS_INTERVAL)
+        if not self.adaptive:
+            return default
+        return round(self.poller.interval(source_name, default))
+
+    async def _fetch_news_job(self, source_name: str):
+        """单个数据源的新闻数据获取任务（独立会话，受全局并发数限制）"""
+        async with self._news_semaphore:
+            try:
+                async with self.session_factory() as session:
+                    service = DataSourceService(session)
+                    inserted = await service.fetch_and_save_news(source_name)
+                logger.info("新闻数据获取任务完成", source=source_name)
+            except Exception as e:
+                logger.error("新闻数据获取任务失败", source=source_name, error=str(e))
+                return
+
+        if self.adaptive:
+            default = self._fetch_intervals.get(
+                source_name, settings.FETCH_NEWS_INTERVAL
+            )
+            self.poller.observe(source_name, inserted, default)
+            self._reschedule(source_name, self._poll_interval(source_name))
+
+    async def _fetch_market_job(self):
+        """K线数据获取任务"""
+        try:
+            async with self.session_factory() as session:
+                await fetch_market_data(session, self.market_ingestor)
+        except Exception as e:
+            logger.error("K线数据获取任务失败", error=str(e))
+
+    async def _enrich_news_job(self):
+        """新闻摘要与情绪分析任务"""
+        try:
+            await self.enrichment.run_once()
+        except Exception as e:
+            logger.error("新闻处理任务失败", error=str(e))
+
+    async def _market_analysis_job(self):
+        """多交易对市场分析任务"""
+        try:
+            await self.market_analysis.run_once()
+        except Exception as e:
+            logger.error("市场分析任务失败", error=str(e))
+
+    def _reschedule(self, source_name: str, interval: int) -> None:
+        """间隔变化时重新调度数据源的拉取任务"""
+        job = self.scheduler.get_job(f"{NEWS_JOB_PREFIX}{source_name}")
+        if job and job.trigger.interval.total_seconds() != interval:
+            job.reschedule(IntervalTrigger(seconds=interval))
+            logger.info("调整新闻拉取间隔", source=source_name, interval=interval)
 
     async def start(self):
         """启动调度器"""
         try:
             await self._init_data_sources()
+            await self.sync_news_jobs()
             self.scheduler.start()
+            if settings.MARKET_STREAM_ENABLED:
+                self.market_stream = KlineStreamIngestor()
+                self._market_stream_task = asyncio.create_task(self.market_stream.run())
             logger.info("任务调度器已启动")
         except Exception as e:
             logger.error("调度器启动失败", error=str(e))
@@ -81,6 +239,10 @@ class JobScheduler:
         """关闭调度器"""
         try:
             self.scheduler.shutdown()
+            if self.market_stream:
+                await self.market_stream.stop()
+            await self.market_ingestor.close()
+            await get_http_client().close()
             logger.info("任务调度器已关闭")
         except Exception as e:
             logger.error("调度器关闭失败", error=str(e))
@@ -0,0 +1,67 @@
+from datetime import datetime, timedelta
+
+import httpx
+
+from app.api.app import app
+from app.core.db import get_db
+from app.datasource.models.datasource import DataSource
+from app.datasource.models.market import News
+from app.datasource.repositories.market import MarketRepository
+from benchmarks.harness import Timer, benchmark, memory_session
+
+ENDPOINTS = {
+    "news": ("/api/data/news", {"limit": 50}),
+    "klines": ("/api/data/klines", {"symbol": "BTCUSDT", "limit": 500}),
+    "sources": ("/api/data/sources", {}),
+    "indicators": ("/api/data/indicators", {"symbol": "BTCUSDT"}),
+}
+
+
+async def seed(session, rows: int) -> None:
+    """写入K线、新闻与数据源"""
+    start = datetime(2024, 1, 1)
+    await MarketRepository(session).upsert_klines([
+        {
+            "symbol": "BTCUSDT", "timestamp": start + timedelta(minutes=i),
+            "open": 1.0 + i, "high": 2.0 + i, "low": 0.5 + i, "close": 1.5 + i,
+            "volume": 10.0,
+        }
+        for i in range(rows)
+    ])
+    session.add_all([
+        News(
+            title=f"新闻 {i}", content="内容", link=f"https://example.com/{i}",
+            create_time=start + timedelta(minutes=i), type="push",
+            source="blockbeats",
+        )
+        for i in range(rows)
+    ])
+    session.add(DataSource(name="blockbeats", type="blockbeats", api_url="http://x"))
+    await session.commit()
+
+
+@benchmark(
+    "api.endpoints",
+    quick={"endpoint": list(ENDPOINTS)},
+    endpoint=list(ENDPOINTS),
+)
+async def bench_endpoints(timer: Timer, endpoint: str) -> None:
+    path, params = ENDPOINTS[endpoint]
+    async with memory_session() as session:
+        await seed(session, 1_000)
+
+        async def override_get_db():
+            yield session
+
+        app.dependency_overrides[get_db] = override_get_db
+        transport = httpx.ASGITransport(app=app)
+        try:
+            async with httpx.AsyncClient(
+                transport=transport, base_url="http://bench"
+            ) as client:
+                with timer:
+                    for _ in range(50):
+                        response = await client.get(path, params=params)
+                        response.raise_for_status()
+        finally:
+            app.dependency_overrides.clear()
@@ -0,0 +1,63 @@
+from aiohttp import web
+
+from app.core.http import HttpClientManager
+from app.datasource.adapters.blockbeats import BlockBeatsAdapter
+from app.datasource.models.datasource import DataSource
+from benchmarks.harness import Timer, benchmark
+
+
+def make_payload(size: int) -> dict:
+    """构造 BlockBeats 快讯接口响应"""
+    return {
+        "status": 0,
+        "message": "",
+        "data": {
+            "page": 1,
+            "data": [
+                {
+                    "id": i,
+                    "title": f"快讯标题 {i}",
+                    "content": f"<p>快讯内容 {i}</p>" * 10,
+                    "link": f"https://www.theblockbeats.info/flash/{i}",
+                    "create_time": str(1704067200 + i),
+                    "type": "push",
+                }
+                for i in range(size)
+            ],
+        },
+    }
+
+
+@benchmark(
+    "blockbeats.fetch_news",
+    quick={"size": [100]},
+    size=[10, 100, 1_000],
+)
+async def bench_fetch_news(timer: Timer, size: int) -> None:
+    payload = make_payload(size)
+
+    async def handler(request: web.Request) -> web.Response:
+        return web.json_response(payload)
+
+    app = web.Application()
+    app.router.add_get("/v1/open-api/open-flash", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+
+    source = DataSource(
+        name="blockbeats",
+        type="blockbeats",
+        api_url=f"http://127.0.0.1:{port}/v1/open-api/open-flash",
+    )
+    http = HttpClientManager()
+    adapter = BlockBeatsAdapter(source, http=http)
+    try:
+        with timer:
+            news = await adapter.fetch_news(size=size)
+        assert len(news) == size
+    finally:
+        await http.close()
+        await runner.cleanup()
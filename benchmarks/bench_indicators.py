@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+
+from app.core.indicators import TechnicalIndicators
+from benchmarks.harness import Timer, benchmark
+
+_FRAMES = {}
+
+
+def make_ohlcv(rows: int, seed: int = 7) -> pd.DataFrame:
+    """生成模拟1分钟K线（同一规模只生成一次）"""
+    if rows not in _FRAMES:
+        rng = np.random.default_rng(seed)
+        close = 30000 + rng.standard_normal(rows).cumsum() * 50
+        _FRAMES[rows] = pd.DataFrame({
+            "open": close + rng.standard_normal(rows),
+            "high": close + rng.random(rows) * 20,
+            "low": close - rng.random(rows) * 20,
+            "close": close,
+            "volume": rng.random(rows) * 100,
+        }, index=pd.date_range("2024-01-01", periods=rows, freq="1min"))
+    return _FRAMES[rows]
+
+
+@benchmark(
+    "indicators.calculate_all",
+    quick={"rows": [1_000, 100_000]},
+    rows=[1_000, 10_000, 100_000, 1_000_000],
+)
+async def bench_calculate_all(timer: Timer, rows: int) -> None:
+    df = make_ohlcv(rows)
+    with timer:
+        TechnicalIndicators(df).calculate_all()
+
+
+@benchmark(
+    "indicators.get_market_sentiment",
+    quick={"rows": [1_000]},
+    rows=[1_000, 100_000],
+)
+async def bench_market_sentiment(timer: Timer, rows: int) -> None:
+    indicators = TechnicalIndicators(make_ohlcv(rows))
+    indicators.calculate_all()
+    with timer:
+        for _ in range(100):
+            indicators.get_market_sentiment()
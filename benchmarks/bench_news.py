@@ -0,0 +1,41 @@
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from app.datasource.repositories.datasource import DataSourceRepository
+from benchmarks.harness import Timer, benchmark, memory_session
+
+
+def make_news(count: int, offset: int = 0) -> List[Dict[str, Any]]:
+    """生成与 BlockBeatsAdapter.fetch_news 输出格式一致的新闻"""
+    base = datetime(2024, 1, 1)
+    return [
+        {
+            "title": f"新闻标题 {i}",
+            "content": f"新闻内容 {i} " * 20,
+            "link": f"https://www.theblockbeats.info/flash/{i}",
+            "publishTime": base + timedelta(seconds=i),
+            "type": "push",
+            "source": "blockbeats",
+            "status": "pending",
+            "processed_at": None,
+        }
+        for i in range(offset, offset + count)
+    ]
+
+
+@benchmark(
+    "news.save_news",
+    quick={"items": [100], "duplicates": [0.0, 0.9]},
+    items=[10, 100, 1_000, 10_000],
+    duplicates=[0.0, 0.5, 0.9],
+)
+async def bench_save_news(timer: Timer, items: int, duplicates: float) -> None:
+    # 先写入一部分新闻，使本批中 duplicates 比例为已存在的新闻
+    existing = int(items * duplicates)
+    async with memory_session() as session:
+        repository = DataSourceRepository(session)
+        if existing:
+            await repository.save_news(make_news(existing), "blockbeats")
+        batch = make_news(items)
+        with timer:
+            await repository.save_news(batch, "blockbeats")
@@ -0,0 +1,226 @@
+import itertools
+import json
+import platform
+import statistics
+import time
+from contextlib import asynccontextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.core.db import Base
+
+# 导入所有模型，确保建表时元数据完整
+from app.datasource.models import datasource, market  # noqa: F401
+
+BenchmarkFunc = Callable[..., Awaitable[None]]
+
+
+class Timer:
+    """只统计 with 块内的耗时，块外的准备工作不计入结果"""
+
+    def __init__(self):
+        self.samples: List[float] = []
+        self._start = 0.0
+
+    def __enter__(self) -> "Timer":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.samples.append(time.perf_counter() - self._start)
+
+
+class Benchmark:
+    """一个基准测试及其参数组合"""
+
+    def __init__(
+        self,
+        name: str,
+        func: BenchmarkFunc,
+        params: Dict[str, List[Any]],
+        quick: Dict[str, List[Any]],
+    ):
+        self.name = name
+        self.func = func
+        self.params = params
+        self.quick = quick
+
+    def cases(self, quick: bool = False) -> List[Dict[str, Any]]:
+        """展开参数组合，quick 模式下使用精简参数"""
+        params = {**self.params, **self.quick} if quick else self.params
+        keys = list(params)
+        combinations = itertools.product(*params.values())
+        return [dict(zip(keys, values)) for values in combinations]
+
+    def case_id(self, params: Dict[str, Any]) -> str:
+        if not params:
+            return self.name
+        args = ",".join(f"{key}={value}" for key, value in params.items())
+        return f"{self.name}[{args}]"
+
+
+BENCHMARKS: Dict[str, Benchmark] = {}
+
+
+def benchmark(
+    name: str, quick: Optional[Dict[str, List[Any]]] = None, **params: List[Any]
+) -> Callable[[BenchmarkFunc], BenchmarkFunc]:
+    """
+    注册基准测试
+
+    被装饰的函数签名为 async def func(timer, **params)，每轮调用一次，
+    在 with timer: 中执行被测代码。
+
+    Args:
+        name: 基准测试名称
+        quick: quick 模式下覆盖的参数
+        **params: 参数名 -> 取值列表，按笛卡尔积展开
+
+    Returns:
+        Callable: 装饰器
+    """
+    def decorator(func: BenchmarkFunc) -> BenchmarkFunc:
+        BENCHMARKS[name] = Benchmark(name, func, params, quick or {})
+        return func
+
+    return decorator
+
+
+async def run_case(
+    bench: Benchmark,
+    params: Dict[str, Any],
+    min_rounds: int = 3,
+    min_time: float = 0.5,
+    max_time: float = 10.0,
+) -> Dict[str, Any]:
+    """
+    重复执行一个用例直到满足轮数与时间要求
+
+    Args:
+        bench: 基准测试
+        params: 参数
+        min_rounds: 最少轮数
+        min_time: 最少累计耗时（秒）
+        max_time: 累计耗时超过该值后不再追加轮数（至少执行一轮）
+
+    Returns:
+        Dict[str, Any]: median/min/mean（秒）与 rounds
+    """
+    timer = Timer()
+    while True:
+        await bench.func(timer, **params)
+        total = sum(timer.samples)
+        rounds = len(timer.samples)
+        if total >= max_time or (rounds >= min_rounds and total >= min_time):
+            break
+
+    return {
+        "median": statistics.median(timer.samples),
+        "min": min(timer.samples),
+        "mean": statistics.fmean(timer.samples),
+        "rounds": len(timer.samples),
+    }
+
+
+async def run_all(
+    quick: bool = False,
+    select: Optional[str] = None,
+    report: Callable[[str, Dict[str, Any]], None] = lambda case, result: None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    执行全部基准测试
+
+    Args:
+        quick: 是否使用精简参数
+        select: 只执行名称包含该字符串的基准测试
+        report: 每个用例完成后的回调
+
+    Returns:
+        Dict[str, Dict[str, Any]]: 用例 -> 结果
+    """
+    results: Dict[str, Dict[str, Any]] = {}
+    for bench in BENCHMARKS.values():
+        if select and select not in bench.name:
+            continue
+        for params in bench.cases(quick):
+            case = bench.case_id(params)
+            results[case] = await run_case(bench, params)
+            report(case, results[case])
+    return results
+
+
+def compare(
+    results: Dict[str, Dict[str, Any]],
+    baseline: Dict[str, Dict[str, Any]],
+    tolerance: float = 0.5,
+) -> List[Dict[str, Any]]:
+    """
+    与基线比较中位耗时
+
+    Args:
+        results: 本次结果
+        baseline: 基线结果
+        tolerance: 允许的变慢比例，超出视为退化
+
+    Returns:
+        List[Dict[str, Any]]: 每个共有用例的 case/baseline/current/ratio/regressed
+    """
+    rows = []
+    for case, result in results.items():
+        if case not in baseline:
+            continue
+        base = baseline[case]["median"]
+        ratio = result["median"] / base if base else float("inf")
+        rows.append({
+            "case": case,
+            "baseline": base,
+            "current": result["median"],
+            "ratio": ratio,
+            "regressed": ratio > 1 + tolerance,
+        })
+    return rows
+
+
+def load_baseline(path: Path) -> Dict[str, Dict[str, Any]]:
+    """读取基线文件中的结果"""
+    return json.loads(path.read_text(encoding="utf-8"))["results"]
+
+
+def save_baseline(path: Path, results: Dict[str, Dict[str, Any]]) -> None:
+    """保存基线文件，已有基线中未执行的用例予以保留"""
+    merged = load_baseline(path) if path.exists() else {}
+    merged.update(results)
+    payload = {
+        "meta": {
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "updated_at": datetime.utcnow().isoformat(timespec="seconds"),
+        },
+        "results": dict(sorted(merged.items())),
+    }
+    path.write_text(
+        json.dumps(payload, indent=2, ensure_ascii=False) + "\n", encoding="utf-8"
+    )
+
+
+@asynccontextmanager
+async def memory_session() -> AsyncIterator[AsyncSession]:
+    """创建建好表的内存 SQLite 会话（与测试环境一致）"""
+    engine = create_async_engine(
+        "sqlite+aiosqlite:///:memory:",
+        connect_args={"check_same_thread": False},
+        poolclass=StaticPool,
+    )
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    try:
+        async with factory() as session:
+            yield session
+    finally:
+        await engine.dispose()
@@ -0,0 +1,70 @@
+import argparse
+import asyncio
+import logging
+import sys
+from pathlib import Path
+
+import structlog
+
+# 注册全部基准测试
+from benchmarks import (  # noqa: F401
+    bench_api,
+    bench_blockbeats,
+    bench_indicators,
+    bench_news,
+)
+from benchmarks.harness import compare, load_baseline, run_all, save_baseline
+
+BASELINE = Path(__file__).with_name("baseline.json")
+
+
+def report(case: str, result: dict) -> None:
+    print(
+        f"{case:<60} median={result['median'] * 1000:10.3f}ms "
+        f"min={result['min'] * 1000:10.3f}ms rounds={result['rounds']}"
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="离线性能基准测试")
+    parser.add_argument("--quick", action="store_true", help="只执行精简参数")
+    parser.add_argument("-k", dest="select", help="只执行名称包含该字符串的基准测试")
+    parser.add_argument("--baseline", type=Path, default=BASELINE, help="基线文件")
+    parser.add_argument("--save", action="store_true", help="将结果写入基线文件")
+    parser.add_argument(
+        "--compare", action="store_true", help="与基线比较，出现退化时返回非零"
+    )
+    parser.add_argument(
+        "--tolerance", type=float, default=0.5, help="允许的变慢比例（默认 0.5）"
+    )
+    args = parser.parse_args()
+
+    # 基准测试期间只输出警告以上的日志
+    structlog.configure(
+        wrapper_class=structlog.make_filtering_bound_logger(logging.WARNING)
+    )
+    results = asyncio.run(run_all(args.quick, args.select, report))
+
+    exit_code = 0
+    if args.compare:
+        if not args.baseline.exists():
+            print(f"基线文件不存在: {args.baseline}")
+            return 1
+        rows = compare(results, load_baseline(args.baseline), args.tolerance)
+        print()
+        for row in rows:
+            status = "退化" if row["regressed"] else "正常"
+            print(f"{row['case']:<60} x{row['ratio']:.2f} {status}")
+        regressed = [row for row in rows if row["regressed"]]
+        if regressed:
+            print(f"\n{len(regressed)} 个用例相对基线变慢超过 {args.tolerance:.0%}")
+            exit_code = 1
+
+    if args.save:
+        save_baseline(args.baseline, results)
+        print(f"\n基线已写入 {args.baseline}")
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
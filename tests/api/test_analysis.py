@@ -0,0 +1,101 @@
+import json
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+from app.api.app import app
+from app.api.endpoints.analysis import get_analyzer
+from app.core.db import get_db
+from app.core.streaming import stream_analysis
+from app.datasource.repositories.market import MarketRepository
+
+
+class FakeStreamingAnalyzer:
+    """本地假分析器：把固定报告逐字流式输出，可指定中途失败"""
+
+    def __init__(self, report, fail_after=None):
+        self.report = report
+        self.fail_after = fail_after
+        self.calls = []
+
+    async def stream_market(self, market_data, indicators, news, symbol):
+        self.calls.append((symbol, market_data))
+
+        async def chunks():
+            for i, char in enumerate(self.report):
+                if self.fail_after is not None and i >= self.fail_after:
+                    raise RuntimeError("stream interrupted")
+                yield char
+
+        async for event in stream_analysis(chunks(), 100):
+            yield event
+
+
+@pytest.fixture
+async def client(session):
+    async def override_get_db():
+        yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+    app.dependency_overrides.clear()
+
+
+def parse_sse(body):
+    events = []
+    for message in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in message.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+async def seed_klines(session, symbol):
+    start = datetime(2024, 4, 1)
+    await MarketRepository(session).upsert_klines([
+        {
+            "symbol": symbol, "timestamp": start + timedelta(minutes=i),
+            "open": 100.0 + i, "high": 101.0 + i, "low": 99.0 + i,
+            "close": 100.5 + i, "volume": 1.0,
+        }
+        for i in range(80)
+    ])
+
+
+async def test_stream_analysis_sends_sentiment_before_report(client, session):
+    """测试 SSE 流在报告输出早期给出情绪，最后返回完整结果"""
+    report = "市场情绪：看涨。" + "价格站上均线，成交量放大。" * 20 + "置信度 80%"
+    analyzer = FakeStreamingAnalyzer(report)
+    app.dependency_overrides[get_analyzer] = lambda: analyzer
+    await seed_klines(session, "SSEUSDT")
+
+    response = await client.get("/api/analysis/stream", params={"symbol": "SSEUSDT"})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = parse_sse(response.text)
+    names = [name for name, _ in events]
+    assert names.index("sentiment") < 10 < len(names)
+    assert events[names.index("sentiment")][1] == "看涨"
+    assert events[-1] == ("done", {
+        "analysis": report, "sentiment": "看涨", "confidence": 80, "prompt_tokens": 100
+    })
+    symbol, market = analyzer.calls[0]
+    assert symbol == "SSEUSDT" and market["volume"] == 60.0
+
+
+async def test_stream_analysis_errors(client, session):
+    """测试没有K线数据时返回 404，流式输出中途失败时发送 error 事件"""
+    app.dependency_overrides[get_analyzer] = lambda: FakeStreamingAnalyzer(
+        "看跌，置信度 30%", fail_after=3
+    )
+    response = await client.get("/api/analysis/stream", params={"symbol": "NOPEUSDT"})
+    assert response.status_code == 404
+
+    await seed_klines(session, "ERRUSDT")
+    response = await client.get("/api/analysis/stream", params={"symbol": "ERRUSDT"})
+    events = parse_sse(response.text)
+    assert ("sentiment", "看跌") in events
+    assert events[-1] == ("error", {"detail": "stream interrupted"})
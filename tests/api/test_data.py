@@ -0,0 +1,255 @@
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+from app.api.app import app
+from app.core.config import settings
+from app.core.db import get_db
+from app.core.kline_store import KlineStore
+from app.datasource.polling import get_news_poller
+from app.datasource.repositories.market import MarketRepository
+from app.datasource.services.datasource import DataSourceService
+from app.jobs.rollup_market import KlineRollup
+
+
+@pytest.fixture
+async def client(session):
+    async def override_get_db():
+        yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+    app.dependency_overrides.clear()
+
+
+async def test_get_klines_by_interval(client, session):
+    """测试按周期查询K线"""
+    start = datetime(2024, 1, 1)
+    klines = [
+        {
+            "symbol": "BTCUSDT", "timestamp": start + timedelta(minutes=i),
+            "open": 1.0 + i, "high": 2.0 + i, "low": 0.5, "close": 1.5 + i,
+            "volume": 1.0,
+        }
+        for i in range(10)
+    ]
+    await MarketRepository(session).upsert_klines(klines)
+    await KlineRollup(["5m"]).rollup(session, klines)
+
+    response = await client.get("/api/data/klines", params={"limit": 3})
+    assert response.status_code == 200
+    assert [k["close"] for k in response.json()] == [10.5, 9.5, 8.5]
+
+    response = await client.get(
+        "/api/data/klines", params={"interval": "5m", "symbol": "BTCUSDT"}
+    )
+    bars = response.json()
+    assert [bar["volume"] for bar in bars] == [5.0, 5.0]
+    assert bars[0]["open"] == 6.0 and bars[0]["close"] == 10.5
+
+    response = await client.get("/api/data/klines", params={"interval": "7m"})
+    assert response.status_code == 422
+
+
+async def test_get_klines_from_store(client, session, tmp_path, monkeypatch):
+    """测试配置列式缓存后按时间范围从缓存读取K线"""
+    store = KlineStore(tmp_path)
+    monkeypatch.setattr("app.api.endpoints.data.get_kline_store", lambda: store)
+    start = datetime(2024, 1, 1)
+    store.append("BTCUSDT", "1m", [
+        {
+            "timestamp": start + timedelta(minutes=i),
+            "open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5 + i, "volume": 1.0,
+        }
+        for i in range(10)
+    ])
+
+    response = await client.get("/api/data/klines", params={
+        "symbol": "BTCUSDT",
+        "start": "2024-01-01T00:02:00",
+        "end": "2024-01-01T00:06:00",
+        "limit": 3,
+    })
+    bars = response.json()
+    assert [bar["close"] for bar in bars] == [6.5, 5.5, 4.5]
+    assert bars[0]["timestamp"] == "2024-01-01T00:05:00"
+
+
+async def test_get_klines_partial_store_falls_back(
+    client, session, tmp_path, monkeypatch
+):
+    """测试缓存只有部分历史时，早于缓存首根K线的请求回退到数据库"""
+    store = KlineStore(tmp_path)
+    monkeypatch.setattr("app.api.endpoints.data.get_kline_store", lambda: store)
+    start = datetime(2024, 1, 1)
+    bars = [
+        {
+            "symbol": "BTCUSDT", "timestamp": start + timedelta(minutes=i),
+            "open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5 + i, "volume": 1.0,
+        }
+        for i in range(10)
+    ]
+    await MarketRepository(session).upsert_klines(bars)
+    store.append("BTCUSDT", "1m", bars[6:])
+
+    params = {"symbol": "BTCUSDT", "start": "2024-01-01T00:02:00", "limit": 20}
+    response = await client.get("/api/data/klines", params=params)
+    assert len(response.json()) == 8
+
+    response = await client.get("/api/data/klines", params={
+        "symbol": "BTCUSDT", "limit": 6,
+    })
+    assert [bar["close"] for bar in response.json()][-1] == 5.5
+
+    # 缓存覆盖请求范围时从缓存读取
+    response = await client.get("/api/data/klines", params={
+        "symbol": "BTCUSDT", "limit": 3,
+    })
+    assert [bar["close"] for bar in response.json()] == [10.5, 9.5, 8.5]
+
+
+async def test_get_klines_stale_store_falls_back(
+    client, session, tmp_path, monkeypatch
+):
+    """测试缓存最新K线落后于数据库时回退到数据库"""
+    store = KlineStore(tmp_path)
+    monkeypatch.setattr("app.api.endpoints.data.get_kline_store", lambda: store)
+    start = datetime(2024, 1, 1)
+    bars = [
+        {
+            "symbol": "BTCUSDT", "timestamp": start + timedelta(minutes=i),
+            "open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5 + i, "volume": 1.0,
+        }
+        for i in range(10)
+    ]
+    await MarketRepository(session).upsert_klines(bars)
+    # 缓存中的收盘价与数据库不同，用于区分读取来源
+    store.append("BTCUSDT", "1m", [
+        {**bar, "close": bar["close"] + 100} for bar in bars[:8]
+    ])
+
+    response = await client.get("/api/data/klines", params={
+        "symbol": "BTCUSDT", "limit": 3,
+    })
+    assert [bar["close"] for bar in response.json()] == [10.5, 9.5, 8.5]
+
+    params = {"symbol": "BTCUSDT", "start": "2024-01-01T00:05:00", "limit": 20}
+    response = await client.get("/api/data/klines", params=params)
+    assert len(response.json()) == 5
+
+    # 请求范围内缓存与数据库一致时仍从缓存读取
+    params["end"] = "2024-01-01T00:08:00"
+    response = await client.get("/api/data/klines", params=params)
+    assert [bar["close"] for bar in response.json()] == [108.5, 107.5, 106.5]
+
+
+async def test_get_indicators(client, session):
+    """测试指标接口：数据不足的指标返回 null，重复请求命中缓存"""
+    start = datetime(2024, 1, 1)
+    await MarketRepository(session).upsert_klines([
+        {
+            "symbol": "SOLUSDT", "timestamp": start + timedelta(minutes=i),
+            "open": 1.0, "high": 2.0, "low": 0.5, "close": 1.0 + i, "volume": 1.0,
+        }
+        for i in range(10)
+    ])
+
+    response = await client.get("/api/data/indicators", params={"symbol": "SOLUSDT"})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["ma5"] == 8.0 and body["ma20"] is None
+    assert body["sentiment"] == "中性"
+
+    hits = (await client.get("/api/data/indicators/cache")).json()["hits"]
+    await client.get("/api/data/indicators", params={"symbol": "SOLUSDT"})
+    assert (await client.get("/api/data/indicators/cache")).json()["hits"] == hits + 1
+
+    response = await client.get("/api/data/indicators", params={"symbol": "XRPUSDT"})
+    assert response.status_code == 404
+
+
+async def test_get_sources_reports_current_interval(client, session, monkeypatch):
+    """测试数据源状态包含配置间隔与自适应轮询的当前间隔"""
+    await DataSourceService(session).register_source(
+        "polled", "blockbeats", "http://polled", fetch_interval=300
+    )
+    response = await client.get("/api/data/sources")
+    source = response.json()[0]
+    assert source["fetch_interval"] == 300
+    assert source["current_interval"] == 300
+
+    monkeypatch.setattr(settings, "NEWS_POLL_ADAPTIVE", True)
+    get_news_poller().observe("polled", 0, 300)
+    response = await client.get("/api/data/sources")
+    source = response.json()[0]
+    assert source["current_interval"] == 450
+    assert source["arrival_rate"] == 0
+
+
+async def test_get_news_collapses_clusters(client, session):
+    """测试 collapse 时每个近似重复聚类只返回代表条目"""
+    base = datetime(2024, 1, 1)
+    news = [
+        {"title": f"新闻{i}", "content": "", "link": f"https://example.com/{i}",
+         "publishTime": base + timedelta(minutes=i)}
+        for i in range(3)
+    ]
+    repository = DataSourceService(session).repository
+    await repository.save_news(news[:1], "a")
+    rows = await client.get("/api/data/news")
+    news[1]["cluster_id"] = rows.json()[0]["cluster_id"]
+    await repository.save_news(news[1:], "b")
+
+    response = await client.get("/api/data/news", params={"limit": 10})
+    assert len(response.json()) == 3
+    response = await client.get(
+        "/api/data/news", params={"limit": 10, "collapse": True}
+    )
+    assert [n["title"] for n in response.json()] == ["新闻2", "新闻0"]
+
+
+async def test_search_news_paginates_with_cursor(client, session):
+    """测试检索接口按时间排序分页，游标无效时返回400"""
+    base = datetime(2024, 1, 1)
+    await DataSourceService(session).repository.save_news([
+        {"title": f"BTC ETF 资金流入 {i}", "content": "", "link": f"https://e.com/{i}",
+         "publishTime": base + timedelta(minutes=i)}
+        for i in range(5)
+    ], "blockbeats")
+
+    titles, cursor = [], None
+    while True:
+        params = {"q": "ETF", "order": "time", "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        page = (await client.get("/api/data/news/search", params=params)).json()
+        titles += [item["title"] for item in page["items"]]
+        cursor = page["next_cursor"]
+        if not cursor:
+            break
+    assert titles == [f"BTC ETF 资金流入 {i}" for i in range(4, -1, -1)]
+
+    response = await client.get(
+        "/api/data/news/search", params={"q": "ETF", "cursor": "bad"}
+    )
+    assert response.status_code == 400
+
+
+async def test_get_news_enrichment_stats(client, session):
+    """测试新闻处理统计包含各状态数量与吞吐量"""
+    await DataSourceService(session).repository.save_news([
+        {
+            "title": f"新闻{i}", "content": "正文", "link": f"https://a/{i}",
+            "publishTime": datetime(2024, 6, 1, 0, i), "type": "push",
+        }
+        for i in range(3)
+    ], "blockbeats")
+
+    response = await client.get("/api/data/news/enrichment")
+    assert response.status_code == 200
+    body = response.json()
+    assert body["status"] == {"pending": 3}
+    assert {"done", "failed", "items_per_minute", "items_per_dollar"} <= set(body)
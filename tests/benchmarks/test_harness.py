@@ -0,0 +1,44 @@
+from benchmarks.harness import (
+    Benchmark,
+    compare,
+    load_baseline,
+    run_case,
+    save_baseline,
+)
+
+
+async def test_run_case_times_only_timer_block():
+    """测试只统计 with timer 块内耗时，并按参数展开用例"""
+    calls = []
+
+    async def func(timer, size):
+        calls.append(size)
+        with timer:
+            pass
+
+    bench = Benchmark("demo", func, {"size": [1, 2]}, {"size": [1]})
+    assert [bench.case_id(p) for p in bench.cases()] == ["demo[size=1]", "demo[size=2]"]
+    assert bench.cases(quick=True) == [{"size": 1}]
+
+    result = await run_case(bench, {"size": 1}, min_rounds=5, min_time=0)
+    assert result["rounds"] == 5 and calls == [1] * 5
+    assert result["min"] <= result["median"] < 0.01
+
+
+def test_compare_and_save_baseline(tmp_path):
+    """测试基线保存合并与退化判断"""
+    path = tmp_path / "baseline.json"
+    save_baseline(path, {"a": {"median": 1.0}, "b": {"median": 2.0}})
+    save_baseline(path, {"a": {"median": 1.2}})
+    baseline = load_baseline(path)
+    assert baseline == {"a": {"median": 1.2}, "b": {"median": 2.0}}
+
+    rows = compare(
+        {"a": {"median": 1.5}, "b": {"median": 3.5}, "c": {"median": 1.0}},
+        baseline,
+        tolerance=0.5,
+    )
+    assert [(row["case"], row["regressed"]) for row in rows] == [
+        ("a", False),
+        ("b", True),
+    ]
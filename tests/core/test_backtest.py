@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+from app.core.backtest import SentimentBacktest, SentimentRules
+from app.core.indicator_panel import IndicatorPanel
+from app.core.indicators import TechnicalIndicators
+
+
+def make_panel(n: int = 300, symbols=("BTCUSDT", "ETHUSDT")) -> IndicatorPanel:
+    rng = np.random.default_rng(7)
+    index = pd.date_range("2024-01-01", periods=n, freq="1min")
+    frames = {}
+    for i, symbol in enumerate(symbols):
+        close = 100 * (i + 1) * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+        frames[symbol] = pd.DataFrame({
+            "open": close, "high": close * 1.01, "low": close * 0.99,
+            "close": close, "volume": rng.uniform(1, 10, n),
+        }, index=index)
+    return IndicatorPanel.from_frame(pd.concat(frames, names=["symbol", "timestamp"]))
+
+
+def test_positions_match_row_by_row_sentiment():
+    """测试向量化信号与逐根K线调用 get_market_sentiment 一致"""
+    panel = make_panel(80, symbols=("BTCUSDT",))
+    positions = SentimentBacktest(panel).positions(SentimentRules())["BTCUSDT"]
+
+    df = pd.DataFrame({col: frame["BTCUSDT"] for col, frame in panel.fields.items()})
+    expected = []
+    for end in range(1, len(df) + 1):
+        indicators = TechnicalIndicators(df.iloc[:end])
+        indicators.calculate_all()
+        sentiment = indicators.get_market_sentiment()
+        expected.append({"看涨": 1, "看跌": -1, "中性": 0}[sentiment])
+    assert positions.tolist() == expected
+
+
+def test_run_reports_pnl_and_drawdown():
+    """测试收益、命中率与回撤的计算"""
+    backtest = SentimentBacktest(make_panel(), fee=0.001)
+    result = backtest.run()
+    close = backtest.panel.fields["close"]
+
+    gross = result.positions * (close.shift(-1) / close - 1)
+    turnover = result.positions.diff().abs().fillna(result.positions.abs())
+    expected = (gross.fillna(0) - turnover * 0.001 + 1).prod() - 1
+    summary = result.summary()
+    np.testing.assert_allclose(summary["total_return"], expected)
+    assert (summary["max_drawdown"] <= 0).all()
+    assert summary["hit_rate"].between(0, 1).all()
+    assert (summary["signals"] > 0).all()
+
+
+def test_run_many_variants():
+    """测试多组阈值共用指标回测，且只做多时不会出现空头仓位"""
+    backtest = SentimentBacktest(make_panel())
+    results = backtest.run_many({
+        "default": SentimentRules(),
+        "strict": SentimentRules(bullish_score=3, bearish_score=-3),
+        "long_only": SentimentRules(allow_short=False),
+    })
+    default = results["default"].positions
+    strict = results["strict"].positions
+    assert (strict != 0).sum().sum() < (default != 0).sum().sum()
+    assert (results["long_only"].positions >= 0).all().all()
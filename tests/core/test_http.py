@@ -0,0 +1,101 @@
+import asyncio
+
+import pytest
+from aiohttp import web
+
+from app.core.http import HttpClientManager
+from app.datasource.adapters.blockbeats import BlockBeatsAdapter
+from app.datasource.models.datasource import DataSource
+
+
+@pytest.fixture
+async def url():
+    release = asyncio.Event()
+
+    async def handler(request: web.Request) -> web.Response:
+        if request.query.get("wait"):
+            await release.wait()
+        return web.json_response({"status": 0, "data": {"data": []}})
+
+    app = web.Application()
+    app.router.add_get("/flash", handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    yield f"http://127.0.0.1:{port}/flash", release
+    release.set()
+    await runner.cleanup()
+
+
+def make_adapter(url: str, http: HttpClientManager) -> BlockBeatsAdapter:
+    source = DataSource(name="blockbeats", type="blockbeats", api_url=url)
+    return BlockBeatsAdapter(source, http=http)
+
+
+async def test_adapters_share_pooled_connections(url):
+    """测试多个适配器共用连接池，关闭适配器后连接仍可复用"""
+    url, _ = url
+    http = HttpClientManager(limit=10, limit_per_host=2)
+    try:
+        for _ in range(3):
+            adapter = make_adapter(url, http)
+            assert await adapter.fetch() == {"status": 0, "data": {"data": []}}
+            await adapter.close()
+
+        stats = http.stats()
+        assert stats["requests"] == 3
+        assert stats["connections_created"] == 1
+        assert stats["connections_reused"] == 2
+        assert stats["in_flight"] == 0 and stats["queued"] == 0
+    finally:
+        await http.close()
+
+
+async def test_limit_per_host_and_queueing(url):
+    """测试单主机连接数上限：超出的请求排队等待空闲连接"""
+    url, release = url
+    http = HttpClientManager(limit=4, limit_per_host=2)
+    adapter = make_adapter(url, http)
+    try:
+        tasks = [asyncio.create_task(adapter.fetch(wait=1)) for _ in range(3)]
+        await asyncio.sleep(0.2)
+        stats = http.stats()
+        assert stats["in_flight"] == 3
+        assert stats["queued"] == 1
+
+        release.set()
+        await asyncio.gather(*tasks)
+        stats = http.stats()
+        assert stats["connections_created"] == 2
+        assert stats["in_flight"] == 0 and stats["queued"] == 0
+    finally:
+        await http.close()
+
+
+def test_session_from_another_loop_must_be_closed_first():
+    """测试会话未关闭时在另一个事件循环中使用会报错，而不是泄漏原会话"""
+    http = HttpClientManager()
+
+    async def open_session():
+        return http.session
+
+    loop = asyncio.new_event_loop()
+    try:
+        first = loop.run_until_complete(open_session())
+        with pytest.raises(RuntimeError, match="另一个事件循环"):
+            asyncio.run(open_session())
+        assert not first.closed
+
+        loop.run_until_complete(http.close())
+        assert first.closed
+    finally:
+        loop.close()
+
+    async def reopen():
+        session = http.session
+        await http.close()
+        return session
+
+    assert asyncio.run(reopen()) is not first
@@ -0,0 +1,147 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.incremental_indicators import (
+    IncrementalIndicatorEngine,
+    IncrementalIndicators,
+)
+from app.core.indicator_registry import INDICATORS, IndicatorPlan, IndicatorType
+from app.core.indicators import TechnicalIndicators
+
+
+def make_ohlcv(n: int = 500, seed: int = 7) -> pd.DataFrame:
+    """生成模拟K线数据"""
+    rng = np.random.default_rng(seed)
+    close = 30000 + rng.standard_normal(n).cumsum() * 50
+    # 插入平盘K线，覆盖 OBV/RSI 的零变化分支
+    close[100:103] = close[99]
+    return pd.DataFrame({
+        "open": close + rng.standard_normal(n),
+        "high": close + rng.random(n) * 20,
+        "low": close - rng.random(n) * 20,
+        "close": close,
+        "volume": rng.random(n) * 100,
+    })
+
+
+@pytest.fixture
+def ohlcv():
+    return make_ohlcv()
+
+
+def test_parity_with_batch(ohlcv):
+    """测试增量计算结果与批量计算一致"""
+    batch = TechnicalIndicators(ohlcv)
+    expected = batch.calculate_all()
+
+    state = IncrementalIndicators()
+    rows = [state.update(*row) for row in ohlcv[
+        ["open", "high", "low", "close", "volume"]
+    ].itertuples(index=False)]
+    actual = pd.DataFrame(rows)
+
+    columns = {
+        "ma5": "ma5",
+        "ma10": "ma10",
+        "ma20": "ma20",
+        "rsi": "rsi",
+        "macd": "macd",
+        "macd_signal": "macd_signal",
+        "macd_hist": "macd_hist",
+        "bb_lower": "bb_lower",
+        "bb_middle": "bb_middle",
+        "bb_upper": "bb_upper",
+        "obv": "obv",
+    }
+    for column, batch_column in columns.items():
+        np.testing.assert_allclose(
+            actual[column].to_numpy(),
+            expected[batch_column].to_numpy(dtype=float),
+            rtol=1e-9,
+            atol=1e-9,
+            err_msg=column,
+        )
+
+
+def test_custom_plan_parity(ohlcv):
+    """测试增量状态按指标计划构建，自定义周期与列名和批量计算一致"""
+    plan = IndicatorPlan([
+        {"type": "ema", "length": 12},
+        {"type": "macd", "name": "fast_macd", "fast": 6, "slow": 12, "signal": 4},
+        {"type": "sma", "length": 7, "source": "high"},
+        {"type": "rsi", "length": 7},
+        {"type": "bbands", "name": "band", "length": 7, "std": 2.5, "source": "high"},
+        {"type": "obv"},
+    ])
+    expected = plan.compute_frame(ohlcv)
+
+    state = IncrementalIndicators(plan)
+    rows = [state.update(*row) for row in ohlcv[
+        ["open", "high", "low", "close", "volume"]
+    ].itertuples(index=False)]
+    actual = pd.DataFrame(rows)
+    for column in plan.columns:
+        np.testing.assert_allclose(
+            actual[column].to_numpy(),
+            expected[column].to_numpy(),
+            rtol=1e-9,
+            atol=1e-9,
+            err_msg=column,
+        )
+
+
+def test_unsupported_plan_rejected(monkeypatch):
+    """测试计划包含没有增量实现的指标时在构建时报错"""
+    vwap = IndicatorType("vwap", lambda ctx, out: None, "vwap", ("",), {})
+    monkeypatch.setitem(INDICATORS, "vwap", vwap)
+    with pytest.raises(ValueError, match="不支持增量计算: vwap"):
+        IncrementalIndicators(IndicatorPlan([{"type": "vwap"}]))
+
+
+def test_sentiment_parity(ohlcv):
+    """测试每根K线的市场情绪与批量计算一致"""
+    state = IncrementalIndicators()
+    for row in ohlcv.iloc[:19].itertuples(index=False):
+        state.update(*row)
+        assert state.get_market_sentiment() == "中性"
+
+    for end in range(20, len(ohlcv) + 1, 23):
+        for row in ohlcv.iloc[state.count:end].itertuples(index=False):
+            state.update(*row)
+
+        batch = TechnicalIndicators(ohlcv.iloc[:end])
+        batch.calculate_all()
+        assert state.get_market_sentiment() == batch.get_market_sentiment()
+
+
+def test_duplicate_timestamp_ignored(ohlcv):
+    """测试重复或过期的K线不会改变状态"""
+    state = IncrementalIndicators()
+    timestamps = pd.date_range("2024-01-01", periods=3, freq="1min")
+    for ts, row in zip(timestamps, ohlcv.head(3).itertuples(index=False)):
+        state.update(*row, timestamp=ts)
+    latest = dict(state.latest)
+
+    state.update(1.0, 1.0, 1.0, 1.0, 1.0, timestamp=timestamps[-1])
+    state.update(1.0, 1.0, 1.0, 1.0, 1.0, timestamp=timestamps[0])
+
+    assert state.count == 3
+    assert state.latest["close"] == latest["close"]
+
+
+def test_engine_tracks_symbols_independently(ohlcv):
+    """测试引擎为每个交易对维护独立状态"""
+    engine = IncrementalIndicatorEngine()
+    engine.warmup("BTCUSDT", ohlcv)
+    engine.warmup("ETHUSDT", ohlcv.iloc[:10])
+
+    assert engine.state("BTCUSDT").count == len(ohlcv)
+    assert engine.state("ETHUSDT").count == 10
+    assert engine.get_market_sentiment("ETHUSDT") == "中性"
+    assert engine.get_market_sentiment("SOLUSDT") == "中性"
+    assert set(engine.sentiments()) == {"BTCUSDT", "ETHUSDT"}
+
+    candle = ohlcv.iloc[-1].to_dict()
+    latest = engine.update("BTCUSDT", candle)
+    assert latest["close"] == candle["close"]
@@ -0,0 +1,155 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.indicator_cache import IndicatorCache
+from app.core.indicators import TechnicalIndicators
+from app.core.kline_store import KlineStore
+from app.datasource.models.market import Kline1h
+from app.datasource.repositories.market import MarketRepository
+from app.datasource.services.market import MarketService
+
+
+def make_ohlcv(n: int = 120) -> pd.DataFrame:
+    rng = np.random.default_rng(3)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, n)))
+    return pd.DataFrame({
+        "open": close, "high": close * 1.01, "low": close * 0.99,
+        "close": close, "volume": rng.uniform(1, 10, n),
+    }, index=pd.date_range("2024-01-01", periods=n, freq="1min"))
+
+
+def test_snapshot_cached_until_new_candle(monkeypatch):
+    """测试没有新K线时命中缓存，新K线到达后重新计算"""
+    calls = []
+    original = TechnicalIndicators.calculate_all
+
+    def counting(self):
+        calls.append(len(self.df))
+        return original(self)
+
+    monkeypatch.setattr(TechnicalIndicators, "calculate_all", counting)
+    cache = IndicatorCache(maxsize=8)
+    df = make_ohlcv()
+
+    first = cache.snapshot("BTCUSDT", "1m", df.iloc[:-1])
+    assert cache.snapshot("BTCUSDT", "1m", df.iloc[:-1]) is first
+    latest = cache.snapshot("BTCUSDT", "1m", df)
+
+    assert calls == [119, 120]
+    assert latest["timestamp"] == df.index[-1]
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 2
+
+    expected = TechnicalIndicators(df)
+    expected.calculate_all()
+    assert latest["rsi"] == pytest.approx(expected.df["rsi"].iloc[-1])
+    assert latest["sentiment"] == expected.get_market_sentiment()
+
+
+def test_lru_and_ttl_eviction(monkeypatch):
+    """测试超出容量淘汰最久未使用的条目，过期条目视为未命中"""
+    now = [0.0]
+    monkeypatch.setattr("app.core.indicator_cache.time.monotonic", lambda: now[0])
+    cache = IndicatorCache(maxsize=2, ttl=10)
+    ts = datetime(2024, 1, 1)
+    keys = [cache.make_key(symbol, "1m", ts) for symbol in ("A", "B", "C")]
+
+    cache.put(keys[0], {"v": 0})
+    cache.put(keys[1], {"v": 1})
+    assert cache.get(keys[0]) == {"v": 0}
+    cache.put(keys[2], {"v": 2})
+    assert cache.get(keys[1]) is None
+    assert cache.stats()["evictions"] == 1
+
+    now[0] = 11.0
+    assert cache.get(keys[0]) is None
+    assert cache.stats()["size"] == 1
+
+
+async def test_service_skips_loading_on_hit(session, monkeypatch):
+    """测试服务层命中缓存时不读取K线"""
+    start = datetime(2024, 1, 1)
+    df = make_ohlcv(60)
+    await MarketRepository(session).upsert_klines([
+        {"symbol": "BTCUSDT", "timestamp": start + timedelta(minutes=i), **row}
+        for i, row in enumerate(df.to_dict("records"))
+    ])
+    service = MarketService(session, cache=IndicatorCache())
+
+    snapshot = await service.get_indicator_snapshot("BTCUSDT", "1m")
+    assert snapshot["timestamp"] == start + timedelta(minutes=59)
+    assert snapshot["close"] == pytest.approx(df["close"].iloc[-1])
+
+    async def fail(*args, **kwargs):
+        raise AssertionError("命中缓存时不应读取K线")
+
+    monkeypatch.setattr(service.repository, "get_recent_bars", fail)
+    assert await service.get_indicator_snapshot("BTCUSDT", "1m") is snapshot
+    assert await service.get_indicator_snapshot("ETHUSDT", "1m") is None
+
+
+async def test_service_reads_store_only_when_it_covers_lookback(session, tmp_path):
+    """测试缓存包含最近 lookback 根K线时从缓存计算，只有部分历史时读取数据库"""
+    start = datetime(2024, 1, 1)
+    rows = [
+        {"symbol": "BTCUSDT", "timestamp": start + timedelta(minutes=i), **row}
+        for i, row in enumerate(make_ohlcv(60).to_dict("records"))
+    ]
+    await MarketRepository(session).upsert_klines(rows)
+    store = KlineStore(tmp_path)
+    store.append("BTCUSDT", "1m", rows[40:])
+    expected = await MarketService(
+        session, cache=IndicatorCache()
+    ).get_indicator_snapshot("BTCUSDT", "1m", lookback=60)
+
+    service = MarketService(session, store=store, cache=IndicatorCache())
+    partial = await service.get_indicator_snapshot("BTCUSDT", "1m", lookback=60)
+    assert partial["ma20"] == pytest.approx(expected["ma20"])
+    assert partial["rsi"] == pytest.approx(expected["rsi"])
+
+    async def fail(*args, **kwargs):
+        raise AssertionError("缓存覆盖时不应读取数据库")
+
+    service = MarketService(session, store=store, cache=IndicatorCache())
+    service.repository.get_recent_bars = fail
+    snapshot = await service.get_indicator_snapshot("BTCUSDT", "1m", lookback=20)
+    assert snapshot["timestamp"] == start + timedelta(minutes=59)
+
+
+async def test_service_falls_back_when_store_is_behind(session, tmp_path):
+    """测试缓存最新K线落后于数据库时从数据库读取"""
+    start = datetime(2024, 1, 1)
+    rows = [
+        {"symbol": "BTCUSDT", "timestamp": start + timedelta(minutes=i), **row}
+        for i, row in enumerate(make_ohlcv(60).to_dict("records"))
+    ]
+    await MarketRepository(session).upsert_klines(rows)
+    store = KlineStore(tmp_path)
+    store.append("BTCUSDT", "1m", rows[:55])
+
+    service = MarketService(session, store=store, cache=IndicatorCache())
+    snapshot = await service.get_indicator_snapshot("BTCUSDT", "1m", lookback=20)
+    assert snapshot["timestamp"] == start + timedelta(minutes=59)
+    assert snapshot["close"] == pytest.approx(rows[-1]["close"])
+
+
+async def test_service_recomputes_when_last_bar_updated_in_place(session):
+    """测试聚合周期未完成的K线被原地更新（时间不变）后重新计算"""
+    start = datetime(2024, 1, 1)
+    rows = [
+        {"symbol": "BTCUSDT", "timestamp": start + timedelta(hours=i), **row}
+        for i, row in enumerate(make_ohlcv(30).to_dict("records"))
+    ]
+    repository = MarketRepository(session)
+    await repository.upsert_bars(Kline1h, rows)
+    service = MarketService(session, cache=IndicatorCache())
+    first = await service.get_indicator_snapshot("BTCUSDT", "1h")
+    assert await service.get_indicator_snapshot("BTCUSDT", "1h") is first
+
+    rows[-1] = {**rows[-1], "close": rows[-1]["close"] * 1.05, "volume": 99.0}
+    await repository.upsert_bars(Kline1h, rows[-1:])
+    updated = await service.get_indicator_snapshot("BTCUSDT", "1h")
+    assert updated["timestamp"] == first["timestamp"]
+    assert updated["close"] == pytest.approx(rows[-1]["close"])
@@ -0,0 +1,94 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.indicator_panel import IndicatorPanel
+from app.core.indicators import TechnicalIndicators
+
+SYMBOLS = ["BTCUSDT", "ETHUSDT", "SOLUSDT"]
+
+
+def make_ohlcv(n: int, seed: int) -> pd.DataFrame:
+    """生成模拟K线数据"""
+    rng = np.random.default_rng(seed)
+    close = 1000 + rng.standard_normal(n).cumsum() * 5
+    return pd.DataFrame({
+        "open": close + rng.standard_normal(n),
+        "high": close + rng.random(n) * 3,
+        "low": close - rng.random(n) * 3,
+        "close": close,
+        "volume": rng.random(n) * 100,
+    }, index=pd.date_range("2024-01-01", periods=n, freq="1min"))
+
+
+@pytest.fixture
+def frames():
+    frames = {symbol: make_ohlcv(300, seed) for seed, symbol in enumerate(SYMBOLS)}
+    # 较晚上市的交易对：只有最后 120 根K线
+    frames["SOLUSDT"] = frames["SOLUSDT"].iloc[-120:]
+    return frames
+
+
+@pytest.fixture
+def panel(frames):
+    df = pd.concat(frames, names=["symbol", "timestamp"])
+    return IndicatorPanel.from_frame(df)
+
+
+def test_parity_with_single_symbol(panel, frames):
+    """测试面板结果与单交易对批量计算一致"""
+    indicators = panel.calculate_all()
+
+    for symbol, df in frames.items():
+        batch = TechnicalIndicators(df)
+        expected = batch.calculate_all()
+        columns = {
+            "ma5": "ma5",
+            "ma20": "ma20",
+            "rsi": "rsi",
+            "macd": "macd",
+            "macd_signal": "macd_signal",
+            "bb_upper": "bb_upper",
+            "bb_lower": "bb_lower",
+            "obv": "obv",
+        }
+        for name, batch_column in columns.items():
+            actual = indicators[name][symbol].loc[df.index]
+            np.testing.assert_allclose(
+                actual.to_numpy(),
+                expected[batch_column].to_numpy(dtype=float),
+                rtol=1e-9,
+                atol=1e-6,
+                err_msg=f"{symbol} {name}",
+            )
+
+        assert panel.get_market_sentiment()[symbol] == batch.get_market_sentiment()
+
+
+def test_from_arrays(frames):
+    """测试从 2-D 数组构建面板"""
+    symbols = SYMBOLS[:2]
+    arrays = {
+        col: np.vstack([frames[s][col].to_numpy() for s in symbols])
+        for col in ["open", "high", "low", "close", "volume"]
+    }
+    panel = IndicatorPanel.from_arrays(symbols, **arrays)
+    latest = panel.latest()
+
+    assert list(latest.index) == symbols
+    assert latest.loc["BTCUSDT", "close"] == frames["BTCUSDT"]["close"].iloc[-1]
+    assert set(panel.get_market_sentiment()) <= {"看涨", "看跌", "中性"}
+
+
+def test_short_history_is_neutral():
+    """测试K线不足20根时为中性"""
+    df = pd.concat({"BTCUSDT": make_ohlcv(10, 0)}, names=["symbol", "timestamp"])
+    panel = IndicatorPanel.from_frame(df)
+    assert panel.get_market_sentiment()["BTCUSDT"] == "中性"
+
+
+def test_missing_columns():
+    """测试缺少必要列时报错"""
+    df = pd.concat({"BTCUSDT": make_ohlcv(10, 0)}, names=["symbol", "timestamp"])
+    with pytest.raises(ValueError):
+        IndicatorPanel.from_frame(df.drop(columns=["volume"]))
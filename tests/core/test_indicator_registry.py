@@ -0,0 +1,129 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.core.config import settings
+from app.core.indicator_registry import IndicatorPlan, PlanContext, get_default_plan
+from app.core.indicators import TechnicalIndicators
+
+
+@pytest.fixture
+def ohlcv():
+    rng = np.random.default_rng(11)
+    close = 30000 + rng.standard_normal(400).cumsum() * 50
+    close[100:103] = close[99]
+    return pd.DataFrame({
+        "open": close + rng.standard_normal(400),
+        "high": close + rng.random(400) * 20,
+        "low": close - rng.random(400) * 20,
+        "close": close,
+        "volume": rng.random(400) * 100,
+    })
+
+
+def test_default_plan_matches_pandas_ta(ohlcv):
+    """测试默认指标计划与 pandas-ta 结果一致"""
+    pytest.importorskip("pandas_ta")  # 注册 DataFrame.ta
+    actual = TechnicalIndicators(ohlcv).calculate_all()
+
+    macd = ohlcv.ta.macd(fast=12, slow=26, signal=9)
+    bbands = ohlcv.ta.bbands(length=20)
+    bb = {c[:3]: c for c in bbands.columns}
+    expected = {
+        "ma5": ohlcv.ta.sma(length=5),
+        "ma10": ohlcv.ta.sma(length=10),
+        "ma20": ohlcv.ta.sma(length=20),
+        "rsi": ohlcv.ta.rsi(length=14),
+        "macd": macd["MACD_12_26_9"],
+        "macd_signal": macd["MACDs_12_26_9"],
+        "macd_hist": macd["MACDh_12_26_9"],
+        "bb_lower": bbands[bb["BBL"]],
+        "bb_middle": bbands[bb["BBM"]],
+        "bb_upper": bbands[bb["BBU"]],
+        "obv": ohlcv.ta.obv(),
+    }
+    # RSI 前14根为预热期（pandas-ta 0.4 起不预热，只比较预热之后的值）
+    assert actual["rsi"].iloc[:14].isna().all()
+    assert actual["rsi"].iloc[14:].notna().all()
+    actual = actual.iloc[14:]
+    for column, values in expected.items():
+        np.testing.assert_allclose(
+            actual[column].to_numpy(),
+            values.iloc[14:].to_numpy(dtype=float),
+            rtol=1e-9,
+            atol=1e-6,
+            err_msg=column,
+        )
+
+
+def test_custom_specs_and_shared_intermediates(ohlcv, monkeypatch):
+    """测试自定义声明的列名，且相同的 EMA/均值只计算一次"""
+    calls = []
+    original = PlanContext.memo
+
+    def counting(self, key, compute):
+        if key not in self._memo:
+            calls.append(key)
+        return original(self, key, compute)
+
+    monkeypatch.setattr(PlanContext, "memo", counting)
+    plan = IndicatorPlan([
+        {"type": "ema", "length": 12},
+        {"type": "macd", "name": "fast_macd", "fast": 12, "slow": 26, "signal": 9},
+        {"type": "sma", "length": 20},
+        {"type": "bbands", "name": "band", "std": 2.5},
+    ])
+    result = plan.compute_frame(ohlcv)
+
+    assert list(result.columns) == [
+        "ema12", "fast_macd", "fast_macd_signal", "fast_macd_hist",
+        "ma20", "band_lower", "band_middle", "band_upper",
+    ]
+    assert calls.count(("ema", "close", 12)) == 1
+    assert calls.count(("sma", "close", 20)) == 1
+    np.testing.assert_allclose(
+        (result["band_upper"] - result["band_middle"]).dropna(),
+        (2.5 * ohlcv["close"].rolling(20).std()).dropna(),
+    )
+    assert plan.key != IndicatorPlan([{"type": "bbands", "std": 2.0}]).key
+
+
+def test_invalid_specs():
+    """测试未知类型、未知参数与重复列名"""
+    with pytest.raises(ValueError, match="未知的指标类型"):
+        IndicatorPlan([{"type": "foo"}])
+    with pytest.raises(ValueError, match="不支持的参数"):
+        IndicatorPlan([{"type": "sma", "window": 5}])
+    with pytest.raises(ValueError, match="重复"):
+        IndicatorPlan([{"type": "rsi"}, {"type": "rsi", "length": 7}])
+
+
+def test_sentiment_uses_plan_columns(ohlcv, monkeypatch):
+    """测试市场情绪按计划解析的列名读取指标，缺少所需指标时给出明确的配置错误"""
+    specs = [
+        {"type": "sma", "name": "trend", "length": 20},
+        {"type": "rsi", "name": "rsi7", "length": 7},
+        {"type": "macd", "name": "m"},
+        {"type": "bbands", "name": "band"},
+    ]
+    plan = IndicatorPlan(specs)
+    assert plan.require_sentiment() == {
+        "ma20": "trend", "rsi": "rsi7", "macd": "m", "macd_signal": "m_signal",
+        "bb_upper": "band_upper", "bb_lower": "band_lower",
+    }
+    indicators = TechnicalIndicators(ohlcv, plan)
+    indicators.calculate_all()
+    assert indicators.snapshot()["sentiment"] in ("看涨", "看跌", "中性")
+
+    partial = TechnicalIndicators(ohlcv, IndicatorPlan(specs[1:]))
+    partial.calculate_all()
+    with pytest.raises(ValueError, match="ma20"):
+        partial.snapshot()
+
+    monkeypatch.setattr(settings, "INDICATOR_SPECS", specs[:3])
+    get_default_plan.cache_clear()
+    try:
+        with pytest.raises(ValueError, match="INDICATOR_SPECS"):
+            get_default_plan()
+    finally:
+        get_default_plan.cache_clear()
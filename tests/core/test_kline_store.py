@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from app.core.kline_store import KlineStore
+from app.datasource.repositories.market import MarketRepository
+from app.jobs.rebuild_kline_store import rebuild_kline_store
+from app.jobs.rollup_market import KlineRollup
+
+BASE = datetime(2024, 1, 1)
+
+
+def make_bars(start: int, count: int, close: float = 1.5, symbol: str = "BTCUSDT"):
+    return [
+        {
+            "symbol": symbol, "timestamp": BASE + timedelta(minutes=start + i),
+            "open": 1.0, "high": 2.0, "low": 0.5, "close": close + start + i,
+            "volume": 1.0,
+        }
+        for i in range(count)
+    ]
+
+
+def test_append_and_read_range(tmp_path):
+    """测试追加写入与按时间范围零拷贝读取"""
+    store = KlineStore(tmp_path)
+    assert store.append("BTCUSDT", "1m", make_bars(0, 5)) == 5
+    assert store.append("BTCUSDT", "1m", make_bars(5, 5)) == 10
+
+    columns = store.read(
+        "BTCUSDT", "1m", BASE + timedelta(minutes=2), BASE + timedelta(minutes=6)
+    )
+    assert list(columns["close"]) == [3.5, 4.5, 5.5, 6.5]
+    assert isinstance(columns["close"], np.memmap)
+    assert store.last_timestamp("BTCUSDT", "1m") == BASE + timedelta(minutes=9)
+    assert store.symbols("1m") == ["BTCUSDT"]
+
+    frame = store.frame("BTCUSDT", "1m")
+    assert len(frame) == 10 and frame.index[0] == BASE
+
+
+def test_append_overlap_overwrites(tmp_path):
+    """测试与已有数据重叠时以新数据为准且不重复"""
+    store = KlineStore(tmp_path)
+    store.append("BTCUSDT", "5m", make_bars(0, 5))
+    assert store.append("BTCUSDT", "5m", make_bars(3, 4, close=100.0)) == 7
+
+    closes = list(store.read("BTCUSDT", "5m")["close"])
+    assert closes == [1.5, 2.5, 3.5, 103.0, 104.0, 105.0, 106.0]
+    timestamps = store.read("BTCUSDT", "5m")["timestamp"]
+    assert np.all(np.diff(timestamps) > 0)
+
+
+def test_replace_swaps_atomically(tmp_path):
+    """测试重建后整体替换旧数据"""
+    store = KlineStore(tmp_path)
+    store.append("BTCUSDT", "1m", make_bars(0, 10))
+    old = store.read("BTCUSDT", "1m")["close"]
+
+    assert store.replace("BTCUSDT", "1m", [make_bars(0, 2), make_bars(2, 1)]) == 3
+    assert store.length("BTCUSDT", "1m") == 3
+    assert len(old) == 10  # 旧映射仍然可读
+    assert not any(p.name.startswith(".") for p in (tmp_path / "1m").iterdir())
+
+
+async def test_rollup_and_rebuild_sync_store(session, tmp_path):
+    """测试聚合结果同步写入缓存，以及从数据库重建缓存"""
+    store = KlineStore(tmp_path)
+    klines = make_bars(0, 10) + make_bars(0, 3, symbol="ETHUSDT")
+    await MarketRepository(session).upsert_klines(klines)
+    await KlineRollup(["5m"], store=store).rollup(session, klines)
+    assert list(store.read("BTCUSDT", "5m")["volume"]) == [5.0, 5.0]
+
+    rebuilt = await rebuild_kline_store(session, store, chunk_size=4)
+    assert rebuilt["1m/BTCUSDT"] == 10
+    assert rebuilt["1m/ETHUSDT"] == 3
+    assert rebuilt["5m/ETHUSDT"] == 1
+    assert list(store.read("ETHUSDT", "1m")["close"]) == [1.5, 2.5, 3.5]
@@ -0,0 +1,219 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.core.llm_cache import LLMResponseCache, llm_cache_key
+from app.core.streaming import stream_analysis
+
+
+class Clock:
+    def __init__(self):
+        self.now = datetime(2024, 6, 1)
+
+    def __call__(self) -> datetime:
+        return self.now
+
+
+def make_compute(calls, result=None, delay=0.0):
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(delay)
+        return result or {"analysis": "看涨", "sentiment": "看涨", "confidence": 70}
+    return compute
+
+
+def make_stream(calls, text="看涨，置信度 70%", delay=0.0):
+    async def chunks():
+        for chunk in text:
+            await asyncio.sleep(delay)
+            yield chunk
+
+    def stream():
+        calls.append(1)
+        return stream_analysis(chunks(), 10)
+    return stream
+
+
+async def collect(events):
+    return [event async for event in events]
+
+
+def test_key_covers_prompt_and_model_params():
+    """测试缓存键随提示词与模型参数变化"""
+    messages = [("system", "你是顾问"), ("human", "BTC 收盘价 100")]
+    key = llm_cache_key(messages, "gpt-4o", 0.7, 1000)
+
+    assert key == llm_cache_key(list(messages), "gpt-4o", 0.7, 1000)
+    assert len({
+        key,
+        llm_cache_key([("system", "你是顾问"), ("human", "BTC 收盘价 101")],
+                      "gpt-4o", 0.7, 1000),
+        llm_cache_key(messages, "gpt-4o-mini", 0.7, 1000),
+        llm_cache_key(messages, "gpt-4o", 0.2, 1000),
+        llm_cache_key(messages, "gpt-4o", 0.7, 500),
+    }) == 5
+
+
+async def test_memory_tier_ttl_and_lru():
+    """测试内存层命中、过期与容量淘汰"""
+    clock = Clock()
+    cache = LLMResponseCache(maxsize=2, ttl=60, persistent=False, clock=clock)
+    calls = []
+
+    first = await cache.get_or_compute("a", make_compute(calls))
+    assert await cache.get_or_compute("a", make_compute(calls)) is first
+    assert len(calls) == 1
+
+    clock.now += timedelta(seconds=61)
+    await cache.get_or_compute("a", make_compute(calls))
+    assert len(calls) == 2
+
+    await cache.get_or_compute("b", make_compute(calls))
+    await cache.get_or_compute("c", make_compute(calls))
+    assert cache.get("a") is None
+    assert cache.stats()["size"] == 2
+    assert cache.stats()["memory_hits"] == 1
+
+
+async def test_concurrent_identical_requests_share_one_call():
+    """测试并发的相同请求只调用一次模型，调用失败时所有等待者都收到异常"""
+    cache = LLMResponseCache(ttl=60, persistent=False)
+    calls = []
+
+    results = await asyncio.gather(*[
+        cache.get_or_compute("k", make_compute(calls, delay=0.01))
+        for _ in range(5)
+    ])
+
+    assert len(calls) == 1
+    assert all(result is results[0] for result in results)
+    assert cache.stats()["coalesced"] == 4
+    assert cache.stats()["inflight"] == 0
+
+    async def failing():
+        await asyncio.sleep(0.01)
+        raise RuntimeError("rate limited")
+
+    outcomes = await asyncio.gather(
+        cache.get_or_compute("bad", failing),
+        cache.get_or_compute("bad", failing),
+        return_exceptions=True,
+    )
+    assert all(isinstance(outcome, RuntimeError) for outcome in outcomes)
+    assert cache.get("bad") is None
+
+
+async def test_database_tier_shared_across_instances(engine):
+    """测试数据库层在进程重启（新实例）后仍可命中，过期后重新调用"""
+    factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    clock = Clock()
+    calls = []
+    result = {"analysis": "中性", "sentiment": "中性", "confidence": 50}
+
+    writer = LLMResponseCache(ttl=60, session_factory=factory, clock=clock)
+    await writer.get_or_compute("k", make_compute(calls, result), model="gpt-4o")
+
+    reader = LLMResponseCache(ttl=60, session_factory=factory, clock=clock)
+    assert await reader.get_or_compute("k", make_compute(calls)) == result
+    assert len(calls) == 1
+    assert reader.stats()["db_hits"] == 1
+    assert reader.get("k") == result
+
+    clock.now += timedelta(seconds=61)
+    restarted = LLMResponseCache(ttl=60, session_factory=factory, clock=clock)
+    await restarted.get_or_compute("k", make_compute(calls))
+    assert len(calls) == 2
+
+
+async def test_database_errors_do_not_block_analysis():
+    """测试数据库不可用时仍返回模型结果"""
+    def broken_factory():
+        raise ConnectionError("database unavailable")
+
+    cache = LLMResponseCache(ttl=60, session_factory=broken_factory)
+    calls = []
+
+    assert (await cache.get_or_compute("k", make_compute(calls)))["confidence"] == 70
+    assert await cache.get_or_compute("k", make_compute(calls)) is not None
+    assert len(calls) == 1
+
+
+async def test_caller_cancellation_does_not_cancel_shared_call():
+    """测试一个调用方被取消时，其他等待者仍能拿到结果"""
+    cache = LLMResponseCache(ttl=60, persistent=False)
+    calls = []
+
+    first = asyncio.ensure_future(
+        cache.get_or_compute("k", make_compute(calls, delay=0.02))
+    )
+    second = asyncio.ensure_future(
+        cache.get_or_compute("k", make_compute(calls, delay=0.02))
+    )
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert (await second)["sentiment"] == "看涨"
+    assert len(calls) == 1
+
+
+async def test_stream_shares_cache_and_inflight_requests(engine):
+    """测试流式请求与普通请求共用进行中的请求、内存层与数据库层"""
+    factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    cache = LLMResponseCache(ttl=60, session_factory=factory)
+    calls = []
+
+    streamed, computed = await asyncio.gather(
+        collect(cache.stream_or_compute("k", make_stream(calls, delay=0.001))),
+        cache.get_or_compute("k", make_compute(calls)),
+    )
+    assert len(calls) == 1
+    assert [name for name, _ in streamed].count("token") > 1
+    assert streamed[-1] == ("done", computed)
+    assert computed["confidence"] == 70
+    assert cache.stats()["coalesced"] == 1
+
+    replayed = await collect(cache.stream_or_compute("k", make_stream(calls)))
+    assert [name for name, _ in replayed] == [
+        "sentiment", "confidence", "token", "done"
+    ]
+    assert replayed[-1] == ("done", computed)
+
+    restarted = LLMResponseCache(ttl=60, session_factory=factory)
+    replayed = await collect(restarted.stream_or_compute("k", make_stream(calls)))
+    assert replayed[-1] == ("done", computed)
+    assert restarted.stats()["db_hits"] == 1
+    assert len(calls) == 1
+
+
+async def test_stream_failure_and_disconnect_release_waiters():
+    """测试流式请求出错或调用方断开时，等待者收到异常且结果不写入缓存"""
+    cache = LLMResponseCache(ttl=60, persistent=False)
+    calls = []
+
+    def failing():
+        async def events():
+            yield "token", "看"
+            await asyncio.sleep(0.01)
+            raise asyncio.TimeoutError()
+        return events()
+
+    outcomes = await asyncio.gather(
+        collect(cache.stream_or_compute("bad", failing)),
+        cache.get_or_compute("bad", make_compute(calls)),
+        return_exceptions=True,
+    )
+    assert all(isinstance(o, asyncio.TimeoutError) for o in outcomes)
+    assert cache.get("bad") is None and not calls
+
+    events = cache.stream_or_compute("k", make_stream(calls, delay=0.01))
+    assert (await events.__anext__())[0] == "token"
+    waiter = asyncio.ensure_future(cache.get_or_compute("k", make_compute(calls)))
+    await asyncio.sleep(0)
+    await events.aclose()
+    with pytest.raises(RuntimeError):
+        await waiter
+    assert cache.stats()["inflight"] == 0
+    assert cache.get("k") is None
@@ -0,0 +1,78 @@
+from datetime import datetime, timedelta
+
+from app.core.prompt_builder import NO_NEWS, PromptBuilder
+from app.core.tokens import estimate_tokens
+
+SYSTEM = "你是一位专业的加密货币交易顾问。"
+HUMAN = "行情：\n{market_data}\n指标：\n{technical_indicators}\n新闻：\n{news_data}"
+MARKET = {"open": 100, "high": 110, "low": 95, "close": 105, "volume": 1234.5}
+INDICATORS = {
+    "ma5": 101.2, "ma20": 99.8, "rsi": 62.5, "macd": 0.8,
+    "bb_upper": 112, "bb_middle": 100, "bb_lower": 88,
+}
+
+
+def make_news(count, start=datetime(2024, 6, 1)):
+    return [
+        {
+            "title": f"新闻标题{i}", "summary": "机构资金持续流入现货ETF" * 3,
+            "published_at": start + timedelta(minutes=i), "cluster_id": f"c{i}",
+        }
+        for i in range(count)
+    ]
+
+
+def render(builder, built):
+    return SYSTEM + builder.human_template.format(**built.sections)
+
+
+def test_fits_all_sections_within_budget():
+    """测试预算充足时完整保留所有段落，token 计数与渲染结果一致"""
+    builder = PromptBuilder(SYSTEM, HUMAN, token_budget=5000)
+    built = builder.build(MARKET, INDICATORS, make_news(3))
+
+    assert built.indicators == 5 and built.news == 3
+    assert "- 收盘价: 105" in built.sections["market_data"]
+    assert built.sections["technical_indicators"].splitlines()[1:] == [
+        "- MA5: 101.2", "- MA20: 99.8", "- RSI: 62.5", "- MACD: 0.8",
+        "- 布林带: 上轨=112, 中轨=100, 下轨=88",
+    ]
+    assert abs(built.tokens - estimate_tokens(render(builder, built))) <= 3
+
+
+def test_truncates_news_to_budget_keeping_most_relevant():
+    """测试新闻过多时只保留预算内排序靠前的条目"""
+    news = make_news(200)
+    builder = PromptBuilder(SYSTEM, HUMAN, token_budget=600)
+    built = builder.build(MARKET, INDICATORS, news)
+
+    assert 0 < built.news < 200 and built.news_total == 200
+    assert built.tokens <= 600
+    lines = built.sections["news_data"].splitlines()
+    assert lines[0].startswith("- 新闻标题199:")
+    assert lines[-1].startswith(f"- 新闻标题{200 - built.news}:")
+
+
+def test_ranks_corroborated_stories_first_and_collapses_clusters():
+    """测试多来源报道的事件排在前面，同一聚类只保留一条"""
+    news = make_news(3)
+    news += [dict(news[0], title="其他来源转载", summary="转载")] * 2
+    builder = PromptBuilder(SYSTEM, HUMAN, token_budget=5000)
+
+    ranked = builder.rank_news(news)
+    assert [item["title"] for item in ranked] == ["新闻标题0", "新闻标题2", "新闻标题1"]
+
+
+def test_drops_low_priority_indicators_and_long_news_text():
+    """测试预算紧张时先舍弃低优先级指标，单条新闻按字符数截断"""
+    builder = PromptBuilder(SYSTEM, HUMAN, token_budget=1000, news_item_chars=20)
+    built = builder.build(MARKET, INDICATORS, make_news(1))
+    assert len(built.sections["news_data"]) == 20
+
+    fixed = builder.base_tokens + estimate_tokens(built.sections["market_data"])
+    tight = PromptBuilder(SYSTEM, HUMAN, token_budget=fixed + 8)
+    built = tight.build(MARKET, {"ma5": 1, "rsi": 50, "macd": 0.1}, [])
+    assert built.sections["technical_indicators"].split() == [
+        "-", "RSI:", "50", "-", "MACD:", "0.1"
+    ]
+    assert built.sections["news_data"] == NO_NEWS
@@ -0,0 +1,96 @@
+import asyncio
+
+import pytest
+
+from app.core.rate_limit import LLMRateLimiter, TokenBucket, call_with_retry
+
+
+class FakeTime:
+    """可手动推进的时钟，sleep 直接推进时间"""
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def clock(self) -> float:
+        return self.now
+
+    async def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_token_bucket_refills_up_to_capacity():
+    """测试令牌按速率补充且不超过容量"""
+    fake = FakeTime()
+    bucket = TokenBucket(rate=2, capacity=10, clock=fake.clock)
+    bucket.take(10)
+    assert bucket.wait_time(4) == pytest.approx(2)
+
+    fake.now += 100
+    assert bucket.wait_time(10) == 0
+    assert bucket.tokens == 10
+    assert bucket.wait_time(50) == 0
+
+
+async def test_limiter_enforces_tpm_for_fifty_symbols():
+    """测试 50 个交易对的分析受 TPM 限制排队，且在一个调度间隔内完成"""
+    fake = FakeTime()
+    limiter = LLMRateLimiter(rpm=500, tpm=90000, clock=fake.clock, sleep=fake.sleep)
+
+    await asyncio.gather(*[limiter.acquire(3000) for _ in range(50)])
+
+    # 一分钟额度可放行 30 个请求，其余 20 个按每秒 1500 token 的速率补充
+    assert fake.now == pytest.approx(20 * 3000 / 1500)
+    assert fake.now < 3600
+    stats = limiter.stats()
+    assert stats["acquired"] == 50 and stats["throttled"] == 20
+
+
+async def test_limiter_enforces_rpm():
+    """测试请求数超过 RPM 时等待"""
+    fake = FakeTime()
+    limiter = LLMRateLimiter(rpm=60, tpm=10 ** 9, clock=fake.clock, sleep=fake.sleep)
+
+    for _ in range(62):
+        await limiter.acquire(1)
+    assert fake.now == pytest.approx(2)
+
+
+async def test_retry_with_timeout_and_backoff():
+    """测试超时与失败后按退避重试，等待时间不超过上限"""
+    fake = FakeTime()
+    attempts, acquired = [], []
+
+    async def flaky():
+        attempts.append(1)
+        if len(attempts) == 1:
+            await asyncio.sleep(1)
+        if len(attempts) == 2:
+            raise ConnectionError("reset")
+        return "ok"
+
+    async def acquire():
+        acquired.append(1)
+
+    result = await call_with_retry(
+        flaky, retries=3, timeout=0.01, base_delay=1, max_delay=1.5,
+        acquire=acquire, sleep=fake.sleep,
+    )
+    assert result == "ok"
+    assert len(attempts) == len(acquired) == 3
+    assert 0 <= fake.sleeps[0] <= 1 and 0 <= fake.sleeps[1] <= 1.5
+
+
+async def test_retry_gives_up_after_max_retries():
+    """测试重试耗尽后抛出最后一次的异常"""
+    fake = FakeTime()
+    attempts = []
+
+    async def failing():
+        attempts.append(1)
+        raise RuntimeError("429 Too Many Requests")
+
+    with pytest.raises(RuntimeError):
+        await call_with_retry(failing, retries=2, timeout=1, sleep=fake.sleep)
+    assert len(attempts) == 3 and len(fake.sleeps) == 2
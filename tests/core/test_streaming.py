@@ -0,0 +1,108 @@
+import asyncio
+import random
+
+import pytest
+
+from app.core.streaming import (
+    SignalExtractor,
+    format_sse,
+    stream_analysis,
+    with_timeout,
+)
+
+REPORT = """## 市场情绪：看跌转看涨
+价格站上 MA20，MACD 金叉。
+建议买入区间 64000-65000，置信度 72%。
+风险：若跌破 63000 则转为看跌。"""
+
+
+def extract(analysis):
+    """与 LLMAnalyzer._extract_sentiment/_extract_confidence 相同的规则"""
+    sentiment = "看涨" if "看涨" in analysis else "看跌" if "看跌" in analysis else "中性"
+    try:
+        confidence = int(analysis.split("置信度")[1].split("%")[0].strip())
+    except (IndexError, ValueError):
+        confidence = 50
+    return sentiment, confidence
+
+
+def chunked(text, seed):
+    rng = random.Random(seed)
+    position = 0
+    while position < len(text):
+        size = rng.randint(1, 4)
+        yield text[position:position + size]
+        position += size
+
+
+async def agen(items):
+    for item in items:
+        yield item
+
+
+def test_incremental_matches_full_text_rules():
+    """测试任意切分下增量提取结果都与整段提取一致"""
+    texts = [REPORT, "中性，置信度：七成%", "看跌 置信度 40", "无信号", "置信度 88 % 看涨"]
+    for text in texts:
+        for seed in range(20):
+            extractor = SignalExtractor()
+            for chunk in chunked(text, seed):
+                extractor.feed(chunk)
+            result = extractor.result()
+            assert result["analysis"] == text
+            assert (result["sentiment"], result["confidence"]) == extract(text)
+
+
+def test_signals_emitted_as_soon_as_determined():
+    """测试情绪与置信度在关键词到达时立即给出，跨段关键词也能识别"""
+    extractor = SignalExtractor()
+    assert extractor.feed("## 市场情绪：看") == []
+    assert extractor.feed("跌") == [("sentiment", "看跌")]
+    assert extractor.feed("转看涨\n置信") == [("sentiment", "看涨")]
+    assert extractor.feed("度 7") == []
+    assert extractor.feed("2%，风险：看跌") == [("confidence", 72)]
+    assert extractor.feed("后续") == []
+
+
+async def test_stream_analysis_events():
+    """测试事件顺序：情绪在首批 token 后即给出，最后返回完整结果"""
+    events = [
+        event async for event in stream_analysis(agen(chunked(REPORT, 1)), 321)
+    ]
+    names = [name for name, _ in events]
+    assert names[-1] == "done"
+    assert names.index("sentiment") < 10
+    assert names.index("sentiment") < names.index("confidence")
+    done = events[-1][1]
+    assert done == {
+        "analysis": REPORT, "sentiment": "看涨", "confidence": 72, "prompt_tokens": 321
+    }
+    assert "".join(data for name, data in events if name == "token") == REPORT
+
+
+async def test_with_timeout_bounds_waiting_for_model():
+    """测试模型输出停滞时超时，下游消费时间不计入"""
+    async def stalled():
+        yield "看涨"
+        await asyncio.sleep(1)
+        yield "不会到达"
+
+    received = []
+    with pytest.raises(asyncio.TimeoutError):
+        async for chunk in with_timeout(stalled(), 0.05):
+            received.append(chunk)
+    assert received == ["看涨"]
+
+    async def slow_consumer():
+        chunks = []
+        async for chunk in with_timeout(agen(["a", "b", "c"]), 0.05):
+            chunks.append(chunk)
+            await asyncio.sleep(0.03)
+        return chunks
+
+    assert await slow_consumer() == ["a", "b", "c"]
+
+
+def test_format_sse():
+    """测试 SSE 消息编码"""
+    assert format_sse("sentiment", "看涨") == 'event: sentiment\ndata: "看涨"\n\n'
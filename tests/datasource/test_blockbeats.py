@@ -0,0 +1,284 @@
+import pytest
+from aiohttp import web
+
+from app.core.config import settings
+from app.core.http import get_http_client
+from app.datasource.adapters.base import NotModified
+from app.datasource.adapters.blockbeats import BlockBeatsAdapter
+from app.datasource.dedup import NewsDeduplicator
+from app.datasource.models.datasource import DataSource
+from app.datasource.repositories.datasource import DataSourceRepository
+from app.datasource.services.datasource import DataSourceService
+
+START = 1704067200
+
+
+class FlashServer:
+    """按页返回快讯的 BlockBeats 模拟接口，新的在前"""
+
+    def __init__(self):
+        self.items = []
+        self.requested = []
+        self.etag = False
+        self.not_modified = 0
+        self.failing = set()
+
+    def publish(self, count: int, step: int = 60) -> None:
+        newest = self.items[0]["id"] + 1 if self.items else 0
+        for i in range(newest, newest + count):
+            self.items.insert(0, {
+                "id": i,
+                "title": f"快讯 {i}",
+                "content": "内容",
+                "link": f"https://www.theblockbeats.info/flash/{i}",
+                "create_time": str(START + i * step),
+            })
+
+    async def handler(self, request: web.Request) -> web.Response:
+        page = int(request.query["page"])
+        size = int(request.query["size"])
+        self.requested.append(page)
+        if page in self.failing:
+            return web.json_response({"status": 500, "message": "busy"})
+        data = self.items[(page - 1) * size:page * size]
+        headers = {}
+        if self.etag:
+            headers["ETag"] = f'"{page}-{size}-{data[0]["id"] if data else 0}"'
+            if request.headers.get("If-None-Match") == headers["ETag"]:
+                self.not_modified += 1
+                return web.Response(status=304, headers=headers)
+        return web.json_response(
+            {"status": 0, "data": {"data": data}}, headers=headers
+        )
+
+
+@pytest.fixture
+async def server():
+    flash = FlashServer()
+    app = web.Application()
+    app.router.add_get("/flash", flash.handler)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    flash.url = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}/flash"
+    yield flash
+    await get_http_client().close()
+    await runner.cleanup()
+
+
+async def fetch(server, config=None, **kwargs):
+    source = DataSource(name="blockbeats", type="blockbeats",
+                        api_url=server.url, config=config)
+    adapter = BlockBeatsAdapter(source)
+    try:
+        news = await adapter.fetch_incremental(**kwargs)
+    finally:
+        await adapter.close()
+    return news, adapter
+
+
+async def test_first_run_fetches_single_page(server):
+    """测试没有水位线时只获取第1页"""
+    server.publish(100)
+    news, adapter = await fetch(server, size=10)
+    assert len(news) == 10
+    assert server.requested == [1]
+    assert adapter.pending_watermark == START + 99 * 60
+
+
+async def test_steady_state_fetches_single_page(server):
+    """测试水位线落在第1页内时不再翻页"""
+    server.publish(100)
+    news, _ = await fetch(server, config={"watermark": START + 95 * 60}, size=10)
+    assert [n["title"] for n in news][-1] == "快讯 95"
+    assert len(news) == 5
+    assert server.requested == [1]
+
+
+async def test_catch_up_fetches_gap_concurrently(server):
+    """测试长时间中断后并发补齐缺口，并在水位线处停止"""
+    server.publish(200)
+    news, adapter = await fetch(
+        server, config={"watermark": START + 150 * 60}, size=10, concurrency=4
+    )
+    assert len(news) == 50
+    assert news[-1]["title"] == "快讯 150"
+    assert sorted(server.requested) == list(range(1, 6))
+    assert max(server.requested) <= 6
+
+    server.requested.clear()
+    news, _ = await fetch(
+        server, config={"watermark": START}, size=10, max_pages=3
+    )
+    assert len(news) == 30
+    assert server.requested == [1, 2, 3]
+
+
+async def test_truncated_catch_up_resumes_from_cursor(server):
+    """测试达到页数上限时记录续传游标，之后从断点补齐缺口而不是跳过"""
+    server.publish(200)
+    news, adapter = await fetch(
+        server, config={"watermark": START + 100 * 60}, size=10, max_pages=3
+    )
+    assert len(news) == 30
+    assert adapter.pending_resume == {
+        "offset": 30, "before": START + 170 * 60, "until": START + 100 * 60,
+    }
+    adapter.commit()
+    config = adapter.source.config
+    assert config["watermark"] == START + 199 * 60
+
+    # 期间新增的5条使分页后移，续传从原第4页开始
+    server.publish(5)
+    server.requested.clear()
+    more, adapter = await fetch(server, config=config, size=10, max_pages=5)
+    assert server.requested == [1, 4, 5, 6, 7]
+    assert adapter.pending_resume == {
+        "offset": 70, "before": START + 135 * 60, "until": START + 100 * 60,
+    }
+    adapter.commit()
+    news += more
+
+    server.requested.clear()
+    more, adapter = await fetch(server, config=adapter.source.config, size=10)
+    assert server.requested == [1, 8, 9, 10, 11]
+    adapter.commit()
+    news += more
+    assert "resume" not in adapter.source.config
+    titles = {n["title"] for n in news}
+    assert titles == {f"快讯 {i}" for i in range(100, 205)}
+
+
+async def test_service_persists_watermark(session, server):
+    """测试入库成功后水位线写入数据源配置，下一次只获取新内容"""
+    service = DataSourceService(session)
+    await service.register_source(
+        name="blockbeats", type="blockbeats", api_url=server.url
+    )
+
+    server.publish(30)
+    await service.fetch_and_save_news("blockbeats")
+    source = await service.repository.get_by_name("blockbeats")
+    assert source.config["watermark"] == START + 29 * 60
+
+    # 重新注册不会清除水位线
+    await service.register_source(
+        name="blockbeats", type="blockbeats", api_url=server.url
+    )
+    server.publish(3)
+    server.requested.clear()
+    await DataSourceService(session).fetch_and_save_news("blockbeats")
+    source = await service.repository.get_by_name("blockbeats")
+    assert source.config["watermark"] == START + 32 * 60
+    assert server.requested == [1]
+
+
+async def test_failed_page_keeps_watermark(session, server, monkeypatch):
+    """测试补齐缺口时某页获取失败，保留原水位线，下次重新补齐"""
+    monkeypatch.setattr(settings, "NEWS_FETCH_PAGE_SIZE", 10)
+    service = DataSourceService(session)
+    await service.register_source(
+        name="blockbeats", type="blockbeats", api_url=server.url
+    )
+    server.publish(5)
+    await service.fetch_and_save_news("blockbeats")
+    source = await service.repository.get_by_name("blockbeats")
+    watermark, validators = source.config["watermark"], source.config["validators"]
+
+    server.publish(45)
+    server.failing = {3}
+    await service.fetch_and_save_news("blockbeats")
+    source = await service.repository.get_by_name("blockbeats")
+    assert source.config["watermark"] == watermark
+    assert source.config["validators"] == validators
+
+    # 接口恢复后不会被判定为未变化，缺口中的新闻全部补齐
+    server.failing = set()
+    server.requested.clear()
+    await service.fetch_and_save_news("blockbeats")
+    source = await service.repository.get_by_name("blockbeats")
+    assert source.config["watermark"] == START + 49 * 60
+    assert sorted(server.requested) == list(range(1, 6))
+
+
+async def test_unchanged_payload_skips_pipeline(session, server, monkeypatch):
+    """测试响应内容未变化时跳过去重与写库，新内容出现后恢复处理"""
+    service = DataSourceService(session, deduplicator=NewsDeduplicator())
+    await service.register_source(
+        name="blockbeats", type="blockbeats", api_url=server.url
+    )
+    calls = []
+    save_news = service.repository.save_news
+
+    async def counting(news_list, source_name):
+        calls.append(len(news_list))
+        return await save_news(news_list, source_name)
+
+    monkeypatch.setattr(service.repository, "save_news", counting)
+
+    server.publish(5)
+    await service.fetch_and_save_news("blockbeats")
+    await service.fetch_and_save_news("blockbeats")
+    adapter = await service.get_adapter("blockbeats")
+    assert adapter.unchanged
+    assert calls == [5]
+
+    server.publish(2)
+    await service.fetch_and_save_news("blockbeats")
+    assert not adapter.unchanged
+    assert calls == [5, 2]
+
+
+async def test_error_payload_is_not_recorded_as_unchanged(server):
+    """测试接口以 HTTP 200 返回错误时不保存校验信息，相同的错误不会被当作未变化"""
+    server.publish(5)
+    server.failing = {1}
+    adapter = BlockBeatsAdapter(
+        DataSource(name="blockbeats", type="blockbeats", api_url=server.url)
+    )
+    params = {"page": 1, "size": 10}
+    for _ in range(2):
+        data = await adapter.fetch(conditional=True, **params)
+        assert data["status"] != 0
+        adapter.commit()
+    assert not (adapter.source.config or {}).get("validators")
+
+    # 调用方确认有效的响应才会保存校验信息
+    server.failing = set()
+    await adapter.fetch(conditional=True, **params)
+    adapter.accept(**params)
+    adapter.commit()
+    with pytest.raises(NotModified):
+        await adapter.fetch(conditional=True, **params)
+
+
+async def test_etag_not_modified(server):
+    """测试携带 If-None-Match，服务端返回 304 时视为未变化"""
+    server.etag = True
+    server.publish(5)
+    news, adapter = await fetch(server, size=10)
+    assert len(news) == 5 and not adapter.unchanged
+
+    # 未提交（如入库失败）时不使用校验信息
+    news, adapter = await fetch(server, config=adapter.source.config, size=10)
+    assert len(news) == 5 and server.not_modified == 0
+
+    adapter.commit()
+    news, adapter = await fetch(server, config=adapter.source.config, size=10)
+    assert news == [] and adapter.unchanged
+    assert server.not_modified == 1
+
+
+async def test_normalized_records_stream_into_save_news(session):
+    """测试规范化结果可作为生成器直接写库，并跳过早于 since 的新闻"""
+    server = FlashServer()
+    server.publish(5)
+    server.items.append({"id": "bad", "title": "坏数据", "create_time": "x"})
+    adapter = BlockBeatsAdapter(DataSource(name="blockbeats", type="blockbeats"))
+
+    records = adapter._normalize(server.items, since=START + 2 * 60)
+    inserted, skipped = await DataSourceRepository(session).save_news(
+        records, "blockbeats"
+    )
+    assert (inserted, skipped) == (3, 0)
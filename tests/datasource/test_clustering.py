@@ -0,0 +1,114 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from app.datasource.clustering import (
+    NearDuplicateIndex,
+    NewsClusterer,
+    cluster_representatives,
+    shingles,
+)
+from app.datasource.dedup import NewsDeduplicator
+from app.datasource.models.market import News
+from app.datasource.services.datasource import DataSourceService
+
+NOW = datetime.utcnow().replace(microsecond=0)
+
+STORIES = [
+    (
+        "比特币突破7万美元，创历史新高",
+        "据行情数据显示，比特币今日突破70000美元，24小时涨幅5.2%，创历史新高。",
+    ),
+    (
+        "BTC突破7万美元 创下历史新高",
+        "<p>行情显示，比特币今日突破70000美元，24小时上涨5.2%，创历史新高。</p>",
+    ),
+    ("以太坊ETF获批", "美国SEC批准了以太坊现货ETF的上市申请。"),
+]
+
+
+def make_news(index: int, minutes: int = 0, link: str = ""):
+    title, content = STORIES[index]
+    return {
+        "title": title,
+        "content": content,
+        "link": link or f"https://example.com/{index}/{minutes}",
+        "publishTime": NOW - timedelta(minutes=minutes),
+    }
+
+
+def test_minhash_estimates_jaccard():
+    """测试签名相似度接近 n-gram 集合的 Jaccard 相似度"""
+    index = NearDuplicateIndex(num_perm=256, bands=64)
+    a, b, c = (shingles(*story) for story in STORIES)
+    jaccard = len(a & b) / len(a | b)
+    sa, sb, sc = (index.hasher.signature(s) for s in (a, b, c))
+    assert abs((sa == sb).mean() - jaccard) < 0.1
+    assert (sa == sc).mean() < 0.1
+
+
+def test_assign_groups_rephrased_stories():
+    """测试改写的同一事件归入同一聚类，无关新闻单独成类，超出时间窗口不再比较"""
+    clusterer = NewsClusterer(window_hours=1)
+    news = [make_news(0), make_news(1, 1), make_news(2, 2)]
+    clusterer.assign(news, "a")
+    assert news[0]["cluster_id"] == news[1]["cluster_id"]
+    assert news[2]["cluster_id"] != news[0]["cluster_id"]
+    assert clusterer.stats() == {"assigned": 3, "clustered": 1, "indexed": 3}
+
+    later = make_news(1, -120)
+    clusterer.assign([later], "b")
+    assert later["cluster_id"] != news[0]["cluster_id"]
+    assert len(clusterer.index) == 1
+
+
+def test_cluster_representatives():
+    """测试每个聚类只保留第一条，未聚类的新闻全部保留"""
+    news = [
+        {"title": "a", "cluster_id": "x"},
+        {"title": "b", "cluster_id": "x"},
+        {"title": "c"},
+        {"title": "d", "cluster_id": "y"},
+        {"title": "e"},
+    ]
+    assert [n["title"] for n in cluster_representatives(news)] == ["a", "c", "d", "e"]
+
+
+class StubAdapter:
+    unchanged = False
+
+    def __init__(self, news):
+        self.news = news
+
+    async def fetch_incremental(self):
+        return self.news
+
+    async def close(self):
+        pass
+
+    def commit(self):
+        pass
+
+
+async def test_clusters_persist_across_sources(session):
+    """测试跨数据源的近似重复在入库时归入同一聚类，重启后预热可恢复"""
+    service = DataSourceService(
+        session, deduplicator=NewsDeduplicator(), clusterer=NewsClusterer()
+    )
+    service._adapters["a"] = StubAdapter([make_news(0)])
+    await service.fetch_and_save_news("a")
+
+    # 新的聚类器从数据库预热
+    service.clusterer = NewsClusterer()
+    service._adapters["b"] = StubAdapter([make_news(1, 1), make_news(2, 2)])
+    await service.fetch_and_save_news("b")
+    assert service.clusterer.stats()["indexed"] == 3
+
+    rows = (await session.execute(
+        select(News.source, News.content_hash, News.cluster_id)
+        .order_by(News.create_time.desc())
+    )).all()
+    assert [row.source for row in rows] == ["a", "b", "b"]
+    assert rows[0].cluster_id == rows[0].content_hash
+    assert rows[1].cluster_id == rows[0].content_hash
+    assert rows[2].cluster_id == rows[2].content_hash
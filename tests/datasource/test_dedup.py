@@ -0,0 +1,92 @@
+import hashlib
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import func, select
+
+from app.datasource.dedup import NewsDeduplicator, SeenSet
+from app.datasource.models.market import News
+from app.datasource.repositories.datasource import DataSourceRepository
+from app.datasource.services.datasource import DataSourceService
+
+
+def digest(value) -> str:
+    return hashlib.sha256(str(value).encode()).hexdigest()
+
+
+def make_news(start: int, count: int):
+    base = datetime.utcnow().replace(microsecond=0)
+    return [
+        {
+            "title": f"新闻{i}",
+            "content": "内容",
+            "link": f"https://example.com/{i}",
+            "publishTime": base - timedelta(minutes=i),
+        }
+        for i in range(start, start + count)
+    ]
+
+
+def test_seen_set_forgets_evicted_items():
+    """测试 LRU 淘汰后的条目判定为未见，交给数据库去重"""
+    seen = SeenSet(lru_size=2)
+    for i in range(3):
+        seen.add(digest(i))
+    assert seen.check(digest(0)) is False
+    assert seen.check(digest(2)) is True
+    assert len(seen) == 2
+
+
+async def test_warmup_and_filter(session):
+    """测试从数据库预热后，已入库的新闻在内存中被过滤"""
+    repository = DataSourceRepository(session)
+    await repository.save_news(make_news(0, 5), "blockbeats")
+
+    deduplicator = NewsDeduplicator(lru_size=100, warmup_days=1)
+    assert await deduplicator.warmup(session, "blockbeats") == 5
+
+    fresh, dropped = deduplicator.filter("blockbeats", make_news(3, 4))
+    assert [n["title"] for n in fresh] == ["新闻5", "新闻6"]
+    assert dropped == 2
+    stats = deduplicator.stats()["blockbeats"]
+    assert stats["checked"] == 4 and stats["hit_rate"] == pytest.approx(0.5)
+
+
+class StubAdapter:
+    unchanged = False
+
+    def __init__(self, pages):
+        self.pages = list(pages)
+
+    async def fetch_news(self, **kwargs):
+        return self.pages.pop(0)
+
+    fetch_incremental = fetch_news
+
+    def commit(self):
+        pass
+
+    async def close(self):
+        pass
+
+
+async def test_service_skips_seen_news(session, monkeypatch):
+    """测试连续拉取时只有新出现的新闻进入数据库"""
+    deduplicator = NewsDeduplicator(lru_size=100)
+    service = DataSourceService(session, deduplicator=deduplicator)
+    service._adapters["blockbeats"] = StubAdapter([make_news(0, 10), make_news(5, 10)])
+
+    calls = []
+    save_news = service.repository.save_news
+
+    async def counting(news_list, source_name):
+        calls.append(len(news_list))
+        return await save_news(news_list, source_name)
+
+    monkeypatch.setattr(service.repository, "save_news", counting)
+    await service.fetch_and_save_news("blockbeats")
+    await service.fetch_and_save_news("blockbeats")
+
+    assert calls == [10, 5]
+    count = await session.execute(select(func.count()).select_from(News))
+    assert count.scalar_one() == 15
@@ -0,0 +1,47 @@
+import pytest
+
+from app.datasource.polling import AdaptivePoller
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+def make_poller(clock):
+    return AdaptivePoller(
+        min_interval=30, max_interval=1800, target_items=5,
+        backoff=1.5, smoothing=0.5, clock=clock,
+    )
+
+
+def test_burst_shortens_interval(clock):
+    """测试突发时间隔缩短，且不低于下限"""
+    poller = make_poller(clock)
+    assert poller.interval("a", 300) == 300
+
+    clock.now = 300
+    assert poller.observe("a", 20, 300) == pytest.approx(150)
+    clock.now += 150
+    assert poller.observe("a", 200, 300) == 30
+
+
+def test_quiet_feed_backs_off_to_max(clock):
+    """测试没有新内容时间隔按倍数逐步放宽，且不超过上限"""
+    poller = make_poller(clock)
+    intervals = []
+    for _ in range(10):
+        clock.now += poller.interval("a", 300)
+        intervals.append(poller.observe("a", 0, 300))
+
+    assert intervals[:3] == [450, 675, 1012.5]
+    assert intervals[-1] == 1800
+    assert poller.stats()["a"]["rate_per_minute"] == 0
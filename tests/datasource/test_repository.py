@@ -1,12 +1,15 @@
 import pytest
 from datetime import datetime, timedelta
+from types import SimpleNamespace
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
 from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
 from app.datasource.repositories.datasource import DataSourceRepository
 from app.datasource.models.datasource import DataSource
-from app.datasource.models.market import News
+from app.datasource.models.market import NEWS_SEARCH_DDL, News
 
 # 创建测试数据库引擎
 TEST_DATABASE_URL = "sqlite+aiosqlite:///:memory:"
@@ -99,7 +102,7 @@ async def test_save_news(repository, test_source):
     ]
 
     # 保存新闻
-    await repository.save_news(news_list, "test_source")
+    assert await repository.save_news(news_list, "test_source") == (2, 0)
 
     # 验证保存结果
     async with repository.session as session:
@@ -170,4 +173,97 @@ async def test_save_news_without_link(repository, test_source):
         news = saved_news.scalars().all()
         assert len(news) == 1
         assert news[0].title == "测试新闻"
-        assert news[0].link == ""  # 链接应该为空字符串
\ No newline at end of file
+        assert news[0].link == ""  # 链接应该为空字符串
+
+@pytest.mark.asyncio
+async def test_save_news_returns_counts(repository):
+    """测试重复保存时返回 (新写入数量, 跳过的重复数量)"""
+    news_list = [
+        {
+            "title": "测试新闻",
+            "link": "http://test.com",
+            "publishTime": datetime(2024, 1, 1),
+        }
+    ]
+
+    assert await repository.save_news(news_list, "test_source") == (1, 0)
+    assert await repository.save_news(news_list, "test_source") == (0, 1)
+
+@pytest.mark.asyncio
+async def test_save_news_bulk_dedup(repository):
+    """测试批量保存时按链接、标题+发布时间以及批内重复去重"""
+    publish_time = datetime(2024, 1, 1, 8, 0)
+    await repository.save_news([
+        {"title": "已存在", "link": "http://a.com", "publishTime": publish_time},
+    ], "test_source")
+
+    news_list = [
+        # 链接相同
+        {"title": "标题变了", "link": "http://a.com", "publishTime": publish_time},
+        # 标题+发布时间相同，链接不同
+        {"title": "已存在", "link": "http://b.com", "publishTime": publish_time},
+        # 批内重复
+        {"title": "新闻1", "link": "http://c.com", "publishTime": publish_time},
+        {"title": "新闻1", "link": "http://c.com", "publishTime": publish_time},
+    ] + [
+        {
+            "title": f"批量新闻{i}",
+            "publishTime": publish_time + timedelta(seconds=i),
+        }
+        for i in range(1200)
+    ]
+    inserted, skipped = await repository.save_news(news_list, "test_source")
+    assert (inserted, skipped) == (1201, 3)
+
+    result = await repository.session.execute(select(News.source, News.status))
+    rows = result.all()
+    assert len(rows) == 1202
+    assert set(rows) == {("test_source", "pending")}
+
+
+async def test_search_news_ranking_and_keyset(session):
+    """测试全文检索的相关度排序、时间范围与键集分页"""
+    repository = DataSourceRepository(session)
+    base = datetime(2024, 1, 1)
+    await repository.save_news([
+        {
+            "title": f"比特币行情 {i}",
+            "content": "比特币" * i + "以太坊",
+            "link": f"https://example.com/search/{i}",
+            "publishTime": base + timedelta(hours=i),
+        }
+        for i in range(1, 6)
+    ], "blockbeats")
+
+    rows = await repository.search_news("比特币", limit=2)
+    assert [n.title for n, _ in rows] == ["比特币行情 5", "比特币行情 4"]
+    assert rows[0][1] > rows[1][1]
+
+    last, rank = rows[-1]
+    rows = await repository.search_news("比特币", limit=10, after=(rank, last.id))
+    assert [n.title for n, _ in rows] == ["比特币行情 3", "比特币行情 2", "比特币行情 1"]
+
+    rows = await repository.search_news(
+        "以太坊 比特币", start=base + timedelta(hours=2), end=base + timedelta(hours=4),
+        order="time",
+    )
+    assert [n.title for n, _ in rows] == ["比特币行情 3", "比特币行情 2"]
+    assert await repository.search_news("狗狗币") == []
+
+
+def test_search_news_postgres_uses_trigram_substring_match():
+    """测试 PostgreSQL 检索按子串匹配每个词，表达式与三元组索引一致"""
+    dialect = postgresql.dialect()
+    session = SimpleNamespace(bind=SimpleNamespace(dialect=dialect))
+    repository = DataSourceRepository(session)
+    _, match, rank = repository._search_match("比特币 100%")
+
+    sql = str(match.compile(dialect=dialect, compile_kwargs={"literal_binds": True}))
+    text = "(coalesce(news_data.title, '') || ' ' || coalesce(news_data.content, ''))"
+    # 百分号在编译结果中按 pyformat 转义为 %%
+    assert sql == (
+        rf"{text} ILIKE '%%比特币%%' ESCAPE '\' "
+        rf"AND {text} ILIKE '%%100\%%%%' ESCAPE '\'"
+    )
+    assert "word_similarity" in str(rank.compile(dialect=dialect))
+    assert f"({text} gin_trgm_ops)" in NEWS_SEARCH_DDL["postgresql"][1]
@@ -0,0 +1,102 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.datasource.models.market import MarketAnalysis, News
+from app.datasource.repositories.market import MarketRepository
+from app.jobs.analyze_market import MarketAnalysisJob
+
+
+class FakeAnalyzer:
+    """本地假分析器：记录输入，指定的交易对视为重试耗尽而缺失"""
+
+    def __init__(self, fail=()):
+        self.fail = set(fail)
+        self.inputs = None
+
+    async def analyze_many(self, inputs):
+        self.inputs = inputs
+        return {
+            symbol: {
+                "analysis": f"{symbol} 看涨，置信度 70%",
+                "sentiment": "看涨",
+                "confidence": 70,
+                "prompt_tokens": 500,
+            }
+            for symbol in inputs if symbol not in self.fail
+        }
+
+
+@pytest.fixture
+def factory(engine):
+    return sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def seed(session, symbols, count=120):
+    start = datetime(2024, 3, 1)
+    rng = np.random.default_rng(7)
+    klines = []
+    for symbol in symbols:
+        close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, count)))
+        klines += [
+            {
+                "symbol": symbol, "timestamp": start + timedelta(minutes=i),
+                "open": float(c), "high": float(c) * 1.001,
+                "low": float(c) * 0.999, "close": float(c), "volume": 2.0,
+            }
+            for i, c in enumerate(close)
+        ]
+    await MarketRepository(session).upsert_klines(klines)
+
+    now = datetime.utcnow()
+    session.add_all([
+        News(
+            title=f"新闻{i}", content="正文", link=f"https://example.com/{i}",
+            create_time=now - timedelta(minutes=i), type="push", source="blockbeats",
+            summary=f"摘要{i}", sentiment=sentiment, status="done",
+        )
+        for i, sentiment in enumerate(["看跌", "看跌", "看涨", None])
+    ])
+    await session.commit()
+
+
+async def test_run_once_analyzes_symbols_and_persists(factory, session):
+    """测试为各交易对准备输入、并发分析并写入 market_analysis"""
+    await seed(session, ["AAAUSDT", "BBBUSDT", "CCCUSDT"])
+    analyzer = FakeAnalyzer(fail={"BBBUSDT"})
+    job = MarketAnalysisJob(
+        analyzer=analyzer, session_factory=factory,
+        symbols=["AAAUSDT", "BBBUSDT", "CCCUSDT", "MISSINGUSDT"],
+    )
+
+    assert await job.run_once() == 2
+    assert set(analyzer.inputs) == {"AAAUSDT", "BBBUSDT", "CCCUSDT"}
+
+    market, indicators, news = analyzer.inputs["AAAUSDT"]
+    assert market["volume"] == 120.0
+    assert "rsi" in indicators and len(news) == 4
+    assert news[0]["summary"] == "摘要0"
+
+    async with factory() as check:
+        rows = (await check.execute(
+            select(MarketAnalysis).order_by(MarketAnalysis.symbol)
+        )).scalars().all()
+    assert [row.symbol for row in rows] == ["AAAUSDT", "CCCUSDT"]
+    assert rows[0].timestamp == datetime(2024, 3, 1) + timedelta(minutes=119)
+    assert rows[0].confidence == 70
+    assert rows[0].technical_sentiment in {"看涨", "看跌", "中性"}
+    assert rows[0].news_sentiment == "看跌"
+
+
+async def test_run_once_without_market_data(factory):
+    """测试没有K线数据时不调用分析器"""
+    analyzer = FakeAnalyzer()
+    job = MarketAnalysisJob(
+        analyzer=analyzer, session_factory=factory, symbols=["NONEUSDT"]
+    )
+    assert await job.run_once() == 0
+    assert analyzer.inputs is None
@@ -0,0 +1,170 @@
+import asyncio
+import json
+import re
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.datasource.models.market import News
+from app.datasource.repositories.datasource import DataSourceRepository
+from app.jobs.enrich_news import NewsEnrichmentWorker, parse_enrichment
+
+
+class FakeLLM:
+    """本地假 LLM：按提示中的 [编号] 逐条返回摘要，可指定失败的编号"""
+
+    def __init__(self, delay: float = 0.0, drop=(), fail_on=()):
+        self.delay = delay
+        self.drop = set(drop)
+        self.fail_on = set(fail_on)
+        self.prompts = []
+        self.running = 0
+        self.peak = 0
+
+    async def complete(self, system, prompt):
+        self.prompts.append(prompt)
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.running -= 1
+        ids = [int(i) for i in re.findall(r"^\[(\d+)\]", prompt, re.M)]
+        if self.fail_on & set(ids):
+            raise RuntimeError("rate limited")
+        rows = [
+            {"id": i, "summary": f"摘要{i}", "sentiment": "看涨" if i % 2 else "利好"}
+            for i in ids if i not in self.drop
+        ]
+        text = "```json\n" + json.dumps(rows, ensure_ascii=False) + "\n```"
+        return text, {"prompt_tokens": 100 * len(ids), "completion_tokens": 20}
+
+
+@pytest.fixture
+def factory(engine):
+    return sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def add_news(session, count, status="pending", content="正文" * 50):
+    start = datetime(2024, 6, 1)
+    session.add_all([
+        News(
+            title=f"新闻{i}", content=content, link=f"https://example.com/{i}",
+            create_time=start + timedelta(minutes=i), type="push",
+            source="blockbeats", status=status,
+        )
+        for i in range(count)
+    ])
+    await session.commit()
+
+
+async def statuses(factory):
+    async with factory() as session:
+        result = await session.execute(
+            select(News.id, News.status, News.summary, News.sentiment).order_by(News.id)
+        )
+        return result.all()
+
+
+def test_parse_enrichment_ignores_unknown_ids_and_bad_sentiment():
+    """测试解析回复时忽略未请求的编号，并把无法识别的情绪记为中性"""
+    text = '结果如下：[{"id": 1, "summary": "A", "sentiment": "看跌"},' \
+        ' {"id": "2", "summary": "B", "sentiment": "利好"},' \
+        ' {"id": 9, "summary": "C"}, {"id": 3, "summary": ""}]'
+    assert parse_enrichment(text, [1, 2, 3]) == {
+        1: {"summary": "A", "sentiment": "看跌"},
+        2: {"summary": "B", "sentiment": "中性"},
+    }
+    assert parse_enrichment("抱歉，无法处理", [1]) == {}
+    assert parse_enrichment("[{broken", [1]) == {}
+
+
+async def test_worker_packs_items_and_writes_results(factory, session):
+    """测试多条新闻打包进同一请求，并发执行且不超过上限，结果批量写回"""
+    await add_news(session, 25)
+    llm = FakeLLM(delay=0.01)
+    worker = NewsEnrichmentWorker(
+        llm=llm, session_factory=factory, claim_size=100,
+        items_per_request=5, token_budget=10000, concurrency=2,
+    )
+
+    assert await worker.run_once() == 25
+    assert len(llm.prompts) == 5
+    assert llm.peak == 2
+
+    rows = await statuses(factory)
+    assert {row.status for row in rows} == {"done"}
+    assert rows[0].summary == "摘要1" and rows[0].sentiment == "看涨"
+    assert rows[1].sentiment == "中性"
+    assert await worker.run_once() == 0
+
+    stats = worker.stats()
+    assert stats["done"] == 25 and stats["items_per_request"] == 5
+    assert stats["prompt_tokens"] == 2500 and stats["completion_tokens"] == 100
+    assert stats["items_per_dollar"] == pytest.approx(25 / stats["cost"])
+    assert stats["items_per_minute"] > 0
+
+
+async def test_worker_respects_token_budget(factory, session):
+    """测试 token 预算不足时减少每个请求打包的条数"""
+    await add_news(session, 6, content="比特币" * 100)
+    llm = FakeLLM()
+    worker = NewsEnrichmentWorker(
+        llm=llm, session_factory=factory, items_per_request=10,
+        token_budget=600, content_chars=200,
+    )
+
+    await worker.run_once()
+    assert [prompt.count("[") for prompt in llm.prompts] == [2, 2, 2]
+
+
+async def test_worker_marks_failures(factory, session):
+    """测试回复缺少条目时标记为 failed，请求失败的新闻放回 pending 重试"""
+    await add_news(session, 6)
+    llm = FakeLLM(drop={2}, fail_on={5})
+    worker = NewsEnrichmentWorker(
+        llm=llm, session_factory=factory, items_per_request=3, token_budget=10000,
+        max_attempts=2,
+    )
+
+    assert await worker.run_once() == 3
+    rows = {row.id: row for row in await statuses(factory)}
+    # 新的在前认领：[6, 5, 4] 因 5 请求失败放回队列，[3, 2, 1] 中 2 缺少结果
+    assert [rows[i].status for i in sorted(rows)] == [
+        "done", "failed", "done", "pending", "pending", "pending"
+    ]
+    assert rows[2].summary is None
+    assert worker.stats()["request_errors"] == 1
+
+    # 重试时请求仍然失败，达到尝试上限后记为 failed
+    llm.fail_on = {6}
+    llm.drop = set()
+    assert await worker.run_once() == 3
+    rows = {row.id: row for row in await statuses(factory)}
+    assert [rows[i].status for i in (4, 5, 6)] == ["failed"] * 3
+    llm.fail_on = set()
+    assert await worker.run_once() == 0
+    assert worker.stats()["requeued"] == 3
+
+
+async def test_claim_skips_fresh_processing_and_reclaims_stale(session):
+    """测试认领时跳过处理中的新闻，超时未完成的新闻重新认领"""
+    await add_news(session, 3)
+    repository = DataSourceRepository(session)
+
+    claimed = await repository.claim_pending_news(2, datetime.utcnow())
+    assert [news.title for news in claimed] == ["新闻2", "新闻1"]
+    assert await repository.count_news_by_status() == {
+        "pending": 1, "processing": 2
+    }
+
+    claimed = await repository.claim_pending_news(10, datetime(2000, 1, 1))
+    assert [news.title for news in claimed] == ["新闻0"]
+
+    claimed = await repository.claim_pending_news(
+        10, datetime.utcnow() + timedelta(seconds=1)
+    )
+    assert len(claimed) == 3
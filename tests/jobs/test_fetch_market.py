@@ -0,0 +1,201 @@
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from app.core.kline_store import KlineStore, to_ms
+from app.datasource.models.market import Kline
+from app.datasource.repositories.market import MarketRepository
+from app.jobs.fetch_market import KlineIngestor, fetch_market_data
+
+MINUTE_MS = 60_000
+
+
+class FakeBinanceClient:
+    """模拟 Binance 客户端：按 startTime/limit 返回连续的1分钟K线"""
+
+    def __init__(self):
+        self.calls = []
+        self.closed = False
+        self.failing = set()
+
+    async def get_klines(self, symbol, interval, limit, startTime=None):
+        self.calls.append({"symbol": symbol, "startTime": startTime, "limit": limit})
+        if startTime in self.failing:
+            raise ConnectionError("request timed out")
+        now_ms = int(time.time() * 1000) // MINUTE_MS * MINUTE_MS
+        if startTime is None:
+            startTime = now_ms - (limit - 1) * MINUTE_MS
+        klines = []
+        for i in range(limit):
+            open_ms = startTime + i * MINUTE_MS
+            if open_ms > now_ms:
+                break
+            # 最后一根为未收盘K线
+            klines.append([
+                open_ms, "1", "2", "0.5", "1.5", "10",
+                open_ms + MINUTE_MS - 1, "15", 3, "5", "7", "0",
+            ])
+        return klines
+
+    async def close_connection(self):
+        self.closed = True
+
+
+class FlakyStore(KlineStore):
+    """第一次写入失败的K线缓存"""
+
+    def __init__(self, root):
+        super().__init__(root)
+        self.failures = 1
+
+    def append_many(self, interval, bars):
+        if self.failures:
+            self.failures -= 1
+            raise OSError("disk full")
+        super().append_many(interval, bars)
+
+
+async def count_klines(session, symbol=None):
+    stmt = select(func.count()).select_from(Kline)
+    if symbol:
+        stmt = stmt.where(Kline.symbol == symbol)
+    return (await session.execute(stmt)).scalar_one()
+
+
+async def test_upsert_klines_skips_duplicates(session):
+    """测试批量写入时跳过已存在的K线"""
+    repository = MarketRepository(session)
+    base = datetime(2024, 1, 1)
+    rows = [
+        {
+            "symbol": "BTCUSDT",
+            "timestamp": base + timedelta(minutes=i),
+            "open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5, "volume": 10.0,
+        }
+        for i in range(2500)
+    ]
+
+    assert await repository.upsert_klines(rows[:1500]) == 1500
+    assert await repository.upsert_klines(rows) == 1000
+    assert await count_klines(session) == 2500
+
+    latest = await repository.get_latest_timestamps(["BTCUSDT", "ETHUSDT"])
+    assert latest == {"BTCUSDT": base + timedelta(minutes=2499)}
+
+
+async def test_ingest_multiple_symbols(session):
+    """测试多交易对采集：首轮拉取最新一页，次轮只补缺口"""
+    client = FakeBinanceClient()
+    ingestor = KlineIngestor(
+        client=client, symbols=["BTCUSDT", "ETHUSDT"], interval="1m", limit=100
+    )
+
+    inserted = await fetch_market_data(session, ingestor)
+    # 每个交易对一页，未收盘的K线被丢弃
+    assert inserted == 2 * 99
+    assert len(client.calls) == 2
+    assert all(call["startTime"] is None for call in client.calls)
+
+    client.calls.clear()
+    await fetch_market_data(session, ingestor)
+    assert await count_klines(session, "BTCUSDT") >= 99
+    assert all(call["startTime"] is not None for call in client.calls)
+    assert not client.closed
+
+
+async def seed_stale_kline(session, days=2):
+    stale = (datetime.utcnow() - timedelta(days=days)).replace(second=0, microsecond=0)
+    await MarketRepository(session).upsert_klines([{
+        "symbol": "BTCUSDT", "timestamp": stale,
+        "open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5, "volume": 10.0,
+    }])
+    return stale
+
+
+async def test_backfill_pages_are_bounded(session):
+    """测试长时间中断后从最旧的缺口开始按页并发补齐，且页数受上限约束"""
+    stale = await seed_stale_kline(session)
+
+    client = FakeBinanceClient()
+    ingestor = KlineIngestor(
+        client=client, symbols=["BTCUSDT"], interval="1m",
+        limit=500, concurrency=2, max_pages=3,
+    )
+    inserted = await ingestor.ingest(session)
+
+    assert len(client.calls) == 3
+    starts = sorted(call["startTime"] for call in client.calls)
+    assert starts[0] == to_ms(stale) + MINUTE_MS
+    assert starts[1] - starts[0] == 500 * MINUTE_MS
+    assert inserted == 1500
+
+    # 下一轮从上一轮补齐的位置继续
+    client.calls.clear()
+    await ingestor.ingest(session)
+    resumed = min(call["startTime"] for call in client.calls)
+    assert resumed == starts[-1] + 500 * MINUTE_MS
+
+
+async def test_failed_page_is_refetched(session):
+    """测试某页拉取失败时只写入之前的连续分页，下一轮从失败的分页重新拉取"""
+    stale = await seed_stale_kline(session)
+    client = FakeBinanceClient()
+    ingestor = KlineIngestor(
+        client=client, symbols=["BTCUSDT"], interval="1m", limit=500, max_pages=3,
+    )
+    failed = to_ms(stale) + 501 * MINUTE_MS
+    client.failing = {failed}
+    assert await ingestor.ingest(session) == 500
+
+    client.failing = set()
+    client.calls.clear()
+    assert await ingestor.ingest(session) == 1500
+    assert min(call["startTime"] for call in client.calls) == failed
+
+
+async def test_failed_store_write_is_retried(session, tmp_path):
+    """测试K线已入库但缓存写入失败时，下一轮重试写入缓存"""
+    store = FlakyStore(tmp_path)
+    client = FakeBinanceClient()
+    ingestor = KlineIngestor(
+        client=client, symbols=["BTCUSDT"], interval="1m", limit=10, store=store,
+    )
+    assert await ingestor.ingest(session) > 0
+    assert not len(store.read("BTCUSDT", "1m")["timestamp"])
+
+    await ingestor.ingest(session)
+    timestamps = store.read("BTCUSDT", "1m")["timestamp"]
+    assert len(timestamps) == await count_klines(session, "BTCUSDT")
+
+
+async def test_internal_gap_is_backfilled(session):
+    """测试断线留下的中间空洞（之后已有更新的K线）被定位并补齐"""
+    now = datetime.utcnow().replace(second=0, microsecond=0)
+    base = now - timedelta(minutes=30)
+    await MarketRepository(session).upsert_klines([
+        {
+            "symbol": "BTCUSDT", "timestamp": base + timedelta(minutes=i),
+            "open": 1.0, "high": 2.0, "low": 0.5, "close": 1.5, "volume": 10.0,
+        }
+        for i in list(range(10)) + list(range(20, 29))
+    ])
+
+    client = FakeBinanceClient()
+    ingestor = KlineIngestor(
+        client=client, symbols=["BTCUSDT"], interval="1m", limit=5, max_pages=4,
+    )
+    await ingestor.ingest(session)
+
+    starts = {call["startTime"] for call in client.calls}
+    gap_start = to_ms(base + timedelta(minutes=10))
+    assert {gap_start, gap_start + 5 * MINUTE_MS} <= starts
+    stmt = select(func.count()).select_from(Kline).where(
+        Kline.timestamp >= base, Kline.timestamp < base + timedelta(minutes=29)
+    )
+    assert (await session.execute(stmt)).scalar_one() == 29
+
+    # 空洞补齐后不再重复拉取
+    client.calls.clear()
+    await ingestor.ingest(session)
+    assert gap_start not in {call["startTime"] for call in client.calls}
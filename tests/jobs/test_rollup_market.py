@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import select
+
+from app.core.types import KlineInterval
+from app.datasource.models.market import KLINE_MODELS
+from app.datasource.repositories.market import MarketRepository
+from app.jobs.rollup_market import KlineRollup, bucket_start
+
+START = datetime(2024, 1, 1, 22, 0)
+
+
+def make_klines(symbol: str, start: datetime, minutes: int, seed: int):
+    """生成连续的1分钟K线"""
+    rng = np.random.default_rng(seed)
+    close = 100 + rng.standard_normal(minutes).cumsum()
+    return [
+        {
+            "symbol": symbol,
+            "timestamp": start + timedelta(minutes=i),
+            "open": float(close[i] - 0.5),
+            "high": float(close[i] + rng.random()),
+            "low": float(close[i] - 1 - rng.random()),
+            "close": float(close[i]),
+            "volume": float(rng.random() * 10),
+        }
+        for i in range(minutes)
+    ]
+
+
+def resample(klines, rule: str) -> pd.DataFrame:
+    """用 pandas 重采样作为对照"""
+    df = pd.DataFrame(klines).set_index("timestamp")
+    return df.groupby("symbol").resample(rule).agg({
+        "open": "first", "high": "max", "low": "min", "close": "last", "volume": "sum",
+    }).dropna()
+
+
+async def load(session, interval: KlineInterval) -> pd.DataFrame:
+    model = KLINE_MODELS[interval]
+    result = await session.execute(select(model))
+    columns = ("symbol", "timestamp", "open", "high", "low", "close", "volume")
+    rows = [{c: getattr(r, c) for c in columns} for r in result.scalars().all()]
+    return pd.DataFrame(rows).set_index(["symbol", "timestamp"]).sort_index()
+
+
+def test_bucket_start():
+    ts = datetime(2024, 1, 1, 13, 47, 0)
+    assert bucket_start(ts, KlineInterval.M15) == datetime(2024, 1, 1, 13, 45)
+    assert bucket_start(ts, KlineInterval.H4) == datetime(2024, 1, 1, 12, 0)
+    assert bucket_start(ts, KlineInterval.D1) == datetime(2024, 1, 1)
+
+
+def test_plan_cascades_intervals():
+    rollup = KlineRollup(["1d", "5m", "1h"])
+    assert [(t.value, s.value) for t, s in rollup.plan] == [
+        ("5m", "1m"), ("1h", "5m"), ("1d", "1h"),
+    ]
+
+
+@pytest.mark.parametrize("interval, rule", [
+    (KlineInterval.M5, "5min"),
+    (KlineInterval.H1, "1h"),
+    (KlineInterval.D1, "1D"),
+])
+async def test_incremental_rollup_matches_resample(session, interval, rule):
+    """测试分批增量聚合结果与一次性重采样一致（跨日期边界）"""
+    repository = MarketRepository(session)
+    rollup = KlineRollup()
+    klines = make_klines("BTCUSDT", START, 180, 1)
+    klines += make_klines("ETHUSDT", START, 180, 2)
+    klines.sort(key=lambda k: k["timestamp"])
+
+    # 模拟分批到达，包括不完整的周期
+    for i in range(0, len(klines), 37):
+        batch = klines[i:i + 37]
+        await repository.upsert_klines(batch)
+        await rollup.rollup(session, batch)
+
+    expected = resample(klines, rule)
+    actual = await load(session, interval)
+    assert len(actual) == len(expected)
+    np.testing.assert_allclose(
+        actual[["open", "high", "low", "close", "volume"]].to_numpy(),
+        expected[["open", "high", "low", "close", "volume"]].to_numpy(),
+    )
@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.core.config import settings
+from app.datasource.polling import AdaptivePoller
+from app.datasource.repositories.datasource import DataSourceRepository
+from app.datasource.services.datasource import DataSourceService
+from app.scheduler import NEWS_JOB_PREFIX, JobScheduler
+
+
+@pytest.fixture
+def scheduler(engine):
+    factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    return JobScheduler(session_factory=factory)
+
+
+def news_jobs(scheduler: JobScheduler):
+    return {
+        job.id[len(NEWS_JOB_PREFIX):]: job.trigger.interval.total_seconds()
+        for job in scheduler.scheduler.get_jobs()
+        if job.id.startswith(NEWS_JOB_PREFIX)
+    }
+
+
+async def test_sync_news_jobs_tracks_sources(scheduler, session):
+    """测试按数据库中的活跃数据源增删任务，并跟随 fetch_interval 调整"""
+    service = DataSourceService(session)
+    await service.register_source("a", "blockbeats", "http://a", fetch_interval=60)
+    await service.register_source("b", "blockbeats", "http://b", fetch_interval=300)
+
+    await scheduler.sync_news_jobs()
+    assert news_jobs(scheduler) == {"a": 60, "b": 300}
+
+    source = await DataSourceRepository(session).get_by_name("a")
+    source.fetch_interval = 120
+    await service.register_source("b", "blockbeats", "http://b", is_active=False)
+    await service.register_source("c", "blockbeats", "http://c", fetch_interval=30)
+
+    await scheduler.sync_news_jobs()
+    assert news_jobs(scheduler) == {"a": 120, "c": 30}
+
+
+async def test_fetch_jobs_run_concurrently_under_cap(scheduler, monkeypatch):
+    """测试各数据源任务并发执行，且不超过全局并发上限"""
+    running, peak, sessions = 0, 0, []
+
+    async def fetch_and_save_news(self, source_name):
+        nonlocal running, peak
+        sessions.append(self.session)
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.05)
+        running -= 1
+        if source_name == "bad":
+            raise RuntimeError("boom")
+
+    monkeypatch.setattr(
+        DataSourceService, "fetch_and_save_news", fetch_and_save_news
+    )
+    scheduler._news_semaphore = asyncio.Semaphore(2)
+    names = ["a", "b", "c", "d", "bad"]
+    await asyncio.gather(*(scheduler._fetch_news_job(name) for name in names))
+
+    assert peak == 2
+    assert len({id(s) for s in sessions}) == len(names)
+
+
+async def test_adaptive_interval_follows_arrivals(engine, session, monkeypatch):
+    """测试自适应模式下按写入条数调整任务间隔，同步数据源时保持当前间隔"""
+    factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    poller = AdaptivePoller(min_interval=30, max_interval=1800, target_items=5)
+    scheduler = JobScheduler(session_factory=factory, poller=poller)
+    scheduler.adaptive = True
+
+    await DataSourceService(session).register_source(
+        "a", "blockbeats", "http://a", fetch_interval=300
+    )
+    await scheduler.sync_news_jobs()
+    assert news_jobs(scheduler) == {"a": 300}
+
+    inserted = iter([0, 500])
+
+    async def fetch_and_save_news(self, source_name):
+        return next(inserted)
+
+    monkeypatch.setattr(
+        DataSourceService, "fetch_and_save_news", fetch_and_save_news
+    )
+    await scheduler._fetch_news_job("a")
+    assert news_jobs(scheduler) == {"a": 450}
+
+    await scheduler._fetch_news_job("a")
+    assert news_jobs(scheduler) == {"a": 30}
+
+    await scheduler.sync_news_jobs()
+    assert news_jobs(scheduler) == {"a": 30}
+
+
+async def test_market_fetch_job_reuses_ingestor(engine):
+    """测试定期运行K线采集任务，每次使用新会话并复用同一个采集器"""
+
+    class StubIngestor:
+        def __init__(self):
+            self.sessions = []
+
+        async def ingest(self, session):
+            self.sessions.append(session)
+            return 0
+
+    factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    ingestor = StubIngestor()
+    scheduler = JobScheduler(session_factory=factory, market_ingestor=ingestor)
+    job = scheduler.scheduler.get_job("fetch_market")
+    assert job.trigger.interval.total_seconds() == settings.MARKET_FETCH_INTERVAL
+
+    await scheduler._fetch_market_job()
+    await scheduler._fetch_market_job()
+    assert len(ingestor.sessions) == 2
+    assert ingestor.sessions[0] is not ingestor.sessions[1]
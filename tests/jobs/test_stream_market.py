@@ -0,0 +1,174 @@
+import asyncio
+import json
+
+import pytest
+import websockets
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from app.datasource.models.market import Kline
+from app.core.kline_store import KlineStore
+from app.jobs.stream_market import KlineStreamIngestor
+
+BASE_MS = 1_704_067_200_000  # 2024-01-01 00:00:00 UTC
+
+
+def kline_message(symbol: str, minute: int, closed: bool = True) -> str:
+    """构造 Binance 组合流K线消息"""
+    open_ms = BASE_MS + minute * 60_000
+    return json.dumps({
+        "stream": f"{symbol.lower()}@kline_1m",
+        "data": {
+            "e": "kline",
+            "s": symbol,
+            "k": {
+                "t": open_ms, "T": open_ms + 59_999, "s": symbol, "i": "1m",
+                "o": "1.0", "h": "2.0", "l": "0.5", "c": "1.5", "v": "10",
+                "x": closed,
+            },
+        },
+    })
+
+
+class StubStreamServer:
+    """本地模拟 Binance 组合流服务：每个连接发送一批消息后断开"""
+
+    def __init__(self, batches):
+        self.batches = list(batches)
+        self.paths = []
+
+    async def handler(self, connection):
+        self.paths.append(connection.request.path)
+        messages = self.batches.pop(0) if self.batches else []
+        for message in messages:
+            await connection.send(message)
+        if self.batches:
+            return  # 断开连接，触发客户端重连
+        await connection.wait_closed()
+
+
+@pytest.fixture
+def session_factory(engine):
+    return sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+
+async def count_klines(session_factory):
+    async with session_factory() as session:
+        stmt = select(func.count()).select_from(Kline)
+        return (await session.execute(stmt)).scalar_one()
+
+
+async def wait_for(predicate, timeout: float = 3.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not await predicate():
+        assert asyncio.get_running_loop().time() < deadline, "等待超时"
+        await asyncio.sleep(0.02)
+
+
+async def test_stream_flushes_closed_klines_and_reconnects(session_factory):
+    """测试只写入收盘K线，且断线后自动重连继续采集"""
+    server = StubStreamServer([
+        [kline_message("BTCUSDT", 0), kline_message("BTCUSDT", 1, closed=False)],
+        [kline_message("BTCUSDT", 1), kline_message("ETHUSDT", 1)],
+    ])
+    received = []
+    async with websockets.serve(server.handler, "127.0.0.1", 0) as ws_server:
+        port = ws_server.sockets[0].getsockname()[1]
+        ingestor = KlineStreamIngestor(
+            symbols=["BTCUSDT", "ETHUSDT"],
+            interval="1m",
+            base_url=f"ws://127.0.0.1:{port}",
+            batch_size=100,
+            flush_interval=0.05,
+            session_factory=session_factory,
+            on_kline=received.append,
+        )
+        ingestor.reconnect_delay = 0.01
+        task = asyncio.create_task(ingestor.run())
+
+        async def received_all():
+            return len(received) == 3
+
+        await wait_for(received_all)
+        await ingestor.stop()
+        await task
+
+    assert await count_klines(session_factory) == 3
+    assert len(server.paths) == 2
+    assert server.paths[0] == "/stream?streams=btcusdt@kline_1m/ethusdt@kline_1m"
+    assert [k["symbol"] for k in received] == ["BTCUSDT", "BTCUSDT", "ETHUSDT"]
+
+
+async def test_size_triggered_flush(session_factory):
+    """测试缓冲达到批量大小时立即写库"""
+    messages = [kline_message("BTCUSDT", minute) for minute in range(5)]
+    server = StubStreamServer([messages])
+    received = []
+    async with websockets.serve(server.handler, "127.0.0.1", 0) as ws_server:
+        port = ws_server.sockets[0].getsockname()[1]
+        ingestor = KlineStreamIngestor(
+            symbols=["BTCUSDT"],
+            interval="1m",
+            base_url=f"ws://127.0.0.1:{port}",
+            batch_size=4,
+            flush_interval=60,
+            session_factory=session_factory,
+            on_kline=received.append,
+        )
+        task = asyncio.create_task(ingestor.run())
+
+        # 定时写库间隔为60秒，缓冲清空只能由数量触发
+        async def flushed_batch():
+            return (
+                len(received) == 5
+                and not ingestor._buffer
+                and not ingestor._flush_lock.locked()
+            )
+
+        await wait_for(flushed_batch)
+        assert await count_klines(session_factory) == 5
+
+        await ingestor.stop()
+        await task
+
+
+def test_stream_urls_are_chunked(monkeypatch):
+    """测试交易对过多时拆分为多个连接"""
+    monkeypatch.setattr("app.core.config.settings.MARKET_STREAM_MAX_STREAMS", 2)
+    ingestor = KlineStreamIngestor(
+        symbols=["BTCUSDT", "ETHUSDT", "SOLUSDT"], interval="5m", base_url="ws://x/"
+    )
+    assert ingestor.stream_urls() == [
+        "ws://x/stream?streams=btcusdt@kline_5m/ethusdt@kline_5m",
+        "ws://x/stream?streams=solusdt@kline_5m",
+    ]
+
+
+async def test_failed_store_write_is_retried(session_factory, tmp_path):
+    """测试K线已入库但缓存写入失败时，重试整批写入缓存"""
+
+    class FlakyStore(KlineStore):
+        failures = 1
+
+        def append_many(self, interval, bars):
+            if self.failures:
+                self.failures -= 1
+                raise OSError("disk full")
+            super().append_many(interval, bars)
+
+    store = FlakyStore(tmp_path)
+    ingestor = KlineStreamIngestor(
+        symbols=["BTCUSDT"], interval="1m", base_url="ws://x/",
+        session_factory=session_factory, store=store,
+    )
+    for minute in range(3):
+        ingestor._handle_message(kline_message("BTCUSDT", minute))
+
+    assert await ingestor.flush() == 0
+    assert await count_klines(session_factory) == 3
+    assert len(ingestor._buffer) == 3
+
+    await ingestor.flush()
+    assert not ingestor._buffer
+    assert len(store.read("BTCUSDT", "1m")["timestamp"]) == 3